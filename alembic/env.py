@@ -9,6 +9,7 @@ from pathlib import Path
 from logging.config import fileConfig
 
 # ！！！新添加的 import！！！
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine
 
 from sqlalchemy.pool import NullPool
@@ -25,6 +26,18 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 target_metadata = Base.metadata
 
+
+def include_name(name, type_, parent_names):
+    """
+    autogenerate 时忽略全文检索相关的对象，它们由迁移脚本手动维护：
+    SQLite 的虚拟表及其影子表 (events_fts*)，以及 PostgreSQL 的 pg_trgm 索引。
+    """
+    if type_ == "table" and name and name.startswith("events_fts"):
+        return False
+    if type_ == "index" and name == "ix_events_content_trgm":
+        return False
+    return True
+
 def run_migrations_offline() -> None:
     # ... (这部分保持不变) ...
     url = settings.DATABASE_URL
@@ -33,11 +46,26 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        render_as_batch=url.startswith("sqlite"),
+        include_name=include_name,
     )
     with context.begin_transaction():
         context.run_migrations()
 
 
+def set_sqlite_auto_vacuum(dbapi_connection, connection_record) -> None:
+    """
+    auto_vacuum 只有在数据库中还没有任何表时才能设置，而新数据库的表都由迁移创建，
+    所以必须在迁移的连接上、执行第一条迁移之前设置 (与 src/db/database.py 中的 SqlitePragmas 一致)。
+    对已经有表的数据库不起作用，它们需要执行一次 VACUUM 才会切换。
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA auto_vacuum={settings.SQLITE_AUTO_VACUUM}")
+    finally:
+        cursor.close()
+
+
 # vvvvvv 这里是我们需要修改的地方 vvvvvv
 def run_migrations_online() -> None:
     """在 'online' 模式下运行迁移。"""
@@ -59,6 +87,8 @@ def run_migrations_online() -> None:
             settings.DATABASE_URL,
             poolclass=NullPool,
         )
+        if connectable.dialect.name == "sqlite":
+            event.listen(connectable.sync_engine, "connect", set_sqlite_auto_vacuum)
 
         # 后续的异步代码是完全正确的，无需改动！
         async with connectable.connect() as connection:
@@ -68,7 +98,14 @@ def run_migrations_online() -> None:
 
     def do_run_migrations(connection):
         """一个包含所有同步 Alembic 操作的内部函数。"""
-        context.configure(connection=connection, target_metadata=target_metadata)
+        # SQLite 不支持大部分 ALTER TABLE，需要用 batch 模式 (重建表) 执行迁移；
+        # PostgreSQL 直接执行 ALTER。同一套迁移脚本因此可以在两种数据库上运行。
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=connection.dialect.name == "sqlite",
+            include_name=include_name,
+        )
         with context.begin_transaction():
             context.run_migrations()
 
@@ -0,0 +1,42 @@
+"""event composite indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 01:26:38.259295
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    'ix_events_channel_id_created_at': ['channel_id', 'created_at'],
+    'ix_events_author_id_created_at': ['author_id', 'created_at'],
+    'ix_events_guild_id_event_type_created_at': ['guild_id', 'event_type', 'created_at'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        # events 表可能已经很大：在事务之外用 CONCURRENTLY 建索引，建索引期间不阻塞写入
+        with op.get_context().autocommit_block():
+            for name, columns in INDEXES.items():
+                op.create_index(name, 'events', columns, postgresql_concurrently=True, if_not_exists=True)
+        return
+    for name, columns in INDEXES.items():
+        op.create_index(name, 'events', columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in reversed(list(INDEXES)):
+        op.drop_index(name, table_name='events')
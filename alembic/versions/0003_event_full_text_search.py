@@ -0,0 +1,61 @@
+"""event full text search
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 01:40:12.118034
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# SQLite：FTS5 trigram 虚拟表 + 同步触发器 (与 src/db/models.py 中的 EVENTS_FTS_DDL 一致)
+SQLITE_FTS = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5("
+    "content, content='events', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS events_fts_ai AFTER INSERT ON events BEGIN "
+    "INSERT INTO events_fts(rowid, content) VALUES (new.id, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS events_fts_ad AFTER DELETE ON events BEGIN "
+    "INSERT INTO events_fts(events_fts, rowid, content) VALUES ('delete', old.id, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS events_fts_au AFTER UPDATE OF content ON events BEGIN "
+    "INSERT INTO events_fts(events_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+    "INSERT INTO events_fts(rowid, content) VALUES (new.id, new.content); END",
+    # 为已有的事件建立索引
+    "INSERT INTO events_fts(events_fts) VALUES ('rebuild')",
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_FTS:
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        # PostgreSQL：pg_trgm 的 GIN 索引加速 ILIKE 子串匹配和 `%>` (word_similarity) 任意匹配，并提供排序用的相似度函数
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        with op.get_context().autocommit_block():
+            op.create_index(
+                'ix_events_content_trgm', 'events', ['content'],
+                postgresql_using='gin', postgresql_ops={'content': 'gin_trgm_ops'},
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for trigger in ('events_fts_au', 'events_fts_ad', 'events_fts_ai'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS events_fts")
+    elif dialect == 'postgresql':
+        op.drop_index('ix_events_content_trgm', table_name='events')
@@ -0,0 +1,44 @@
+"""event type + created_at index for retention
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 09:12:44.601853
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (event_type, created_at) 取代单列的 event_type 索引：按类型过滤时用法相同，
+# 保留策略还可以沿它按时间顺序找出某种类型的过期事件
+NEW_INDEX = ('ix_events_event_type_created_at', ['event_type', 'created_at'])
+OLD_INDEX = ('ix_events_event_type', ['event_type'])
+
+
+def _replace_index(create, drop) -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        # 先在事务之外并发建好新索引，再并发删除旧索引，期间不阻塞写入
+        with op.get_context().autocommit_block():
+            op.create_index(create[0], 'events', create[1], postgresql_concurrently=True, if_not_exists=True)
+            op.drop_index(drop[0], table_name='events', postgresql_concurrently=True, if_exists=True)
+        return
+    op.create_index(create[0], 'events', create[1])
+    op.drop_index(drop[0], table_name='events')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _replace_index(NEW_INDEX, OLD_INDEX)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _replace_index(OLD_INDEX, NEW_INDEX)
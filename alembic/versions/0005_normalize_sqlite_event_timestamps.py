@@ -0,0 +1,37 @@
+"""normalize sqlite event timestamps
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 14:27:05.318402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# SQLite：由 CURRENT_TIMESTAMP 默认值写入的时间是 "YYYY-MM-DD HH:MM:SS"，
+# 而 SQLAlchemy 写入和绑定参数时使用 "YYYY-MM-DD HH:MM:SS.ffffff"。两者按字符串比较时顺序不对，
+# 键集分页和保留策略的游标会重复或跳过同一秒内的事件，因此补齐为统一的格式
+SQLITE_NORMALIZE = (
+    "UPDATE events SET created_at = created_at || '.000000' WHERE length(created_at) = 19"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute(SQLITE_NORMALIZE)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # 补齐的微秒不改变时间的含义，无需还原
+    pass
@@ -0,0 +1,143 @@
+"""
+按频道 / 按用户查询最近事件的基准测试：对比没有复合索引与有复合索引，以及 OFFSET 与键集 (keyset) 分页。
+
+在临时的 SQLite 文件数据库中生成数百万条事件 (默认 200 万条，可以用第一个参数指定)，
+然后对随机选取的频道和用户分别查询最近 50 条事件，以及翻到第 100 页。
+
+运行方式 (在项目根目录):
+    uv run python -m benchmarks.bench_event_queries [rows]
+"""
+
+import asyncio
+import datetime
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import insert, text
+from sqlalchemy.future import select
+
+from db.models import Base, Event, Member
+from src.db.database import Database
+from src.db.repositories.event_repository import EventRepository
+
+CHANNELS = 200
+USERS = 20_000
+GUILDS = 20
+PAGE = 50
+DEEP_PAGES = 100
+COMPOSITE_INDEXES = {
+    "ix_events_channel_id_created_at": "channel_id, created_at",
+    "ix_events_author_id_created_at": "author_id, created_at",
+    "ix_events_guild_id_event_type_created_at": "guild_id, event_type, created_at",
+}
+
+
+async def populate(database: Database, rows: int, chunk: int = 100_000) -> None:
+    rng = random.Random(0)
+    start = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    async with database.engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            insert(Member.__table__),
+            [{"id": i, "name": f"user{i}"} for i in range(USERS)],
+        )
+        for offset in range(0, rows, chunk):
+            batch = []
+            for i in range(offset, min(offset + chunk, rows)):
+                channel = rng.randrange(CHANNELS)
+                batch.append({
+                    "event_id": i,
+                    "event_type": "message" if rng.random() < 0.9 else "reaction_add",
+                    "content": "hello",
+                    "author_id": rng.randrange(USERS),
+                    "channel_id": channel,
+                    "guild_id": channel % GUILDS,
+                    "created_at": start + datetime.timedelta(seconds=i * 10),
+                })
+            await conn.execute(insert(Event.__table__), batch)
+
+
+async def set_indexes(database: Database, enabled: bool) -> None:
+    async with database.engine.begin() as conn:
+        for name, columns in COMPOSITE_INDEXES.items():
+            if enabled:
+                await conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON events ({columns})"))
+            else:
+                await conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        await conn.execute(text("ANALYZE"))
+
+
+async def timed(fn, keys) -> float:
+    """对每个键执行一次 fn，返回平均耗时 (毫秒)。"""
+    started = time.perf_counter()
+    for key in keys:
+        await fn(key)
+    return (time.perf_counter() - started) / len(keys) * 1000
+
+
+async def measure(repo: EventRepository, database: Database, channels, users):
+    async def channel_recent(channel_id):
+        await repo.get_channel_events(channel_id, limit=PAGE)
+
+    async def user_recent(author_id):
+        await repo.get_user_events(author_id, limit=PAGE)
+
+    async def guild_recent(guild_id):
+        await repo.get_guild_events(guild_id, "reaction_add", limit=PAGE)
+
+    async def channel_offset_deep(channel_id):
+        async with database.session_factory() as session:
+            stmt = (
+                select(Event)
+                .where(Event.channel_id == channel_id)
+                .order_by(Event.created_at.desc(), Event.id.desc())
+                .offset(PAGE * DEEP_PAGES)
+                .limit(PAGE)
+            )
+            (await session.execute(stmt)).scalars().all()
+
+    # 键集分页翻到第 DEEP_PAGES 页：只计最后一页的耗时 (游标在前面的翻页中得到)
+    cursors = {}
+    for channel_id in channels:
+        page = await repo.get_channel_events(channel_id, limit=PAGE * DEEP_PAGES)
+        cursors[channel_id] = page.next_cursor
+
+    async def channel_keyset_deep(channel_id):
+        await repo.get_channel_events(channel_id, limit=PAGE, before=cursors[channel_id])
+
+    return {
+        "channel recent": await timed(channel_recent, channels),
+        "user recent": await timed(user_recent, users),
+        "guild+type recent": await timed(guild_recent, range(GUILDS)),
+        f"channel page {DEEP_PAGES} (OFFSET)": await timed(channel_offset_deep, channels),
+        f"channel page {DEEP_PAGES} (keyset)": await timed(channel_keyset_deep, channels),
+    }
+
+
+async def main(rows: int = 2_000_000) -> None:
+    rng = random.Random(1)
+    channels = rng.sample(range(CHANNELS), 20)
+    users = rng.sample(range(USERS), 20)
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Database(f"sqlite+aiosqlite:///{(Path(tmp) / 'bench.db').as_posix()}")
+        started = time.perf_counter()
+        await populate(database, rows)
+        print(f"populated {rows} events in {time.perf_counter() - started:.1f}s")
+        repo = EventRepository(database.session_factory, database.writer)
+
+        await set_indexes(database, enabled=False)
+        without = await measure(repo, database, channels, users)
+        await set_indexes(database, enabled=True)
+        with_indexes = await measure(repo, database, channels, users)
+        await database.dispose()
+
+    print(f"{'query':<28}{'no index':>12}{'indexed':>12}")
+    for name in without:
+        print(f"{name:<28}{without[name]:>10.2f}ms{with_indexes[name]:>10.2f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000))
@@ -0,0 +1,102 @@
+"""
+保留策略的基准测试：在临时的 SQLite 文件数据库中写入大量事件 (默认 20 万条，可以用第一个参数指定)，
+其中一半已经过期，测量归档 + 分批删除 + incremental vacuum 的吞吐量，以及数据库文件和归档文件的大小。
+
+同时测量清理期间并发写入新事件的最大延迟，验证分批的短事务不会长时间阻塞正常的消息记录。
+
+运行方式 (在项目根目录):
+    uv run python -m benchmarks.bench_event_retention [rows]
+"""
+
+import asyncio
+import datetime
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import insert
+
+from db.models import Base, Event, Member
+from src.db.database import Database
+from src.db.repositories.event_repository import EventRepository
+from src.services.event_retention import EventRetentionService
+
+NOW = datetime.datetime(2025, 6, 1, tzinfo=datetime.timezone.utc)
+WORDS = "瓦罗兰特 比赛 火锅 今晚 一起 开黑 上分 口香糖 周末 电影 奶茶 咖啡 猫咪 下雨 加班 晚安".split()
+
+
+async def populate(database: Database, rows: int, chunk: int = 50_000) -> None:
+    rng = random.Random(0)
+    async with database.engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Member.__table__), [{"id": 1, "name": "user1"}])
+        for offset in range(0, rows, chunk):
+            await conn.execute(
+                insert(Event.__table__),
+                [
+                    {
+                        "event_id": i,
+                        "event_type": "message",
+                        "content": "".join(rng.choices(WORDS, k=rng.randint(3, 12))),
+                        "author_id": 1,
+                        "channel_id": 1,
+                        "guild_id": 1,
+                        # 前一半事件在 100 天以前
+                        "created_at": NOW - datetime.timedelta(days=200 * (rows - i) / rows),
+                    }
+                    for i in range(offset, min(offset + chunk, rows))
+                ],
+            )
+
+
+async def concurrent_writes(repo: EventRepository, stop: asyncio.Event, latencies: list) -> None:
+    event_id = 10**9
+    while not stop.is_set():
+        started = time.perf_counter()
+        await repo.create_many(
+            [{"event_id": event_id, "event_type": "message", "content": "新消息", "author_id": 1, "created_at": NOW}]
+        )
+        latencies.append(time.perf_counter() - started)
+        event_id += 1
+        await asyncio.sleep(0.01)
+
+
+async def main(rows: int = 200_000) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        database = Database(f"sqlite+aiosqlite:///{db_path.as_posix()}")
+        await populate(database, rows)
+        repo = EventRepository(database.session_factory, database.writer)
+        size_before = db_path.stat().st_size
+
+        retention = EventRetentionService(
+            repo,
+            archive_dir=Path(tmp) / "archive",
+            ttl_days={"message": 100},
+            batch_size=1000,
+            database=database,
+            clock=lambda: NOW,
+        )
+        stop = asyncio.Event()
+        latencies: list = []
+        writes = asyncio.create_task(concurrent_writes(repo, stop, latencies))
+        result = await retention.run()
+        stop.set()
+        await writes
+        await database.dispose()
+
+        size_after = db_path.stat().st_size
+        archive_size = sum(p.stat().st_size for p in result.archives)
+
+    print(f"archived + deleted {result.deleted} of {rows} events in {result.elapsed:.2f}s "
+          f"({result.deleted / result.elapsed:,.0f} events/s), reclaimed {result.vacuumed_pages} pages")
+    print(f"database file: {size_before / 2**20:.1f} MiB -> {size_after / 2**20:.1f} MiB, "
+          f"archive: {archive_size / 2**20:.1f} MiB")
+    print(f"concurrent single-event writes during the run: {len(latencies)}, "
+          f"max latency {max(latencies) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000))
@@ -0,0 +1,107 @@
+"""
+事件全文检索的基准测试：对比直接 `LIKE '%词%'` 扫描 events.content 与 FTS5 trigram 索引 (BM25 排序)。
+
+在临时的 SQLite 文件数据库中生成大量随机中文消息 (默认 50 万条，可以用第一个参数指定)，
+分别用单个关键词 (全部匹配) 和一整句话 (任意匹配，记忆检索的用法) 检索。
+
+运行方式 (在项目根目录):
+    uv run python -m benchmarks.bench_event_search [rows]
+"""
+
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import insert
+from sqlalchemy.future import select
+
+from db.models import Base, Event, Member
+from src.db.database import Database
+from src.db.repositories.event_repository import EventRepository
+
+WORDS = (
+    "瓦罗兰特 比赛 火锅 烧烤 今晚 一起 开黑 上分 宫斗 口香糖 学长 学弟 周末 电影 音乐 "
+    "考试 作业 食堂 奶茶 咖啡 猫咪 狗狗 天气 下雨 旅行 地铁 加班 睡觉 早安 晚安 "
+    "冠军 选手 战队 直播 弹幕 游戏 手机 电脑 键盘 鼠标 耳机 朋友 聚会 生日 蛋糕"
+).split()
+USERS = 1_000
+QUERIES = ("口香糖", "瓦罗兰特", "奶茶咖啡")
+SENTENCES = ("周末一起去看电影然后吃火锅吗", "那个选手比赛的时候一直嚼口香糖")
+
+
+async def populate(database: Database, rows: int, chunk: int = 50_000) -> None:
+    rng = random.Random(0)
+    async with database.engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Member.__table__), [{"id": i, "name": f"user{i}"} for i in range(USERS)])
+        for offset in range(0, rows, chunk):
+            await conn.execute(
+                insert(Event.__table__),
+                [
+                    {
+                        "event_id": i,
+                        "event_type": "message",
+                        "content": "".join(rng.choices(WORDS, k=rng.randint(3, 12))),
+                        "author_id": rng.randrange(USERS),
+                        "channel_id": 1,
+                        "guild_id": 1,
+                    }
+                    for i in range(offset, min(offset + chunk, rows))
+                ],
+            )
+
+
+async def timed(fn, args, repeat: int = 3) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for arg in args:
+            await fn(arg)
+    return (time.perf_counter() - started) / (repeat * len(args)) * 1000
+
+
+async def main(rows: int = 500_000) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Database(f"sqlite+aiosqlite:///{(Path(tmp) / 'bench.db').as_posix()}")
+        started = time.perf_counter()
+        await populate(database, rows)
+        print(f"populated {rows} events (with FTS triggers) in {time.perf_counter() - started:.1f}s")
+        repo = EventRepository(database.session_factory, database.writer)
+
+        async def like_scan(term):
+            async with database.session_factory() as session:
+                stmt = (
+                    select(Event)
+                    .where(Event.content.contains(term))
+                    .order_by(Event.created_at.desc())
+                    .limit(20)
+                )
+                (await session.execute(stmt)).scalars().all()
+
+        async def like_scan_user(term):
+            async with database.session_factory() as session:
+                stmt = select(Event).where(Event.author_id == 7, Event.content.contains(term)).limit(20)
+                (await session.execute(stmt)).scalars().all()
+
+        async def fts(term):
+            await repo.search_events(term, limit=20)
+
+        async def fts_user_sentence(sentence):
+            await repo.search_events(sentence, limit=20, author_id=7, match_any=True)
+
+        results = {
+            "keyword, LIKE scan": await timed(like_scan, QUERIES),
+            "keyword, FTS5 + BM25": await timed(fts, QUERIES),
+            "keyword + user, LIKE scan": await timed(like_scan_user, QUERIES),
+            "sentence + user, FTS5 any": await timed(fts_user_sentence, SENTENCES),
+        }
+        await database.dispose()
+
+    for name, ms in results.items():
+        print(f"{name:<28}{ms:>10.2f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500_000))
@@ -0,0 +1,90 @@
+"""
+消息记录的吞吐量基准测试：对比逐条 `create_event` (每条一个事务 + refresh) 与后写批量写入器。
+
+在临时的 SQLite 文件数据库上记录一批来自若干作者的消息，生产者尽可能快地产生事件，
+统计从第一条事件入队到全部落库所需的时间。
+
+运行方式 (在项目根目录):
+    uv run python -m benchmarks.bench_event_writer
+"""
+
+import asyncio
+import datetime
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.future import select
+
+from db.models import Base, Event, Member
+from src.db.repositories.event_repository import EventRepository
+from src.services.event_writer import EventWriter, PendingEvent
+
+
+def make_events(count: int, authors: int):
+    created_at = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+    return [
+        PendingEvent(
+            event_id=index,
+            event_type="message",
+            author_id=index % authors,
+            author_name=f"user{index % authors}",
+            author_display_name=None,
+            content=f"消息 {index}",
+            channel_id=1,
+            guild_id=1,
+            created_at=created_at,
+        )
+        for index in range(count)
+    ]
+
+
+async def run(mode: str, events, authors: int):
+    """在一个全新的临时数据库上记录全部事件，返回 (耗时，落库的事件数)。"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+        async with session_factory() as session:
+            session.add_all(Member(id=i, name=f"user{i}") for i in range(authors))
+            await session.commit()
+
+        repo = EventRepository(session_factory=session_factory)
+        started = time.perf_counter()
+        if mode == "per-event":
+            for event in events:
+                await repo.create_event(
+                    event_id=event.event_id,
+                    event_type=event.event_type,
+                    author_id=event.author_id,
+                    content=event.content,
+                    channel_id=event.channel_id,
+                    guild_id=event.guild_id,
+                )
+        else:
+            writer = EventWriter(repo, batch_size=500, flush_interval=0.05)
+            for event in events:
+                await writer.record(event)
+            await writer.close()
+        elapsed = time.perf_counter() - started
+
+        async with session_factory() as session:
+            rows = (await session.execute(select(func.count(Event.id)))).scalar_one()
+        await engine.dispose()
+    return elapsed, rows
+
+
+async def main(count: int = 5000, authors: int = 50) -> None:
+    events = make_events(count, authors)
+    per_event, per_event_rows = await run("per-event", events, authors)
+    batched, batched_rows = await run("batched", events, authors)
+    assert per_event_rows == batched_rows == count
+    print(f"per-event: {count / per_event:8.0f} events/s")
+    print(f"batched:   {count / batched:8.0f} events/s  speedup: {per_event / batched:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
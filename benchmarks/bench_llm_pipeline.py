@@ -0,0 +1,125 @@
+"""
+整条回复链路的离线压测：AIService -> 调度器 -> 韧性包装层 -> 假 LLM 后端。
+
+不需要网络和 Discord 连接：消息、成员服务都是轻量的替身，LLM 后端是 FakeLLMClient，
+可以通过命令行参数调整并发量、延迟分布和错误率，观察排队、重试和端到端延迟。
+
+运行方式 (在项目根目录):
+    uv run python -m benchmarks.bench_llm_pipeline --requests 200 --users 20 --error-rate 0.05
+"""
+
+import argparse
+import asyncio
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+from src.core.character_manager import CharacterManager
+from src.services.ai_service import AIService
+from src.services.llm.fake_llm_client import LATENCY_DISTRIBUTIONS, FakeLLMClient
+from src.services.llm_scheduler import LLMScheduler
+from src.services.memory.hardcoded_memory_service import HardcodedMemoryService
+from src.services.resilient_llm_client import ResilientLLMClient, RetryPolicy
+
+CHARACTERS_DIR = Path(__file__).resolve().parent.parent / "data" / "characters"
+
+
+class _StubMemberService:
+    async def get_or_create_member(self, user):
+        return SimpleNamespace(id=user.id, name=user.name)
+
+
+class _EmptyHistory:
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        raise StopAsyncIteration
+
+
+def make_message(index: int, users: int, guilds: int) -> SimpleNamespace:
+    user_id = index % users
+    author = SimpleNamespace(id=user_id, name=f"user{user_id}", display_name=f"User{user_id}", bot=False)
+    return SimpleNamespace(
+        id=index,
+        author=author,
+        guild=SimpleNamespace(id=user_id % guilds),
+        channel=SimpleNamespace(history=lambda **kwargs: _EmptyHistory()),
+        clean_content=f"@GO 第 {index} 个问题：今天玩什么？",
+        embeds=[],
+        reference=None,
+    )
+
+
+def percentile(values, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))] if ordered else 0.0
+
+
+async def run(args: argparse.Namespace) -> None:
+    backend = FakeLLMClient(
+        latency_distribution=args.distribution,
+        latency_mean=args.latency,
+        latency_stddev=args.stddev,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    llm_client = ResilientLLMClient(
+        backend, retry_policy=RetryPolicy(base_delay=0.05, max_delay=0.5)
+    )
+    scheduler = LLMScheduler(max_in_flight=args.max_in_flight, max_queue_depth=args.requests)
+    service = AIService(
+        llm_client=llm_client,
+        character_manager=CharacterManager(CHARACTERS_DIR),
+        member_service=_StubMemberService(),
+        memory_service=HardcodedMemoryService(),
+        llm_scheduler=scheduler,
+    )
+
+    latencies, failures = [], 0
+
+    async def one(index: int) -> None:
+        nonlocal failures
+        started = time.perf_counter()
+        try:
+            await service.generate_response(make_message(index, args.users, args.guilds))
+        except Exception:
+            failures += 1
+            return
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"requests: {args.requests}  ok: {len(latencies)}  failed: {failures}  "
+        f"elapsed: {elapsed:.2f}s  throughput: {args.requests / elapsed:.1f} req/s"
+    )
+    print(
+        f"latency p50: {percentile(latencies, 0.50):.3f}s  "
+        f"p95: {percentile(latencies, 0.95):.3f}s  max: {max(latencies, default=0.0):.3f}s"
+    )
+    print(f"backend calls: {backend.calls}  injected errors: {backend.errors}  retries: {llm_client.retries}")
+    print(f"scheduler: {scheduler.stats}")
+    print(f"token usage: {backend.total_usage}")
+    for stage, avg in service.tracer.stats["stage_avg"].items():
+        print(f"  stage {stage:<16} avg {avg * 1000:8.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--guilds", type=int, default=2)
+    parser.add_argument("--max-in-flight", type=int, default=4)
+    parser.add_argument("--distribution", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--latency", type=float, default=0.2, help="平均延迟 (秒)")
+    parser.add_argument("--stddev", type=float, default=0.1, help="延迟标准差 (秒)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+成员 upsert 的吞吐量基准测试：对比旧的“查询 -> (提交 -> refresh)”实现与单条 ON CONFLICT 语句。
+
+在临时的 SQLite 文件数据库上模拟真实的 @ 流量：大部分请求来自已存在且信息未变的成员，
+少量是新成员或改了昵称的成员。
+
+运行方式 (在项目根目录):
+    uv run python -m benchmarks.bench_member_upsert
+"""
+
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.future import select
+
+from db.models import Base, Member
+from src.db.repositories.member_repository import MemberRepository
+
+
+class LegacyMemberRepository(MemberRepository):
+    """旧实现：外层会话里再调用 get_by_id 打开第二个会话，有变化时提交并 refresh。"""
+
+    async def get_or_create(self, member_id: int, name: str, display_name: Optional[str] = None):
+        async with self._session_factory() as session:
+            member = await self.get_by_id(member_id)
+            if member:
+                needs_update = False
+                if member.name != name:
+                    member.name = name
+                    needs_update = True
+                if member.display_name != display_name:
+                    member.display_name = display_name
+                    needs_update = True
+                if needs_update:
+                    session.add(member)
+                    await session.commit()
+                    await session.refresh(member)
+                return member, False
+
+            new_member = Member(id=member_id, name=name, display_name=display_name)
+            session.add(new_member)
+            await session.commit()
+            await session.refresh(new_member)
+            return new_member, True
+
+
+def make_workload(scenario: str, requests: int, members: int, seed: int = 0):
+    """
+    生成一组 (member_id, name, display_name) 请求：
+    - unchanged: 全部来自信息未变的老成员；
+    - renamed: 全部是改了昵称的老成员；
+    - new: 全部是新成员；
+    - mixed: 95% 未变、4% 改昵称、1% 新成员，接近真实流量。
+    """
+    rng = random.Random(seed)
+    workload = []
+    for index in range(requests):
+        roll = {"unchanged": 1.0, "renamed": 0.02, "new": 0.0}.get(scenario, rng.random())
+        if roll < 0.01:
+            member_id = members + index
+            workload.append((member_id, f"user{member_id}", "新人"))
+        else:
+            member_id = rng.randrange(members)
+            nickname = f"昵称{index}" if roll < 0.05 else f"User {member_id}"
+            workload.append((member_id, f"user{member_id}", nickname))
+    return workload
+
+
+async def run(repo_cls, workload, members: int):
+    """在一个全新的临时数据库上执行 workload，返回 (耗时，最终数据快照)。"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+        async with session_factory() as session:
+            session.add_all(
+                Member(id=i, name=f"user{i}", display_name=f"User {i}") for i in range(members)
+            )
+            await session.commit()
+
+        repo = repo_cls(session_factory=session_factory)
+        started = time.perf_counter()
+        for member_id, name, display_name in workload:
+            await repo.get_or_create(member_id, name, display_name)
+        elapsed = time.perf_counter() - started
+
+        async with session_factory() as session:
+            rows = (await session.execute(select(Member.id, Member.name, Member.display_name))).all()
+        await engine.dispose()
+    return elapsed, sorted(rows)
+
+
+async def main(requests: int = 3000, members: int = 500) -> None:
+    for scenario in ("unchanged", "renamed", "new", "mixed"):
+        workload = make_workload(scenario, requests, members)
+        legacy, legacy_rows = await run(LegacyMemberRepository, workload, members)
+        upsert, upsert_rows = await run(MemberRepository, workload, members)
+        # 两种实现最终写入的数据必须一致
+        assert legacy_rows == upsert_rows
+        print(
+            f"{scenario:<10} legacy: {requests / legacy:7.0f} ops/s  "
+            f"upsert: {requests / upsert:7.0f} ops/s  speedup: {legacy / upsert:4.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
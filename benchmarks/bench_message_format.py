@@ -0,0 +1,104 @@
+"""
+历史消息格式化的微基准测试：对比“每次请求都重新格式化 10 条历史”与“按消息 ID 缓存格式化结果”。
+
+模拟一个热闹的频道：机器人发布的战报 (每条带多个 embed、十几个字段、图片和页脚)
+与普通聊天混杂，每次 @ 都要格式化最近 10 条消息作为短期记忆。
+
+运行方式 (在项目根目录):
+    uv run python -m benchmarks.bench_message_format
+"""
+
+import timeit
+from types import SimpleNamespace
+
+from src.services.ai_service import AIService
+from src.services.format_cache import FormattedMessageCache
+
+WINDOW = 10
+
+
+def make_match_report(message_id: int) -> SimpleNamespace:
+    """一条机器人发布的比赛战报：2 个 embed，每个 12 个字段，带图片和页脚。"""
+    embeds = [
+        SimpleNamespace(
+            author=SimpleNamespace(name="MatchBot"),
+            title=f"第 {message_id} 场比赛战报 ({side})",
+            description="比赛结束，以下是双方的详细数据。" * 3,
+            fields=[
+                SimpleNamespace(name=f"选手 {i}", value=f"击杀 {i} / 死亡 {i % 3} / 助攻 {i * 2}")
+                for i in range(12)
+            ],
+            image=SimpleNamespace(url="https://example.com/map.png"),
+            thumbnail=SimpleNamespace(url="https://example.com/logo.png"),
+            footer=SimpleNamespace(text="数据来源：官方 API"),
+        )
+        for side in ("蓝队", "红队")
+    ]
+    return SimpleNamespace(
+        id=message_id,
+        edited_at=None,
+        author=SimpleNamespace(display_name="MatchBot"),
+        clean_content="",
+        embeds=embeds,
+    )
+
+
+def make_chat(message_id: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=message_id,
+        edited_at=None,
+        author=SimpleNamespace(display_name=f"User{message_id % 7}"),
+        clean_content="这局打得太精彩了吧哈哈哈",
+        embeds=[],
+    )
+
+
+def make_channel(size: int = 200):
+    return [make_match_report(i) if i % 3 == 0 else make_chat(i) for i in range(size)]
+
+
+def make_service(cache: FormattedMessageCache) -> AIService:
+    return AIService(
+        llm_client=None,
+        character_manager=None,
+        member_service=None,
+        memory_service=None,
+        format_cache=cache,
+    )
+
+
+def format_windows(service: AIService, channel, uncached: bool) -> None:
+    """模拟频道里每条消息都 @ 了一次机器人：每次格式化它之前的 10 条消息。"""
+    for end in range(WINDOW, len(channel)):
+        for message in channel[end - WINDOW : end]:
+            if uncached:
+                service._extract_message_parts(message).render()
+            else:
+                service._format_message_for_llm(message)
+
+
+def main(repeat: int = 5, number: int = 20) -> None:
+    channel = make_channel()
+    cache = FormattedMessageCache()
+    service = make_service(cache)
+
+    uncached = min(
+        timeit.repeat(lambda: format_windows(service, channel, True), number=number, repeat=repeat)
+    )
+    cached = min(
+        timeit.repeat(lambda: format_windows(service, channel, False), number=number, repeat=repeat)
+    )
+    windows = (len(channel) - WINDOW) * number
+    print(
+        f"{windows} history windows  uncached: {uncached / windows * 1e6:7.2f} us/window  "
+        f"cached: {cached / windows * 1e6:7.2f} us/window  speedup: {uncached / cached:4.1f}x"
+    )
+
+    # 单独统计一轮 (冷缓存) 的命中率：每条消息会出现在 10 个窗口中
+    cold = FormattedMessageCache()
+    format_windows(make_service(cold), channel, False)
+    print(f"cold-start hit rate over one pass: {cold.stats['hit_rate']:.1%} ({cold.stats})")
+
+
+if __name__ == "__main__":
+    main()
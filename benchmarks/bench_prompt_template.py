@@ -0,0 +1,55 @@
+"""
+Prompt 组装的微基准测试：对比“每条消息都重新渲染整个模板”与“预编译模板”。
+
+运行方式 (在项目根目录):
+    uv run python -m benchmarks.bench_prompt_template
+"""
+
+import json
+import timeit
+from pathlib import Path
+
+from src.core.character_model import Character
+from src.core.prompt_template import compile_character_prompt, format_example_dialogue
+
+CHARACTERS_DIR = Path(__file__).resolve().parent.parent / "data" / "characters"
+
+DYNAMIC_VALUES = {
+    "long_term_memory": "\n".join(f"- 记忆条目 {i}" for i in range(5)),
+    "short_term_memory": "\n".join(f"用户{i}: 这是一条历史消息" for i in range(10)),
+    "user_info": "User 'tester' (ID: 123, Display Name: Tester)",
+    "current_input": "Tester: 你们社群名字啥意思",
+}
+
+
+def assemble_legacy(character: Character) -> str:
+    """旧实现：每条消息都重新格式化示例对话，并对整个模板执行 str.format。"""
+    return character.main_chat_prompt_template.format(
+        persona_description=character.description,
+        example_dialogue=format_example_dialogue(character),
+        bot_name=character.name,
+        **DYNAMIC_VALUES,
+    )
+
+
+def assemble_compiled(character: Character) -> str:
+    """新实现：复用预编译模板，只填充动态槽位。"""
+    return compile_character_prompt(character).render(**DYNAMIC_VALUES)
+
+
+def main(number: int = 20000) -> None:
+    for card in sorted(CHARACTERS_DIR.glob("*.json")):
+        character = Character.model_validate(json.loads(card.read_text("utf-8")))
+        assert assemble_legacy(character) == assemble_compiled(character)
+
+        legacy = min(timeit.repeat(lambda: assemble_legacy(character), number=number, repeat=5))
+        compiled = min(timeit.repeat(lambda: assemble_compiled(character), number=number, repeat=5))
+        print(
+            f"{card.name:<22} legacy: {legacy / number * 1e6:7.2f} us/op  "
+            f"compiled: {compiled / number * 1e6:7.2f} us/op  "
+            f"speedup: {legacy / compiled:4.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+向量记忆检索的基准测试：对比 `argpartition` 选 top-k 与对全部相似度完整排序，并测量带用户/服务器范围的检索。
+
+在临时目录中生成随机的 L2 归一化向量 (默认 20 万条、256 维，可以用第一个参数指定条数)，
+写入 VectorMemoryStore 后重新打开 (从内存映射的文件加载)，再重复检索取平均。
+
+运行方式 (在项目根目录):
+    uv run python -m benchmarks.bench_vector_memory [rows]
+"""
+
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from src.services.memory.vector_store import MemoryRecord, VectorMemoryStore
+
+DIMENSION = 256
+K = 5
+USERS = 1_000
+GUILDS = 10
+
+
+def timed(fn, queries) -> float:
+    started = time.perf_counter()
+    for query in queries:
+        fn(query)
+    return (time.perf_counter() - started) / len(queries) * 1000
+
+
+def main(rows: int = 200_000, chunk: int = 20_000) -> None:
+    rng = np.random.default_rng(0)
+    queries = rng.normal(size=(50, DIMENSION)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = VectorMemoryStore(tmp, DIMENSION)
+        started = time.perf_counter()
+        for offset in range(0, rows, chunk):
+            size = min(chunk, rows - offset)
+            vectors = rng.normal(size=(size, DIMENSION)).astype(np.float32)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+            store.add(
+                vectors,
+                [
+                    MemoryRecord(f"memory {offset + i}", user_id=int(u), guild_id=int(g))
+                    for i, (u, g) in enumerate(
+                        zip(rng.integers(0, USERS, size), rng.integers(0, GUILDS, size))
+                    )
+                ],
+            )
+        print(f"added {rows} memories in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        store = VectorMemoryStore(tmp, DIMENSION)
+        print(f"reopened the store in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+        matrix = np.asarray(store._vectors[:rows])
+
+        def full_sort(query):
+            scores = matrix @ query
+            np.argsort(-scores)[:K]
+
+        def partition(query):
+            scores = matrix @ query
+            top = np.argpartition(-scores, K - 1)[:K]
+            top[np.argsort(-scores[top])]
+
+        results = {
+            "matmul + full argsort": timed(full_sort, queries),
+            "matmul + argpartition": timed(partition, queries),
+            "store.search, unscoped": timed(lambda q: store.search(q, K), queries),
+            "store.search, user+guild": timed(lambda q: store.search(q, K, user_id=7, guild_id=3), queries),
+        }
+
+    for name, ms in results.items():
+        print(f"{name:<28}{ms:>10.2f}ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -74,10 +74,16 @@ async def main():
     # 步骤 5: 启动机器人，并使用 `async with` 来优雅地处理其生命周期。
     # `async with bot:` 会自动处理登录、连接保持和最终的登出清理。
     async with bot:
+        # 预加载并校验所有角色卡，之后的加载都直接命中内存缓存。
+        loaded_characters = await container.character_manager().preload()
+        logger.info(f"已预加载角色卡：{loaded_characters}")
+
         # 定义需要加载的扩展模块 (Cogs) 列表。
         # 添加新功能模块时，只需在此列表中增加其路径即可。
         extensions_to_load = [
-            "src.cogs.chat_cog"
+            "src.cogs.chat_cog",
+            "src.cogs.member_cog",
+            "src.cogs.retention_cog",
             # 例如："src.cogs.admin_cog", "src.cogs.music_cog"
         ]
 
@@ -96,8 +102,13 @@ async def main():
                 logger.error(f"加载扩展模块失败 {extension}.", exc_info=e)
 
         logger.info("所有扩展已加载。准备启动并连接到 Discord...")
-        # 启动机器人并使用从 settings 中读取的 token 进行连接。
-        await bot.start(settings.BOT_TOKEN)
+        try:
+            # 启动机器人并使用从 settings 中读取的 token 进行连接。
+            await bot.start(settings.BOT_TOKEN)
+        finally:
+            # 先关闭机器人 (卸载 Cog 时会写完排队的事件)，再写完排队的写事务并关闭数据库连接。
+            await bot.close()
+            await container.database().dispose()
 
 
 # -------------------- 3. 程序入口点 (Script Entrypoint) --------------------
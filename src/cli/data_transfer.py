@@ -0,0 +1,86 @@
+"""
+members 和 events 表的导出 / 导入命令行工具。
+
+数据库由 .env 中的 DATABASE_URL 决定 (留空为 data/ 下的 SQLite 文件)，目标数据库需要先执行
+`alembic upgrade head` 建好表。机器人运行时也可以导出；导入与机器人同时运行时，SQLite 的写入会互相等待。
+
+用法 (在项目根目录):
+    # 导出为 data/export/events.jsonl.gz 和 data/export/members.jsonl.gz
+    uv run python -m src.cli.data_transfer export data/export --gzip
+    # 导出为 CSV
+    uv run python -m src.cli.data_transfer export data/export --format csv
+    # 导入目录中的所有导出文件 (也可以直接给出文件，包括保留策略的归档)；中断后再次执行会从断点继续
+    DATABASE_URL=postgresql+asyncpg://... uv run python -m src.cli.data_transfer import data/export
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from pathlib import Path
+from typing import List
+
+from src.core.container import Container
+from src.services.data_transfer import FORMATS, TransferStats
+
+logger = logging.getLogger(__name__)
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m src.cli.data_transfer", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--batch-size", type=int, default=5000, help="每批读取 / 每个导入事务的行数")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="把 members 和 events 导出到目录")
+    export.add_argument("out_dir", type=Path)
+    export.add_argument("--format", choices=FORMATS, default="jsonl")
+    export.add_argument("--gzip", action="store_true", help="用 gzip 压缩导出文件")
+
+    load = commands.add_parser("import", help="导入导出文件或归档文件 (可以给出目录)")
+    load.add_argument("paths", type=Path, nargs="+")
+    load.add_argument("--restart", action="store_true", help="忽略续传进度，从头导入")
+    return parser
+
+
+class _ProgressLine:
+    """在 stderr 的同一行上刷新进度 (已处理行数和速度)，换到下一个文件时另起一行。"""
+
+    def __init__(self):
+        self._path = None
+
+    def __call__(self, stats: TransferStats) -> None:
+        if self._path is not None and stats.path != self._path:
+            print(file=sys.stderr)
+        self._path = stats.path
+        print(
+            f"\r{stats.table:<8} {stats.skipped + stats.rows:>12,} rows  {stats.rows_per_second:>10,.0f} rows/s",
+            end="",
+            file=sys.stderr,
+            flush=True,
+        )
+
+
+async def main(argv: List[str]) -> None:
+    args = _parser().parse_args(argv)
+    container = Container()
+    service = container.data_transfer(batch_size=args.batch_size, progress=_ProgressLine())
+    try:
+        if args.command == "export":
+            results = await service.export(args.out_dir, fmt=args.format, compress=args.gzip)
+        else:
+            results = await service.import_files(args.paths, restart=args.restart)
+    finally:
+        print(file=sys.stderr)
+        await container.database().dispose()
+
+    for stats in results:
+        print(
+            f"{args.command} {stats.table:<8} {stats.path}: {stats.rows:,} rows in {stats.elapsed:.1f}s "
+            f"({stats.rows_per_second:,.0f} rows/s)"
+            + (f", skipped {stats.skipped:,} already imported" if stats.skipped else "")
+        )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    asyncio.run(main(sys.argv[1:]))
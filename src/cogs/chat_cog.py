@@ -1,10 +1,21 @@
 import asyncio
 import logging
+from contextlib import aclosing
+from typing import List, Optional, Sequence
+
 import discord
 from discord.ext import commands
 
 # 我们只需要导入 AIService 的类型提示，因为这是我们唯一的直接依赖
 from src.services.ai_service import AIService
+from src.services.event_writer import EventWriter, PendingEvent
+from src.services.format_cache import FormattedMessageCache
+from src.services.llm_scheduler import LLMBusyError
+from src.services.message_buffer import ChannelMessageBuffer
+from src.services.single_flight import IdempotencyGuard
+from src.core.tracing import RequestTracer, span
+from src.cogs.mention_debouncer import MentionDebouncer
+from src.cogs.streaming_reply import StreamingReply
 
 # 获取此模块的日志记录器
 logger = logging.getLogger(__name__)
@@ -20,16 +31,49 @@ class ChatCog(commands.Cog):
     """
 
     # 构造函数非常“干净”，它只接收已经准备好的 AIService 实例。
-    def __init__(self, bot: commands.Bot, ai_service: AIService):
+    def __init__(
+        self,
+        bot: commands.Bot,
+        ai_service: AIService,
+        stream_edit_interval: float = 1.0,
+        idempotency_guard: Optional[IdempotencyGuard] = None,
+        tracer: Optional[RequestTracer] = None,
+        message_buffer: Optional[ChannelMessageBuffer] = None,
+        debounce_window: float = 0.0,
+        event_writer: Optional[EventWriter] = None,
+        format_cache: Optional[FormattedMessageCache] = None,
+    ):
         """
         初始化 ChatCog。
 
         Args:
             bot (commands.Bot): 当前的机器人实例。
             ai_service (AIService): 用于处理所有 AI 相关业务逻辑的核心服务。
+            stream_edit_interval (float): 流式回复时，同一条消息两次编辑之间的最小间隔 (秒)。
+            idempotency_guard (IdempotencyGuard): 按消息 ID 去重，防止重复投递的消息触发第二次生成。
+            tracer (RequestTracer): 分阶段计时器，超过阈值的请求会记录各阶段耗时明细。
+            message_buffer (ChannelMessageBuffer): 与 AIService 共享的频道消息缓冲区，
+                这里负责把看到的每一条消息以及编辑、删除同步进去。
+            debounce_window (float): 同一用户在同一频道连续 @ 的合并窗口 (秒)，为 0 时不合并。
+                只在这个用户的上一次生成还在进行时才等待，第一条 @ 不增加延迟。
+            event_writer (EventWriter): 后写的事件写入器，每一条消息都通过它记录到 events 表；
+                为 None 时不记录。
+            format_cache (FormattedMessageCache): 与 AIService 共享的消息格式化缓存，
+                消息被更新 (包括链接预览展开、机器人更新 embed) 时丢弃旧的格式化结果。
         """
         self.bot = bot
         self.ai_service = ai_service
+        self.stream_edit_interval = stream_edit_interval
+        self.idempotency_guard = idempotency_guard or IdempotencyGuard()
+        self.tracer = tracer or RequestTracer()
+        self.message_buffer = message_buffer
+        self.debouncer = (
+            MentionDebouncer(debounce_window, self._handle_batch)
+            if debounce_window > 0
+            else None
+        )
+        self.event_writer = event_writer
+        self.format_cache = format_cache
         logger.info(
             "ChatCog instance has been successfully created and wired with AIService."
         )
@@ -39,10 +83,20 @@ class ChatCog(commands.Cog):
         """
         监听所有消息，并对提及机器人的消息作出响应。
         """
+        # 0. 【缓冲】所有消息 (包括机器人自己的回复和没有 @ 的消息) 都写入频道缓冲区，
+        # 之后生成回复时直接从缓冲区读取聊天历史。
+        if self.message_buffer is not None:
+            self.message_buffer.add(message)
+
         # 1. 【过滤】快速过滤掉无需处理的消息，避免不必要的计算。
         # - 忽略机器人自身或其他机器人发出的消息。
         # - 只响应在频道中被明确 @提及 的消息。
         if message.author.bot or not self.bot.user.mentioned_in(message):
+            await self._record_event(message)
+            return
+
+        # - 网关重连后可能重复投递同一条消息，同一条消息只处理一次。
+        if not self.idempotency_guard.claim(message.id):
             return
 
         # 日志记录：记录收到了需要处理的消息
@@ -50,37 +104,81 @@ class ChatCog(commands.Cog):
             f"Received mention from '{message.author.name}' in channel '{message.channel}': '{message.clean_content[:100]}'"
         )
 
+        try:
+            # - 同一用户连续的 @ 先攒一小段时间，合并成一次生成。
+            if self.debouncer is not None:
+                self.debouncer.submit(message)
+            else:
+                await self._handle_batch([message])
+        finally:
+            # @ 消息在开始回复之后才记录：写入队列满时的背压只会拖慢记录，不会推迟回复
+            await self._record_event(message)
+
+    async def _record_event(self, message: discord.Message):
+        """
+        把消息记录到 events 表。写入器只是把事件放进队列，由后台批量写入数据库；
+        队列满时这里最多等待写入器的背压超时。
+        """
+        if self.event_writer is not None:
+            await self.event_writer.record(PendingEvent.from_message(message))
+
+    async def _handle_batch(self, messages: List[discord.Message]):
+        """为一批 (一条或多条合并的) 消息生成一次回复，回复最后一条消息。"""
+        message, preceding = messages[-1], messages[:-1]
+        # 从这里开始计时：服务层各阶段 (成员、历史、记忆、prompt 组装、LLM) 的耗时
+        # 和 Discord 发送耗时都会记到同一条记录上，慢请求会输出完整的耗时明细。
+        with self.tracer.trace(f"mention:{message.id}"):
+            await self._respond(message, preceding)
+
+    async def _respond(
+        self, message: discord.Message, preceding: Sequence[discord.Message] = ()
+    ):
+        """生成回复并以流式方式发送给用户，处理所有可能的错误。"""
         # 2. 【委派】将任务完全委托给核心服务层。
         # 我们将整个 `message` 对象传递过去，因为服务层需要从中提取
         # 作者信息、频道历史（短期记忆）等多种上下文。
+        # 3. 【流式回复】服务层一边生成，我们一边发送：
+        # 第一块文本到达后立即回复，之后节流地编辑消息追加内容，写满 2000 字符自动换到下一条消息。
+        reply = StreamingReply(message, edit_interval=self.stream_edit_interval)
         try:
-            # 发送 "typing..." 指示器，提升用户体验
-            async with message.channel.typing():
-                # 调用核心 AI 服务来生成回复
-                ai_response = await self.ai_service.generate_response(message)
+            async with aclosing(
+                self.ai_service.generate_response_stream(message, preceding)
+            ) as stream:
+                # 在第一块文本到达之前显示 "typing..." 指示器，提升用户体验
+                async with message.channel.typing():
+                    first_chunk = await anext(stream, None)
+
+                if first_chunk is not None:
+                    with span("discord_send"):
+                        await reply.push(first_chunk)
+                    async for chunk in stream:
+                        with span("discord_send"):
+                            await reply.push(chunk)
+                with span("discord_send"):
+                    await reply.finish()
+
+            if reply.has_output:
                 logger.info(
-                    f"AI response generated for '{message.author.name}': '{ai_response[:100]}...'"
+                    f"AI response streamed to '{message.author.name}' in {len(reply.sent_messages)} message(s)."
                 )
-
-            # 3. 【回复】处理并发送 AI 服务的返回结果。
-            if ai_response:
-                # 优雅地处理 Discord 消息长度限制 (2000 字符)
-                if len(ai_response) > 2000:
-                    logger.warning(
-                        "AI response is too long, splitting into multiple messages."
-                    )
-                    # 分多条消息发送
-                    for i in range(0, len(ai_response), 2000):
-                        await message.reply(ai_response[i : i + 2000])
-                        # 在消息之间添加一个短暂延时，可以改善阅读体验并避免潜在的速率限制
-                        await asyncio.sleep(0.5)
-                else:
-                    await message.reply(ai_response)
             else:
                 # 如果 AI 服务因某种原因返回了空响应，也给用户一个反馈
                 logger.warning("AI service returned an empty or null response.")
                 await message.reply("我好像没什么好说的了，换个话题试试？")
 
+        except asyncio.CancelledError:
+            # 被同一用户更新的 @ 取代 (或者 Cog 卸载)：撤回已经发出的不完整回复，
+            # 取代它的那一批会重新给出完整的回复
+            await self._discard_partial_reply(reply)
+            raise
+
+        except LLMBusyError:
+            # 请求队列已满：快速告诉用户稍后再试，而不是让他们一直等待
+            logger.warning(
+                f"LLM queue is full, rejecting mention from '{message.author.name}'."
+            )
+            await message.reply("我现在有点忙不过来，等一下再 @ 我试试吧！")
+
         except Exception as e:
             # 捕获服务层可能抛出的任何异常，并向用户发送友好的错误消息
             logger.error(
@@ -91,6 +189,62 @@ class ChatCog(commands.Cog):
                 "呜...我的大脑好像短路了，暂时不能回复你。请稍后再试试吧！"
             )
 
+    async def _discard_partial_reply(self, reply: StreamingReply):
+        """删除一次被取消的生成已经发出的消息。"""
+        if reply.sent_messages:
+            logger.info(f"Deleting {len(reply.sent_messages)} partial reply message(s) of a cancelled generation.")
+        for sent in reply.sent_messages:
+            try:
+                await sent.delete()
+            except discord.HTTPException as e:
+                logger.warning(f"Failed to delete a partial reply message: {e}")
+
+    async def cog_load(self):
+        if self.event_writer is not None:
+            self.event_writer.start()
+
+    async def cog_unload(self):
+        if self.debouncer is not None:
+            await self.debouncer.close()
+        # 机器人关闭时 (bot.close 会卸载所有 Cog) 把队列中剩余的事件写完
+        if self.event_writer is not None:
+            await self.event_writer.close()
+
+    @commands.Cog.listener()
+    async def on_message_edit(self, before: discord.Message, after: discord.Message):
+        """同步消息编辑 (包括机器人流式回复时的编辑)。"""
+        if self.message_buffer is not None:
+            self.message_buffer.update(after)
+
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        """
+        链接预览展开和机器人更新 embed 也是消息更新事件，但不会改变 edited_at；
+        使用 raw 事件，不在 discord.py 消息缓存中的消息 (例如只出现在 REST 历史中的) 也能收到。
+        """
+        if self.format_cache is not None:
+            self.format_cache.evict(payload.message_id)
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        """同步消息删除；使用 raw 事件，不在 discord.py 消息缓存中的消息也能收到。"""
+        if self.message_buffer is not None:
+            self.message_buffer.delete(payload.channel_id, [payload.message_id])
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        if self.message_buffer is not None:
+            self.message_buffer.delete(payload.channel_id, payload.message_ids)
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """
+        (重新) 建立网关会话时，断线期间的消息可能已经错过，
+        丢弃所有缓冲，之后第一次生成回复时会用 REST 历史重新补齐。
+        """
+        if self.message_buffer is not None:
+            self.message_buffer.clear()
+
 
 async def setup(bot: commands.Bot):
     """
@@ -111,7 +265,23 @@ async def setup(bot: commands.Bot):
         ai_service_instance = container.ai_service()
 
         # 将完全配置好的 Cog 添加到机器人中
-        await bot.add_cog(ChatCog(bot=bot, ai_service=ai_service_instance))
+        await bot.add_cog(
+            ChatCog(
+                bot=bot,
+                ai_service=ai_service_instance,
+                stream_edit_interval=container.config.STREAM_EDIT_INTERVAL(),
+                idempotency_guard=container.idempotency_guard(),
+                tracer=container.request_tracer(),
+                message_buffer=container.message_buffer(),
+                format_cache=container.format_cache(),
+                debounce_window=container.config.MENTION_DEBOUNCE_WINDOW(),
+                event_writer=(
+                    container.event_writer()
+                    if container.config.EVENT_RECORDING_ENABLED()
+                    else None
+                ),
+            )
+        )
         logger.info("ChatCog has been successfully set up and added to the bot.")
 
     except Exception as e:
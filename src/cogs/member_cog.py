@@ -0,0 +1,123 @@
+import asyncio
+import logging
+from typing import Iterable, Optional, Set
+
+import discord
+from discord.ext import commands
+
+from src.services.member_service import MemberService, global_display_name
+from src.services.member_sync import MemberSyncService
+
+# 获取此模块的日志记录器
+logger = logging.getLogger(__name__)
+
+
+class MemberCog(commands.Cog):
+    """
+    【交互层】把 Discord 上的成员信息变化同步给 MemberService。
+
+    - 成员的用户名或全局显示名称发生变化时，丢弃 MemberService 中缓存的快照，
+      下一次 @ 会回到数据库更新 (服务器昵称不保存在 members 表中，变化时不需要处理)；
+    - 启动时和加入新服务器时，在后台把整个服务器的成员列表批量同步到数据库。
+    """
+
+    def __init__(
+        self,
+        bot: commands.Bot,
+        member_service: MemberService,
+        member_sync: Optional[MemberSyncService] = None,
+    ):
+        """
+        初始化 MemberCog。
+
+        Args:
+            bot (commands.Bot): 当前的机器人实例。
+            member_service (MemberService): 持有成员快照缓存的成员服务。
+            member_sync (MemberSyncService): 服务器成员批量同步服务，为 None 时不做批量同步。
+        """
+        self.bot = bot
+        self.member_service = member_service
+        self.member_sync = member_sync
+        self._synced_on_startup = False
+        # 同一时间只同步一个服务器，避免和正常的 @ 请求争抢数据库和 API 配额
+        self._sync_lock = asyncio.Lock()
+        self._sync_tasks: Set[asyncio.Task] = set()
+
+    def _schedule_sync(self, guilds: Iterable[discord.Guild]) -> None:
+        if self.member_sync is None:
+            return
+        task = asyncio.create_task(self._sync_guilds(list(guilds)))
+        self._sync_tasks.add(task)
+        task.add_done_callback(self._sync_tasks.discard)
+
+    async def _sync_guilds(self, guilds) -> None:
+        for guild in guilds:
+            async with self._sync_lock:
+                try:
+                    await self.member_sync.sync_guild(guild)
+                except Exception:
+                    # 同步失败不影响其他服务器，也不影响正常的按需建档
+                    logger.error(f"Failed to sync members of guild '{guild.name}'.", exc_info=True)
+
+    async def cog_unload(self) -> None:
+        for task in self._sync_tasks:
+            task.cancel()
+        await asyncio.gather(*self._sync_tasks, return_exceptions=True)
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """首次连接时同步所有服务器；之后的重新连接 (也会触发 on_ready) 不再重复同步。"""
+        if self._synced_on_startup:
+            return
+        self._synced_on_startup = True
+        self._schedule_sync(self.bot.guilds)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild: discord.Guild):
+        """加入新服务器时同步它的成员。"""
+        self._schedule_sync([guild])
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        """服务器内的成员信息变化；只改了服务器昵称时不影响 members 表。"""
+        self._invalidate_if_renamed(before, after)
+
+    @commands.Cog.listener()
+    async def on_user_update(self, before: discord.User, after: discord.User):
+        """用户名等全局账号信息变化。"""
+        self._invalidate_if_renamed(before, after)
+
+    def _invalidate_if_renamed(self, before, after) -> None:
+        if before.name != after.name or global_display_name(before) != global_display_name(after):
+            self.member_service.invalidate(after.id)
+
+
+async def setup(bot: commands.Bot):
+    """
+    【依赖注入入口】从附加到 bot 的容器中解析出 `MemberService`，并用它来实例化 `MemberCog`。
+    """
+    logger.info("Setting up MemberCog...")
+
+    container = bot.container
+    if not container:
+        raise RuntimeError("Dependency Injection Container not found on bot instance.")
+
+    try:
+        await bot.add_cog(
+            MemberCog(
+                bot=bot,
+                member_service=container.member_service(),
+                member_sync=(
+                    container.member_sync()
+                    if container.config.MEMBER_SYNC_ENABLED()
+                    else None
+                ),
+            )
+        )
+        logger.info("MemberCog has been successfully set up and added to the bot.")
+    except Exception:
+        logger.critical(
+            "Failed to setup MemberCog due to a dependency resolution or instantiation error.",
+            exc_info=True,
+        )
+        raise
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# 处理一批合并后的消息 (从旧到新) 的回调
+BatchHandler = Callable[[List[discord.Message]], Awaitable[None]]
+
+
+class _UserState:
+    """某个用户在某个频道中的待处理消息和正在进行的生成。"""
+
+    def __init__(self):
+        self.pending: List[discord.Message] = []
+        self.timer: Optional[asyncio.Task] = None
+        self.generation: Optional[asyncio.Task] = None
+        self.in_flight: List[discord.Message] = []
+
+
+class MentionDebouncer:
+    """
+    【交互层辅助】把同一用户在同一频道中连续发送的 @ 合并成一次生成。
+
+    - 这个用户没有进行中的生成时，@ 立即交给 `handler`，不增加任何延迟；
+    - 如果这个用户的上一批消息还在生成中，新消息会取代它：正在进行的生成被取消 (handler 负责撤回
+      已经发出的部分回复)，它的消息并入新的一批，并等待 `window` 秒，窗口内的后续消息继续并入、
+      重新开始等待，最终只回复一次，回复之间也不会交错。
+    """
+
+    def __init__(self, window: float, handler: BatchHandler):
+        self.window = window
+        self._handler = handler
+        self._states: Dict[Tuple[int, int], _UserState] = {}
+
+        # 指标
+        self.merged = 0
+        self.superseded = 0
+
+    def submit(self, message: discord.Message) -> None:
+        """登记一条新的 @ 消息：立即开始生成，或者 (重新) 开始等待窗口。"""
+        key = (message.channel.id, message.author.id)
+        state = self._states.setdefault(key, _UserState())
+
+        superseding = state.generation is not None and not state.generation.done()
+        if superseding:
+            # 上一批还在生成：取消它，把它的消息并入这一批一起回复
+            self.superseded += 1
+            logger.info(
+                f"Mention from '{message.author.name}' supersedes an in-flight generation."
+            )
+            state.generation.cancel()
+            state.pending[:0] = state.in_flight
+            state.in_flight = []
+            state.generation = None
+
+        waiting = state.timer is not None
+        if state.pending:
+            self.merged += 1
+        state.pending.append(message)
+        if waiting:
+            state.timer.cancel()
+        # 只有取代了进行中的生成、或者已经在等待窗口时才等待；同一轮事件循环中到达的消息仍会合并
+        delay = self.window if superseding or waiting else 0
+        state.timer = asyncio.create_task(self._fire_after_window(key, state, delay))
+
+    async def _fire_after_window(self, key: Tuple[int, int], state: _UserState, delay: float) -> None:
+        await asyncio.sleep(delay)
+        batch, state.pending = state.pending, []
+        state.timer = None
+        state.in_flight = batch
+        state.generation = asyncio.create_task(self._run(key, state, batch))
+
+    async def _run(self, key: Tuple[int, int], state: _UserState, batch: List[discord.Message]) -> None:
+        try:
+            await self._handler(batch)
+        finally:
+            if state.generation is asyncio.current_task():
+                state.generation = None
+                state.in_flight = []
+            if state.generation is None and state.timer is None and not state.pending:
+                self._states.pop(key, None)
+
+    async def close(self) -> None:
+        """取消所有等待中的窗口和正在进行的生成 (Cog 卸载时调用)。"""
+        tasks = [
+            task
+            for state in self._states.values()
+            for task in (state.timer, state.generation)
+            if task is not None and not task.done()
+        ]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._states.clear()
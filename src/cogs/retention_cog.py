@@ -0,0 +1,92 @@
+import asyncio
+import logging
+from typing import Optional
+
+from discord.ext import commands
+
+from src.services.event_retention import EventRetentionService
+
+# 获取此模块的日志记录器
+logger = logging.getLogger(__name__)
+
+
+class RetentionCog(commands.Cog):
+    """
+    【交互层】在后台定期执行 events 表的保留策略 (归档并删除过期事件)。
+
+    机器人启动后先等待 `initial_delay` 秒 (避开启动时的成员同步)，之后每隔 `interval` 秒执行一次。
+    """
+
+    def __init__(
+        self,
+        bot: commands.Bot,
+        retention: EventRetentionService,
+        interval: float = 24 * 3600,
+        initial_delay: float = 300.0,
+    ):
+        """
+        初始化 RetentionCog。
+
+        Args:
+            bot (commands.Bot): 当前的机器人实例。
+            retention (EventRetentionService): 执行归档和删除的保留策略服务。
+            interval (float): 两次清理之间的间隔 (秒)。
+            initial_delay (float): 启动后第一次清理前的等待时间 (秒)。
+        """
+        self.bot = bot
+        self.retention = retention
+        self.interval = interval
+        self.initial_delay = initial_delay
+        self._task: Optional[asyncio.Task] = None
+
+    async def cog_load(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def cog_unload(self):
+        # 中断正在进行的清理是安全的：已归档但还没删除的事件下次会再次归档
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        await asyncio.sleep(self.initial_delay)
+        while True:
+            try:
+                await self.retention.run()
+            except Exception:
+                # 一次清理失败不影响下一次
+                logger.error("Event retention run failed.", exc_info=True)
+            await asyncio.sleep(self.interval)
+
+
+async def setup(bot: commands.Bot):
+    """
+    【依赖注入入口】从附加到 bot 的容器中解析出 `EventRetentionService`，并用它来实例化 `RetentionCog`。
+    保留策略默认关闭 (RETENTION_ENABLED)，关闭时不添加这个 Cog。
+    """
+    logger.info("Setting up RetentionCog...")
+
+    container = bot.container
+    if not container:
+        raise RuntimeError("Dependency Injection Container not found on bot instance.")
+
+    if not container.config.RETENTION_ENABLED():
+        logger.info("Event retention is disabled; RetentionCog is not added.")
+        return
+
+    try:
+        await bot.add_cog(
+            RetentionCog(
+                bot=bot,
+                retention=container.event_retention(),
+                interval=container.config.RETENTION_INTERVAL_HOURS() * 3600,
+            )
+        )
+        logger.info("RetentionCog has been successfully set up and added to the bot.")
+    except Exception:
+        logger.critical(
+            "Failed to setup RetentionCog due to a dependency resolution or instantiation error.",
+            exc_info=True,
+        )
+        raise
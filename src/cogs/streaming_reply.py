@@ -0,0 +1,85 @@
+import logging
+import time
+from typing import Callable, List, Optional
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Discord 单条消息的最大长度
+DISCORD_MESSAGE_LIMIT = 2000
+
+
+class StreamingReply:
+    """
+    【交互层辅助】把 LLM 流式生成的文本渐进地发送到 Discord。
+
+    - 收到第一块文本时立即回复一条消息，让用户尽快看到输出；
+    - 之后的文本通过编辑这条消息追加，编辑频率受 `edit_interval` 限制，避免触发 Discord 的速率限制；
+    - 当前消息写满 2000 字符后，将其定稿并回复一条新消息继续输出。
+    """
+
+    def __init__(
+        self,
+        source: discord.Message,
+        edit_interval: float = 1.0,
+        max_length: int = DISCORD_MESSAGE_LIMIT,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            source: 被回复的原始消息。
+            edit_interval: 同一条消息两次编辑之间的最小间隔 (秒)。
+            max_length: 单条消息的最大长度。
+            clock: 单调时钟，测试时可以替换。
+        """
+        self._source = source
+        self._edit_interval = edit_interval
+        self._max_length = max_length
+        self._clock = clock
+
+        self.sent_messages: List[discord.Message] = []
+        self._current: Optional[discord.Message] = None
+        # 当前消息应显示的完整文本，以及 Discord 上实际显示的文本
+        self._pending = ""
+        self._displayed = ""
+        self._last_edit_at = 0.0
+        self._total_chars = 0
+
+    @property
+    def has_output(self) -> bool:
+        return self._total_chars > 0
+
+    async def push(self, chunk: str) -> None:
+        """追加一块新生成的文本。"""
+        if not chunk:
+            return
+        self._total_chars += len(chunk)
+        self._pending += chunk
+
+        # 当前消息写满后，定稿并切换到下一条消息
+        while len(self._pending) > self._max_length:
+            page = self._pending[: self._max_length]
+            self._pending = self._pending[self._max_length :]
+            await self._show(page)
+            self._current = None
+            self._displayed = ""
+
+        if self._current is None or self._clock() - self._last_edit_at >= self._edit_interval:
+            await self._show(self._pending)
+
+    async def finish(self) -> None:
+        """流结束后，确保最后一条消息显示完整的文本。"""
+        await self._show(self._pending)
+
+    async def _show(self, text: str) -> None:
+        if not text or text == self._displayed:
+            return
+        if self._current is None:
+            logger.debug(f"Starting streamed reply message #{len(self.sent_messages) + 1}.")
+            self._current = await self._source.reply(text)
+            self.sent_messages.append(self._current)
+        else:
+            await self._current.edit(content=text)
+        self._displayed = text
+        self._last_edit_at = self._clock()
@@ -1,23 +1,151 @@
+import asyncio
 import json
+import logging
+import time
 import aiofiles
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Dict, List, Optional
 from .character_model import Character
 
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class _CachedCharacter:
+    """缓存中的一张角色卡，以及解析它时对应文件的修改时间。"""
+
+    character: Character
+    mtime_ns: Optional[int]
+
 
 class CharacterManager:
-    def __init__(self, characters_dir: Path):
+    """
+    角色卡注册表。
+
+    每张角色卡只在首次加载 (或其文件被修改) 时读取并校验一次，之后直接从内存返回。
+    热更新通过 mtime 轮询实现：距离上次检查超过 `reload_check_interval` 秒后，
+    下一次加载会 stat 一次文件，发现变化就重新解析，并整体替换缓存条目。
+    解析失败时继续使用上一个可用版本，保证机器人不会因为一次错误的编辑而“失忆”。
+    """
+
+    def __init__(self, characters_dir: Path, reload_check_interval: float = 2.0):
         self.characters_dir = characters_dir
         if not self.characters_dir.exists():
             raise FileNotFoundError(
                 f"Characters directory not found: {self.characters_dir}"
             )
+        self.reload_check_interval = reload_check_interval
+
+        self._cache: Dict[str, _CachedCharacter] = {}
+        self._last_checked: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+        # 缓存统计，便于观察命中率
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.reloads = 0
+
+    @property
+    def cache_stats(self) -> Dict[str, int]:
+        """返回缓存命中、未命中和热更新的次数。"""
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "reloads": self.reloads,
+            "cached": len(self._cache),
+        }
 
     async def load_character(self, name: str) -> Character:
+        cached = self._cache.get(name)
+        if cached is not None and not self._is_stale(name, cached):
+            self.cache_hits += 1
+            return cached.character
+
+        async with self._locks.setdefault(name, asyncio.Lock()):
+            # 等锁期间，可能已经有其他协程完成了加载
+            current = self._cache.get(name)
+            if current is not None and current is not cached:
+                self.cache_hits += 1
+                return current.character
+
+            self.cache_misses += 1
+            try:
+                entry = await self._read_character(name)
+            except (FileNotFoundError, ValueError):
+                if current is None:
+                    raise
+                logger.error(
+                    f"Failed to reload character card '{name}.json', keeping the previous version.",
+                    exc_info=True,
+                )
+                return current.character
+
+            if current is not None:
+                self.reloads += 1
+                logger.info(f"Character card '{name}.json' changed on disk, reloaded.")
+            # 整体替换缓存条目，读者要么看到旧卡，要么看到新卡
+            self._cache[name] = entry
+            self._last_checked[name] = time.monotonic()
+            return entry.character
+
+    async def preload(self) -> List[str]:
+        """
+        预加载并校验目录下的所有角色卡。
+
+        Returns:
+            成功加载的角色名列表。无法解析的角色卡只记录日志，不会中断启动。
+        """
+        loaded = []
+        for path in sorted(self.characters_dir.glob("*.json")):
+            try:
+                await self.load_character(path.stem)
+                loaded.append(path.stem)
+            except (FileNotFoundError, ValueError):
+                logger.error(f"Skipping invalid character card: {path}", exc_info=True)
+        return loaded
+
+    async def refresh(self) -> List[str]:
+        """
+        立即检查所有已缓存的角色卡 (忽略检查间隔)，并重新加载发生变化的角色卡。
+
+        Returns:
+            被重新加载的角色名列表。
+        """
+        reloaded = []
+        for name in list(self._cache):
+            self._last_checked.pop(name, None)
+            before = self._cache[name]
+            if (await self.load_character(name)) is not before.character:
+                reloaded.append(name)
+        return reloaded
+
+    def _is_stale(self, name: str, cached: _CachedCharacter) -> bool:
+        """按检查间隔轮询文件的 mtime，判断缓存是否已经过期。"""
+        now = time.monotonic()
+        last_checked = self._last_checked.get(name)
+        if last_checked is not None and now - last_checked < self.reload_check_interval:
+            return False
+        self._last_checked[name] = now
+        mtime_ns = self._stat_mtime(self.characters_dir / f"{name}.json")
+        # 文件暂时消失 (例如编辑器正在原子替换) 时，继续使用缓存
+        return mtime_ns is not None and mtime_ns != cached.mtime_ns
+
+    @staticmethod
+    def _stat_mtime(path: Path) -> Optional[int]:
+        try:
+            return path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    async def _read_character(self, name: str) -> _CachedCharacter:
         character_path = self.characters_dir / f"{name}.json"
+        # 先记录 mtime 再读取：如果读取期间文件又被修改，下一次轮询会发现并重新加载
+        mtime_ns = self._stat_mtime(character_path)
         try:
             async with aiofiles.open(character_path, mode="r", encoding="utf-8") as f:
                 data = json.loads(await f.read())
-            return Character.model_validate(data)
+            return _CachedCharacter(Character.model_validate(data), mtime_ns)
         except FileNotFoundError:
             raise FileNotFoundError(
                 f"Character card '{name}.json' not found at {character_path}"
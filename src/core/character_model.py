@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 
 class DialogueExample(BaseModel):
@@ -13,3 +13,5 @@ class Character(BaseModel):
     first_message: str
     example_dialogue: List[DialogueExample]
     main_chat_prompt_template: str
+    # 单次请求的 prompt token 预算；为空时使用全局默认值 (Settings.PROMPT_TOKEN_BUDGET)
+    context_token_budget: Optional[int] = None
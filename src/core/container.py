@@ -1,15 +1,39 @@
 from dependency_injector import containers, providers
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 
 # 导入所有需要被容器管理的组件
 from src.core.config import settings
 from src.core.character_manager import CharacterManager
+from src.core.tracing import RequestTracer
+from src.db.database import Database, PoolSettings, SqlitePragmas
+from src.db.repositories.event_repository import EventRepository
 from src.db.repositories.member_repository import MemberRepository
 from src.services.gemini_client import GeminiClient
+from src.services.llm.abstract_llm_client import AbstractLLMClient
+from src.services.llm.fake_llm_client import FakeLLMClient
+from src.services.llm_scheduler import LLMScheduler
+from src.services.message_buffer import ChannelMessageBuffer
+from src.services.format_cache import FormattedMessageCache
+from src.services.resilient_llm_client import (
+    CircuitBreaker,
+    ResilientLLMClient,
+    RetryPolicy,
+)
+from src.services.data_transfer import DataTransferService
+from src.services.event_retention import EventRetentionService
+from src.services.event_writer import EventWriter
+from src.services.member_cache import MemberCache
 from src.services.member_service import MemberService
+from src.services.member_sync import MemberSyncService
 from src.services.memory.abstract_memory_service import AbstractMemoryService
-from src.services.memory.hardcoded_memory_service import HardcodedMemoryService
-from src.services.ai_service import AIService
+from src.services.memory.event_search_memory_service import EventSearchMemoryService
+from src.services.memory.hardcoded_memory_service import DEFAULT_MEMORIES, HardcodedMemoryService
+from src.services.memory.vector_memory_service import VectorMemoryService
+from src.services.memory.vector_store import VectorMemoryStore
+from src.services.ai_service import AIService, ContextTimeouts
+from src.services.prompt_assembler import PromptAssembler
+from src.services.embedding import HashingEmbedder
+from src.services.response_cache import ResponseCache
+from src.services.single_flight import IdempotencyGuard, SingleFlight
 
 
 class Container(containers.DeclarativeContainer):
@@ -45,6 +69,8 @@ class Container(containers.DeclarativeContainer):
         # 【实现说明】: 使用 config.py 中定义的 DATA_DIR 属性来定位角色目录。
         # 这种方式保证了路径的一致性和可维护性。
         characters_dir=settings.DATA_DIR / "characters",
+        # 角色卡在内存中缓存，并按此间隔轮询文件 mtime 实现热更新
+        reload_check_interval=settings.CHARACTER_RELOAD_INTERVAL,
     )
 
     gemini_client = providers.Singleton(
@@ -53,23 +79,88 @@ class Container(containers.DeclarativeContainer):
         model_name=settings.GEMINI_MODEL_NAME,
     )
 
+    # 离线假后端，用于在没有网络的情况下压测整条链路
+    fake_llm_client = providers.Singleton(
+        FakeLLMClient,
+        latency_distribution=settings.FAKE_LLM_LATENCY_DISTRIBUTION,
+        latency_mean=settings.FAKE_LLM_LATENCY_MEAN,
+        latency_stddev=settings.FAKE_LLM_LATENCY_STDDEV,
+        error_rate=settings.FAKE_LLM_ERROR_RATE,
+        output_tokens_min=settings.FAKE_LLM_OUTPUT_TOKENS_MIN,
+        output_tokens_max=settings.FAKE_LLM_OUTPUT_TOKENS_MAX,
+        seed=settings.FAKE_LLM_SEED,
+    )
+
+    # 【依赖倒置】: 由 LLM_BACKEND 选择具体的后端，其余组件只依赖 AbstractLLMClient。
+    # 未被选中的后端不会被创建 (例如使用假后端时不会配置 Gemini)。
+    llm_backend: providers.Provider[AbstractLLMClient] = providers.Selector(
+        config.LLM_BACKEND,
+        gemini=gemini_client,
+        fake=fake_llm_client,
+    )
+
+    # 为 LLM 后端增加重试、熔断和 (可选的) 对冲请求。
+    # 业务层只依赖这个包装后的客户端，它与被包装的后端接口完全相同。
+    llm_client = providers.Singleton(
+        ResilientLLMClient,
+        client=llm_backend,
+        retry_policy=providers.Factory(
+            RetryPolicy,
+            max_attempts=settings.LLM_RETRY_MAX_ATTEMPTS,
+            base_delay=settings.LLM_RETRY_BASE_DELAY,
+            max_delay=settings.LLM_RETRY_MAX_DELAY,
+        ),
+        circuit_breaker=providers.Factory(
+            CircuitBreaker,
+            failure_threshold=settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+            recovery_timeout=settings.LLM_CIRCUIT_RECOVERY_TIMEOUT,
+        ),
+        hedge_enabled=settings.LLM_HEDGE_ENABLED,
+        hedge_min_samples=settings.LLM_HEDGE_MIN_SAMPLES,
+    )
+
+    # LLM 调度器：限制并发并按服务器/用户公平排队。
+    # 必须是 Singleton，所有 AIService 实例共享同一组名额和队列。
+    llm_scheduler = providers.Singleton(
+        LLMScheduler,
+        max_in_flight=settings.LLM_MAX_IN_FLIGHT,
+        max_queue_depth=settings.LLM_MAX_QUEUE_DEPTH,
+    )
+
     # ------------------- 3. 数据库层 -------------------
     # 这一部分负责建立和管理与数据库的连接。
-    # 使用 Singleton 确保整个应用共享同一个数据库连接池。
+    # 使用 Singleton 确保整个应用共享同一个数据库引擎 (连接池) 和同一个写入任务。
+    # 应用退出时由 main.py 调用 `database().dispose()`。
 
-    db_engine = providers.Singleton(
-        create_async_engine,
+    database = providers.Singleton(
+        Database,
         url=str(settings.DATABASE_URL),  # 确保 URL 是字符串
         echo=settings.DB_ECHO,
+        reader_pool_size=settings.DB_READER_POOL_SIZE,
+        pragmas=providers.Factory(
+            SqlitePragmas,
+            journal_mode=settings.SQLITE_JOURNAL_MODE,
+            synchronous=settings.SQLITE_SYNCHRONOUS,
+            mmap_size=settings.SQLITE_MMAP_SIZE,
+            cache_size=settings.SQLITE_CACHE_SIZE,
+            busy_timeout=settings.SQLITE_BUSY_TIMEOUT,
+            auto_vacuum=settings.SQLITE_AUTO_VACUUM,
+        ),
+        pool=providers.Factory(
+            PoolSettings,
+            size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            recycle=settings.DB_POOL_RECYCLE,
+            timeout=settings.DB_POOL_TIMEOUT,
+            pre_ping=settings.DB_POOL_PRE_PING,
+            statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+        ),
     )
 
-    db_session_factory = providers.Singleton(
-        async_sessionmaker,
-        bind=db_engine,
-        autoflush=False,
-        autocommit=False,
-        expire_on_commit=False,
-    )
+    db_engine = database.provided.engine
+    db_session_factory = database.provided.session_factory
+    # SQLite 的串行写入任务；其他数据库为 None，写操作直接执行
+    db_writer = database.provided.writer
 
     # ------------------- 4. 数据仓库层 (Repository) -------------------
     # Repository 封装了对特定数据表的数据库操作 (CRUD)。
@@ -80,6 +171,13 @@ class Container(containers.DeclarativeContainer):
     member_repo = providers.Factory(
         MemberRepository,
         session_factory=db_session_factory,
+        writer=db_writer,
+    )
+
+    event_repo = providers.Factory(
+        EventRepository,
+        session_factory=db_session_factory,
+        writer=db_writer,
     )
 
     # ... 在此添加其他 Repository 定义 ...
@@ -89,24 +187,155 @@ class Container(containers.DeclarativeContainer):
     # 它们的依赖项（如 `member_repo`）由容器根据上面的定义自动注入。
     # 同样使用 `Factory` 模式，确保业务操作的独立性。
 
+    # 文本向量化器：默认使用完全离线的哈希向量化器
+    embedder = providers.Singleton(
+        HashingEmbedder,
+        dimension=settings.EMBEDDING_DIMENSION,
+    )
+
+    # 向量记忆库持有内存映射的向量矩阵，必须是 Singleton
+    vector_memory_store = providers.Singleton(
+        VectorMemoryStore,
+        directory=settings.DATA_DIR / "memory",
+        dimension=settings.EMBEDDING_DIMENSION,
+    )
+
     # 【依赖倒置】: 我们声明提供的是抽象接口 AbstractMemoryService，
-    # 但实际创建的是 HardcodedMemoryService。这使得未来替换为真实记忆服务时，
-    # 无需修改任何依赖此服务的代码（如 AIService）。
-    memory_service: providers.Provider[AbstractMemoryService] = providers.Factory(
-        HardcodedMemoryService
+    # 具体实现由 MEMORY_BACKEND 选择 (写死的记忆、基于历史消息全文检索的记忆，或向量记忆)。
+    # 替换记忆服务时，无需修改任何依赖此服务的代码（如 AIService）。
+    memory_service: providers.Provider[AbstractMemoryService] = providers.Selector(
+        config.MEMORY_BACKEND,
+        hardcoded=providers.Factory(HardcodedMemoryService),
+        event_search=providers.Factory(
+            EventSearchMemoryService,
+            event_repo=event_repo,
+            limit=settings.MEMORY_SEARCH_LIMIT,
+        ),
+        # 空的记忆库首次使用时导入写死的示例记忆，之后只有相关的记忆才会被检索出来
+        vector=providers.Singleton(
+            VectorMemoryService,
+            store=vector_memory_store,
+            embedder=embedder,
+            limit=settings.MEMORY_SEARCH_LIMIT,
+            min_score=settings.MEMORY_VECTOR_MIN_SCORE,
+            seed_memories=DEFAULT_MEMORIES,
+        ),
+    )
+
+    # 成员快照缓存必须是 Singleton，MemberService 每次创建时注入同一个实例
+    member_cache = providers.Singleton(
+        MemberCache,
+        max_entries=settings.MEMBER_CACHE_MAX_ENTRIES,
+        ttl=settings.MEMBER_CACHE_TTL,
     )
 
     member_service = providers.Factory(
         MemberService,
         member_repo=member_repo,  # <- 注入上面定义的 member_repo
+        member_cache=member_cache,
+    )
+
+    # 服务器成员批量同步，由 MemberCog 在启动和加入服务器时调用
+    member_sync = providers.Factory(
+        MemberSyncService,
+        member_repo=member_repo,
+        batch_size=settings.MEMBER_SYNC_BATCH_SIZE,
+    )
+
+    # 按 token 预算裁剪上下文的 prompt 组装器，无状态，全局共享一个实例即可
+    prompt_assembler = providers.Singleton(
+        PromptAssembler,
+        default_token_budget=settings.PROMPT_TOKEN_BUDGET,
+    )
+
+    # 语义响应缓存必须是 Singleton，才能在所有请求之间共享
+    response_cache = providers.Singleton(
+        ResponseCache,
+        embedder=embedder,
+        ttl=settings.RESPONSE_CACHE_TTL,
+        max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+        similarity_threshold=settings.RESPONSE_CACHE_SIMILARITY_THRESHOLD,
+    )
+
+    # 在途请求去重与消息幂等记录，都必须在整个应用中共享
+    single_flight = providers.Singleton(SingleFlight)
+
+    idempotency_guard = providers.Singleton(
+        IdempotencyGuard,
+        ttl=settings.MESSAGE_IDEMPOTENCY_TTL,
+    )
+
+    # 频道消息缓冲区：ChatCog 负责写入，AIService 从中读取聊天历史，必须共享同一个实例
+    message_buffer = providers.Singleton(
+        ChannelMessageBuffer,
+        per_channel=settings.MESSAGE_BUFFER_SIZE,
+        max_channels=settings.MESSAGE_BUFFER_MAX_CHANNELS,
+    )
+
+    # 历史消息格式化结果缓存，在所有请求之间共享
+    format_cache = providers.Singleton(
+        FormattedMessageCache,
+        max_entries=settings.FORMAT_CACHE_MAX_ENTRIES,
+    )
+
+    # 消息事件的后写批量写入器：持有队列和后台任务，必须是 Singleton
+    event_writer = providers.Singleton(
+        EventWriter,
+        event_repo=event_repo,
+        batch_size=settings.EVENT_WRITER_BATCH_SIZE,
+        flush_interval=settings.EVENT_WRITER_FLUSH_INTERVAL,
+        max_queue=settings.EVENT_WRITER_MAX_QUEUE,
+        backpressure_timeout=settings.EVENT_WRITER_BACKPRESSURE_TIMEOUT,
+    )
+
+    # events 表的保留策略，由 RetentionCog 定期执行
+    event_retention = providers.Factory(
+        EventRetentionService,
+        event_repo=event_repo,
+        archive_dir=settings.DATA_DIR / "archive",
+        ttl_days=settings.RETENTION_TTL_DAYS,
+        default_ttl_days=settings.RETENTION_DEFAULT_TTL_DAYS,
+        batch_size=settings.RETENTION_BATCH_SIZE,
+        database=database,
+        vacuum_pages=settings.RETENTION_VACUUM_PAGES,
+    )
+
+    # members / events 的流式导出和导入，由 src/cli/data_transfer.py 使用
+    data_transfer = providers.Factory(
+        DataTransferService,
+        member_repo=member_repo,
+        event_repo=event_repo,
+    )
+
+    # 分阶段计时与慢请求日志，ChatCog 和 AIService 共享同一份统计
+    request_tracer = providers.Singleton(
+        RequestTracer,
+        slow_threshold=settings.SLOW_REQUEST_THRESHOLD,
     )
 
     ai_service = providers.Factory(
         AIService,
-        llm_client=gemini_client,
+        llm_client=llm_client,
         character_manager=character_manager,
         member_service=member_service,
         memory_service=memory_service,
+        prompt_assembler=prompt_assembler,
+        llm_scheduler=llm_scheduler,
+        # 响应缓存是可选功能，由 RESPONSE_CACHE_ENABLED 控制
+        response_cache=response_cache if settings.RESPONSE_CACHE_ENABLED else None,
+        single_flight=single_flight,
+        tracer=request_tracer,
+        prompt_log_sample_rate=settings.PROMPT_LOG_SAMPLE_RATE,
+        prompt_log_max_chars=settings.PROMPT_LOG_MAX_CHARS,
+        message_buffer=message_buffer,
+        format_cache=format_cache,
+        context_timeouts=providers.Factory(
+            ContextTimeouts,
+            deadline=settings.CONTEXT_DEADLINE,
+            member=settings.CONTEXT_MEMBER_TIMEOUT,
+            history=settings.CONTEXT_HISTORY_TIMEOUT,
+            memories=settings.CONTEXT_MEMORY_TIMEOUT,
+        ),
     )
 
     # ... 在此添加其他 Service 定义 ...
@@ -0,0 +1,130 @@
+import string
+import weakref
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, Union
+
+from .character_model import Character
+from .token_estimator import estimate_tokens
+
+# 每条消息都会变化的槽位，其余占位符都在编译时渲染
+DYNAMIC_FIELDS: FrozenSet[str] = frozenset(
+    {"long_term_memory", "short_term_memory", "user_info", "current_input"}
+)
+
+_formatter = string.Formatter()
+
+# (字段名，是否可以直接 str()，conversion，format_spec)
+_Slot = Tuple[str, bool, Optional[str], str]
+
+
+def _root_field_name(field_name: str) -> str:
+    """`a.b[0]` -> `a`"""
+    return field_name.split(".", 1)[0].split("[", 1)[0]
+
+
+class CompiledPromptTemplate:
+    """
+    预编译的 prompt 模板。
+
+    编译时把模板拆成“字面量片段”和“占位符”，并立即渲染所有静态占位符
+    (角色描述、示例对话、bot 名字)，相邻的字面量合并成一个字符串。
+    渲染时只需按顺序拼接片段并填充少量动态槽位，不再重新解析整个模板。
+    渲染结果与 `template.format(**static_values, **dynamic_values)` 完全一致。
+    """
+
+    def __init__(
+        self,
+        template: str,
+        static_values: Dict[str, Any],
+        dynamic_fields: FrozenSet[str] = DYNAMIC_FIELDS,
+    ):
+        parts: List[Union[str, _Slot]] = []
+        pending: List[str] = []
+
+        for literal_text, field_name, format_spec, conversion in _formatter.parse(
+            template
+        ):
+            pending.append(literal_text)
+            if field_name is None:
+                continue
+
+            root = _root_field_name(field_name)
+            if root in static_values:
+                value, _ = _formatter.get_field(field_name, (), static_values)
+                value = _formatter.convert_field(value, conversion)
+                pending.append(_formatter.format_field(value, format_spec))
+            elif root in dynamic_fields:
+                if pending:
+                    parts.append("".join(pending))
+                    pending = []
+                is_simple = field_name == root and not conversion and not format_spec
+                parts.append((field_name, is_simple, conversion, format_spec))
+            else:
+                # 与 str.format 的行为保持一致，但错误在编译时就暴露出来
+                raise KeyError(field_name)
+
+        if pending:
+            parts.append("".join(pending))
+
+        self._parts = parts
+        self.slot_names: FrozenSet[str] = frozenset(
+            _root_field_name(part[0]) for part in parts if not isinstance(part, str)
+        )
+        # 所有静态文本，用于估算 prompt 的固定开销
+        self.static_text = "".join(part for part in parts if isinstance(part, str))
+        self.static_tokens = estimate_tokens(self.static_text)
+
+    def render(self, **values: Any) -> str:
+        """填充动态槽位，返回最终的 prompt。"""
+        out = []
+        for part in self._parts:
+            if isinstance(part, str):
+                out.append(part)
+                continue
+            field_name, is_simple, conversion, format_spec = part
+            if is_simple:
+                out.append(str(values[field_name]))
+            else:
+                value, _ = _formatter.get_field(field_name, (), values)
+                value = _formatter.convert_field(value, conversion)
+                out.append(_formatter.format_field(value, format_spec))
+        return "".join(out)
+
+
+def format_example_dialogue(character: Character) -> str:
+    """格式化角色的示例对话，用于构建 few-shot prompt。"""
+    return "\n".join(
+        [
+            f"User: {ex.user}\n{character.name}: {ex.bot}"
+            for ex in character.example_dialogue
+        ]
+    )
+
+
+# id(character) -> (character 的弱引用，编译结果)
+# Character 不可哈希，因此用 id 作为键，并用弱引用确认对象仍是同一个。
+_compiled_cache: Dict[int, Tuple[weakref.ref, CompiledPromptTemplate]] = {}
+
+
+def compile_character_prompt(character: Character) -> CompiledPromptTemplate:
+    """
+    获取角色的预编译 prompt 模板。
+
+    同一个 Character 对象只编译一次。CharacterManager 热更新时会换成新的
+    Character 对象，旧对象被回收后其编译结果也随之从缓存中移除。
+    """
+    key = id(character)
+    cached = _compiled_cache.get(key)
+    if cached is not None and cached[0]() is character:
+        return cached[1]
+
+    compiled = CompiledPromptTemplate(
+        character.main_chat_prompt_template,
+        static_values={
+            "persona_description": character.description,
+            "example_dialogue": format_example_dialogue(character),
+            "bot_name": character.name,
+        },
+    )
+    ref = weakref.ref(character, lambda _, key=key: _compiled_cache.pop(key, None))
+    _compiled_cache[key] = (ref, compiled)
+    return compiled
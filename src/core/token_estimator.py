@@ -0,0 +1,54 @@
+import math
+import re
+
+# 中日韩文字、假名、谚文以及全角标点。对 Gemini 这类分词器来说，
+# 这些字符大约每个字符对应一个 token。
+_CJK_PATTERN = re.compile(
+    r"[\u3000-\u303f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff"
+    r"\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]"
+)
+
+# ASCII 文本 (英文、数字、代码) 平均约 4 个字符一个 token
+_ASCII_CHARS_PER_TOKEN = 4
+# 其他非 ASCII 字符 (带重音的字母、emoji 等) 平均约 2 个字符一个 token
+_OTHER_CHARS_PER_TOKEN = 2
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    在本地快速估算一段文本的 token 数。
+
+    这是一个启发式估算，不调用任何网络 API：CJK 字符按每字一个 token 计算，
+    ASCII 文本按每 4 个字符一个 token，其余字符按每 2 个字符一个 token。
+    结果会略微偏高，适合用来做预算控制。
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    other = len(text) - cjk - ascii_chars
+    return (
+        cjk
+        + math.ceil(ascii_chars / _ASCII_CHARS_PER_TOKEN)
+        + math.ceil(other / _OTHER_CHARS_PER_TOKEN)
+    )
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    截取文本的最长前缀，使其估算 token 数不超过 `max_tokens`。
+    """
+    if max_tokens <= 0:
+        return ""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    # 估算值随前缀长度单调不减，可以二分查找
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid]) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low]
@@ -0,0 +1,137 @@
+import contextvars
+import logging
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# 当前请求的计时记录；asyncio 任务会继承创建时的上下文，
+# 因此服务层的 span 会自动记到交互层开启的那条记录上。
+_current_trace: contextvars.ContextVar[Optional["RequestTrace"]] = contextvars.ContextVar(
+    "current_request_trace", default=None
+)
+
+
+class RequestTrace:
+    """
+    一次请求 (从收到 @ 到回复完成) 的分阶段耗时记录。
+
+    每个阶段的耗时按名称累加 (同名阶段出现多次时求和)，并保持首次出现的顺序。
+    """
+
+    def __init__(self, name: str, clock: Callable[[], float] = time.perf_counter):
+        self.name = name
+        self._clock = clock
+        self.started_at = clock()
+        self.finished_at: Optional[float] = None
+        self.stages: Dict[str, float] = {}
+
+    @property
+    def total(self) -> float:
+        end = self.finished_at if self.finished_at is not None else self._clock()
+        return end - self.started_at
+
+    def now(self) -> float:
+        return self._clock()
+
+    def record(self, stage: str, duration: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + duration
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        started = self._clock()
+        try:
+            yield
+        finally:
+            self.record(stage, self._clock() - started)
+
+    def breakdown(self) -> str:
+        """返回形如 `member=0.012s history=0.340s ...` 的阶段耗时摘要。"""
+        return " ".join(f"{stage}={duration:.3f}s" for stage, duration in self.stages.items())
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """
+    在当前请求的计时记录中记录一个阶段的耗时。
+    没有正在进行的请求记录时什么也不做，因此可以放心地写在任何服务代码中。
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    with trace.span(stage):
+        yield
+
+
+class RequestTracer:
+    """
+    创建请求计时记录，并在请求结束时汇总。
+
+    - 总耗时超过 `slow_threshold` 秒的请求会以 WARNING 级别记录各阶段的耗时明细 (慢请求日志)；
+    - 按阶段累计耗时和次数，可以通过 `stats` 查看各阶段的平均耗时。
+    """
+
+    def __init__(
+        self,
+        slow_threshold: float = 5.0,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.slow_threshold = slow_threshold
+        self._clock = clock
+        self.requests = 0
+        self.slow_requests = 0
+        self._stage_totals: Dict[str, float] = {}
+        self._stage_counts: Dict[str, int] = {}
+
+    @property
+    def stats(self) -> Dict[str, object]:
+        return {
+            "requests": self.requests,
+            "slow_requests": self.slow_requests,
+            "stage_avg": {
+                stage: total / self._stage_counts[stage]
+                for stage, total in self._stage_totals.items()
+            },
+        }
+
+    @contextmanager
+    def trace(self, name: str) -> Iterator[RequestTrace]:
+        """
+        开启一条请求计时记录，并设为当前记录。
+
+        如果已经处在另一条记录之中 (例如 ChatCog 开启的记录内调用 AIService)，
+        直接复用外层的记录，由外层负责汇总。
+        """
+        outer = _current_trace.get()
+        if outer is not None:
+            yield outer
+            return
+
+        trace = RequestTrace(name, clock=self._clock)
+        token = _current_trace.set(trace)
+        try:
+            yield trace
+        finally:
+            _current_trace.reset(token)
+            trace.finished_at = self._clock()
+            self._finish(trace)
+
+    def _finish(self, trace: RequestTrace) -> None:
+        self.requests += 1
+        for stage, duration in trace.stages.items():
+            self._stage_totals[stage] = self._stage_totals.get(stage, 0.0) + duration
+            self._stage_counts[stage] = self._stage_counts.get(stage, 0) + 1
+
+        if trace.total >= self.slow_threshold:
+            self.slow_requests += 1
+            logger.warning(
+                f"Slow request '{trace.name}' took {trace.total:.3f}s: {trace.breakdown()}"
+            )
+        else:
+            logger.debug(f"Request '{trace.name}' took {trace.total:.3f}s: {trace.breakdown()}")
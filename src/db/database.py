@@ -0,0 +1,249 @@
+# src/db/database.py
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, Tuple, TypeVar
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 一个写入任务：在给定的会话中执行写操作，不需要自己提交
+WriteJob = Callable[[AsyncSession], Awaitable[T]]
+
+
+@dataclass
+class SqlitePragmas:
+    """每个 SQLite 连接建立时设置的 PRAGMA。"""
+
+    # INCREMENTAL 时删除数据后空出的页可以用 `PRAGMA incremental_vacuum` 分批归还给文件系统。
+    # 只在还没有任何表时生效 (alembic/env.py 在迁移建表之前设置同样的值)；已有的数据库需要执行一次完整的 VACUUM 才会切换
+    auto_vacuum: str = "INCREMENTAL"
+    # WAL 模式下读不阻塞写、写不阻塞读
+    journal_mode: str = "WAL"
+    # WAL 模式下 NORMAL 已经足够安全 (断电最多丢失最近的事务，不会损坏数据库)，且少一次 fsync
+    synchronous: str = "NORMAL"
+    # 内存映射读取的最大字节数
+    mmap_size: int = 256 * 1024 * 1024
+    # 负数表示以 KiB 为单位的页缓存大小
+    cache_size: int = -64_000
+    # 遇到锁时最多等待的毫秒数，而不是立即报 "database is locked"
+    busy_timeout: int = 5000
+
+    def statements(self) -> Tuple[str, ...]:
+        return (
+            # 必须在建表之前设置，放在最前面
+            f"PRAGMA auto_vacuum={self.auto_vacuum}",
+            f"PRAGMA journal_mode={self.journal_mode}",
+            f"PRAGMA synchronous={self.synchronous}",
+            f"PRAGMA mmap_size={self.mmap_size}",
+            f"PRAGMA cache_size={self.cache_size}",
+            f"PRAGMA busy_timeout={self.busy_timeout}",
+        )
+
+
+@dataclass
+class PoolSettings:
+    """非 SQLite 数据库 (PostgreSQL) 的连接池参数。"""
+
+    size: int = 10
+    max_overflow: int = 10
+    # 超过这个时间 (秒) 的连接在下次取出时重建，避免被服务端或中间代理悄悄断开
+    recycle: int = 1800
+    timeout: float = 30.0
+    pre_ping: bool = True
+    # asyncpg 每个连接缓存的预编译语句数量；经过 PgBouncer 事务模式时必须为 0
+    statement_cache_size: int = 100
+
+    def engine_options(self) -> dict:
+        return {
+            "pool_size": self.size,
+            "max_overflow": self.max_overflow,
+            "pool_recycle": self.recycle,
+            "pool_timeout": self.timeout,
+            "pool_pre_ping": self.pre_ping,
+            "connect_args": {
+                # SQLAlchemy 自己的预编译语句缓存，以及 asyncpg 内部的语句缓存
+                "prepared_statement_cache_size": self.statement_cache_size,
+                "statement_cache_size": self.statement_cache_size,
+            },
+        }
+
+
+class DatabaseWriter:
+    """
+    串行执行所有写事务的专用写入任务。
+
+    SQLite 同一时间只允许一个写事务，多个处理器同时提交时会互相等锁，
+    超过 busy_timeout 就会报 "database is locked"。
+    所有写操作都通过 `run` 排队，由唯一的后台任务逐个在各自的事务中执行并提交，
+    调用方等待并拿到结果 (或异常)。
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncSession]):
+        self._session_factory = session_factory
+        self._queue: asyncio.Queue[Tuple[WriteJob, asyncio.Future]] = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+        # 指标
+        self.committed = 0
+        self.failed = 0
+
+    @property
+    def stats(self):
+        return {"queued": self._queue.qsize(), "committed": self.committed, "failed": self.failed}
+
+    async def run(self, job: WriteJob) -> T:
+        """排队执行一个写任务，并等待它提交。"""
+        if self._closed:
+            raise RuntimeError("DatabaseWriter is closed.")
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((job, future))
+        return await future
+
+    async def close(self) -> None:
+        """停止接收新的写任务，执行完已经排队的任务后停止后台任务。"""
+        self._closed = True
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            job, future = await self._queue.get()
+            try:
+                if future.cancelled():
+                    continue
+                try:
+                    async with self._session_factory() as session:
+                        result = await job(session)
+                        await session.commit()
+                except Exception as e:
+                    self.failed += 1
+                    if not future.cancelled():
+                        future.set_exception(e)
+                else:
+                    self.committed += 1
+                    if not future.cancelled():
+                        future.set_result(result)
+            finally:
+                self._queue.task_done()
+
+
+async def run_write(
+    session_factory: Callable[[], AsyncSession],
+    writer: Optional[DatabaseWriter],
+    job: WriteJob,
+) -> T:
+    """
+    执行一个写任务：配置了写入任务时交给它串行执行；
+    否则 (例如 Postgres 或测试) 直接在新会话中执行并提交。
+    """
+    if writer is not None:
+        return await writer.run(job)
+    async with session_factory() as session:
+        result = await job(session)
+        await session.commit()
+        return result
+
+
+class Database:
+    """
+    整个应用唯一的数据库引擎及其生命周期。
+
+    - 对 SQLite，每个连接建立时设置 `SqlitePragmas` (WAL、synchronous、mmap、缓存、busy_timeout)；
+    - 对 SQLite，连接池中保留 `reader_pool_size` 个读连接，外加一个留给写入任务的连接，
+      所有写操作都通过 `writer` 串行执行；
+    - 对 PostgreSQL，按 `PoolSettings` 配置连接池，数据库自己处理并发写入，`writer` 为 None；
+    - 应用退出时调用 `dispose`：先执行完排队中的写任务，再关闭所有连接。
+    """
+
+    def __init__(
+        self,
+        url: str,
+        echo: bool = False,
+        reader_pool_size: int = 4,
+        pragmas: Optional[SqlitePragmas] = None,
+        pool: Optional[PoolSettings] = None,
+    ):
+        self.url = url
+        self.is_sqlite = url.startswith("sqlite")
+        self.engine: AsyncEngine = create_async_engine(
+            url,
+            echo=echo,
+            **self._pool_options(reader_pool_size, pool or PoolSettings()),
+        )
+        if self.is_sqlite:
+            self.pragmas = pragmas or SqlitePragmas()
+            event.listen(self.engine.sync_engine, "connect", self._apply_pragmas)
+
+        self.session_factory = async_sessionmaker(
+            bind=self.engine,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+        self.writer = DatabaseWriter(self.session_factory) if self.is_sqlite else None
+
+    def _pool_options(self, reader_pool_size: int, pool: PoolSettings) -> dict:
+        if not self.is_sqlite:
+            return pool.engine_options()
+        # 内存数据库每个连接都是独立的数据库，使用 SQLAlchemy 默认的单连接池
+        if ":memory:" in self.url:
+            return {}
+        return {"pool_size": reader_pool_size + 1, "max_overflow": 0}
+
+    def _apply_pragmas(self, dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in self.pragmas.statements():
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    async def incremental_vacuum(self, max_pages: int = 0) -> int:
+        """
+        把空闲页 (删除数据后留下的) 归还给文件系统，让数据库文件变小。
+
+        作为普通写事务交给写入任务执行，每次最多回收 `max_pages` 页 (0 为全部)，
+        不会像完整的 VACUUM 那样重写整个文件、长时间锁住数据库。
+        只对 SQLite 且 auto_vacuum=INCREMENTAL 的数据库有效；PostgreSQL 由 autovacuum 负责。
+
+        Returns:
+            回收的页数。
+        """
+        if not self.is_sqlite:
+            return 0
+
+        async def vacuum(session: AsyncSession) -> int:
+            # 0 = NONE, 1 = FULL, 2 = INCREMENTAL
+            if (await session.execute(text("PRAGMA auto_vacuum"))).scalar() != 2:
+                logger.warning(
+                    "SQLite auto_vacuum is not INCREMENTAL; run a one-off VACUUM to enable incremental vacuuming."
+                )
+                return 0
+            before = (await session.execute(text("PRAGMA freelist_count"))).scalar()
+            # 每回收一页返回一个空行，必须取完所有结果才会执行完；SQLAlchemy 对没有列的结果不会去取，
+            # 所以直接在同一个连接的 aiosqlite 驱动上执行
+            raw = await (await session.connection()).get_raw_connection()
+            cursor = await raw.driver_connection.execute(f"PRAGMA incremental_vacuum({int(max_pages)})")
+            await cursor.fetchall()
+            await cursor.close()
+            after = (await session.execute(text("PRAGMA freelist_count"))).scalar()
+            return before - after
+
+        return await run_write(self.session_factory, self.writer, vacuum)
+
+    async def dispose(self) -> None:
+        if self.writer is not None:
+            await self.writer.close()
+        await self.engine.dispose()
+        logger.info("Database engine disposed.")
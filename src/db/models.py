@@ -2,11 +2,14 @@
 
 import datetime
 from sqlalchemy import (
+    DDL,
     BigInteger,
     DateTime,
     ForeignKey,
+    Index,
     String,
-    Text
+    Text,
+    event,
 )
 from sqlalchemy.orm import (
     DeclarativeBase,
@@ -61,7 +64,7 @@ class Event(Base):
     event_id: Mapped[int] = mapped_column(BigInteger, unique=True, nullable=False, index=True)
     
     # 事件类型，例如 'message', 'reaction_add'
-    event_type: Mapped[str] = mapped_column(String(50), nullable=False, index=True)
+    event_type: Mapped[str] = mapped_column(String(50), nullable=False)
     
     # 事件内容，使用 Text 类型以存储长文本
     content: Mapped[str] = mapped_column(Text, nullable=True)
@@ -82,5 +85,45 @@ class Event(Base):
     # 定义关系：一个 Event 属于一个 Member
     author: Mapped["Member"] = relationship("Member", back_populates="events")
 
+    # 复合索引：按频道、按用户、按服务器和事件类型取“最近的事件”时，
+    # 可以直接沿索引倒序读取，而不需要对整张表排序；
+    # (event_type, created_at) 同时用于按类型过滤，以及保留策略按类型找出过期的事件
+    __table_args__ = (
+        Index("ix_events_event_type_created_at", "event_type", "created_at"),
+        Index("ix_events_channel_id_created_at", "channel_id", "created_at"),
+        Index("ix_events_author_id_created_at", "author_id", "created_at"),
+        Index("ix_events_guild_id_event_type_created_at", "guild_id", "event_type", "created_at"),
+    )
+
     def __repr__(self) -> str:
-        return f"<Event(id={self.id}, type='{self.event_type}', author_id={self.author_id})>"
\ No newline at end of file
+        return f"<Event(id={self.id}, type='{self.event_type}', author_id={self.author_id})>"
+
+
+# 4. 事件内容的全文检索 (仅 SQLite)
+# FTS5 虚拟表 events_fts 以外部内容 (external content) 的方式索引 events.content，
+# 使用 trigram 分词：中文没有空格分词，按 3 个字符的滑动窗口建索引，任意长度 >= 3 的子串都能命中。
+# 三个触发器让它与 events 表保持同步。alembic/versions/0003 中有同样的语句，用于已有的数据库。
+EVENTS_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5("
+    "content, content='events', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS events_fts_ai AFTER INSERT ON events BEGIN "
+    "INSERT INTO events_fts(rowid, content) VALUES (new.id, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS events_fts_ad AFTER DELETE ON events BEGIN "
+    "INSERT INTO events_fts(events_fts, rowid, content) VALUES ('delete', old.id, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS events_fts_au AFTER UPDATE OF content ON events BEGIN "
+    "INSERT INTO events_fts(events_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+    "INSERT INTO events_fts(rowid, content) VALUES (new.id, new.content); END",
+)
+
+# 让 `Base.metadata.create_all` (测试、基准测试) 也创建全文检索表
+for _statement in EVENTS_FTS_DDL:
+    event.listen(Event.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+event.listen(
+    Event.__table__, "after_drop", DDL("DROP TABLE IF EXISTS events_fts").execute_if(dialect="sqlite")
+)
+# PostgreSQL 上的全文检索使用 pg_trgm 的函数和运算符 (索引由 alembic/versions/0003 创建)
+event.listen(
+    Event.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
@@ -1,14 +1,85 @@
 # src/db/repositories/event_repository.py
-from typing import Callable, Sequence, Optional
+import datetime
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List, NamedTuple, Sequence, Optional
+from sqlalchemy import and_, column, delete, func, literal_column, or_, table, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from db.models import Event
+from db.models import Event, Member
+from ..database import DatabaseWriter, WriteJob, run_write
+
+# 支持 INSERT ... ON CONFLICT DO NOTHING 的数据库方言
+_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+class EventCursor(NamedTuple):
+    """分页游标：上一页最后 (最旧) 一个事件的 (created_at, id)。"""
+
+    created_at: datetime.datetime
+    id: int
+
+
+@dataclass
+class EventPage:
+    """一页事件 (从新到旧)，以及获取下一页 (更旧的事件) 的游标；没有更多事件时游标为 None。"""
+
+    events: List[Event]
+    next_cursor: Optional[EventCursor]
+
+
+@dataclass
+class EventSearchResult:
+    """一条全文检索结果。score 越大越相关 (SQLite 为 BM25 取负，PostgreSQL 为 trigram 相似度)。"""
+
+    event: Event
+    score: float
+
+
+# FTS5 trigram 分词器只能索引长度 >= 3 的子串，更短的搜索词退化为 LIKE 匹配
+_TRIGRAM = 3
+# “任意匹配”模式下，一次查询最多使用的 trigram 数量，避免长消息生成过大的 MATCH 表达式
+_MAX_QUERY_TRIGRAMS = 64
+# PostgreSQL 上“任意匹配”的 word_similarity 阈值：搜索内容中约十分之一以上的 trigram
+# 连续地出现在事件内容中即视为命中 (pg_trgm 的默认值 0.6 只适合拼写纠错)
+_PG_WORD_SIMILARITY_THRESHOLD = 0.1
+
+_events_fts = table("events_fts", column("rowid"))
+
+
+def _fts_phrase(text: str) -> str:
+    """把搜索词包成 FTS5 短语，避免其中的引号、括号、AND/OR 等被当作查询语法。"""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _trigrams(terms: Sequence[str]) -> List[str]:
+    grams = dict.fromkeys(
+        term[i:i + _TRIGRAM] for term in terms for i in range(len(term) - _TRIGRAM + 1)
+    )
+    return list(grams)[:_MAX_QUERY_TRIGRAMS]
+
 
 class EventRepository:
     """封装了所有与 Event 模型相关的数据库操作。"""
-    def __init__(self, session_factory: Callable[[], AsyncSession]):
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        writer: Optional[DatabaseWriter] = None,
+    ):
+        """
+        Args:
+            session_factory: 数据库会话工厂，读操作直接使用。
+            writer: 串行写入任务 (SQLite)；为 None 时写操作也直接在新会话中执行。
+        """
         self._session_factory = session_factory
+        self._writer = writer
+
+    async def _write(self, job: WriteJob):
+        return await run_write(self._session_factory, self._writer, job)
 
     async def create_event(
         self, 
@@ -26,14 +97,73 @@ class EventRepository:
             author_id=author_id,
             content=content,
             channel_id=channel_id,
-            guild_id=guild_id
+            guild_id=guild_id,
+            # 与 EventWriter 一样在 Python 中取时间，而不使用数据库的默认值：SQLite 的 CURRENT_TIMESTAMP
+            # 存成不带微秒的 "YYYY-MM-DD HH:MM:SS"，按字符串与游标 ("...:SS.000000") 比较时顺序不对，
+            # 分页会反复返回同一秒内的事件
+            created_at=datetime.datetime.now(datetime.timezone.utc),
         )
-        async with self._session_factory() as session:
+
+        async def insert(session: AsyncSession) -> Event:
             session.add(new_event)
-            await session.commit()
+            await session.flush()
+            # 取回 id、created_at 等由数据库生成的字段
             await session.refresh(new_event)
             return new_event
 
+        return await self._write(insert)
+
+    async def create_many(
+        self,
+        events: Sequence[Dict[str, Any]],
+        authors: Sequence[Dict[str, Any]] = (),
+    ) -> int:
+        """
+        在一个事务中批量写入事件，用于高频的消息记录。
+
+        - `events` 中每一项是 Event 的列值 (event_id, event_type, author_id, content, ...)；
+        - `authors` 是这些事件的作者 (id, name, display_name)，库中还没有的作者会先被插入，
+          以满足 author_id 的外键约束；已存在的作者保持不变；
+        - 已经记录过的 event_id (例如网关重复投递) 会被忽略。
+
+        两者都用一条 executemany 语句写入，不会逐条 refresh。
+
+        Returns:
+            本次提交的事件数量 (包括被忽略的重复事件)。
+        """
+        if not events:
+            return 0
+
+        async def insert_many(session: AsyncSession) -> int:
+            insert = _INSERTS[session.get_bind().dialect.name]
+            if authors:
+                await session.execute(
+                    insert(Member.__table__).on_conflict_do_nothing(index_elements=["id"]),
+                    list(authors),
+                )
+            await session.execute(
+                insert(Event.__table__).on_conflict_do_nothing(index_elements=["event_id"]),
+                list(events),
+            )
+            return len(events)
+
+        return await self._write(insert_many)
+
+    async def stream_events(self, batch_size: int = 5000) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        按 id 顺序分批读出所有事件的完整记录。
+        使用服务端游标 (stream + yield_per)，无论表有多大，内存中最多只有一批。
+        """
+        async with self._session_factory() as session:
+            stmt = (
+                select(*Event.__table__.c)
+                .order_by(Event.id)
+                .execution_options(yield_per=batch_size)
+            )
+            result = await session.stream(stmt)
+            async for partition in result.mappings().partitions():
+                yield [dict(row) for row in partition]
+
     async def get_recent_dialogue_events(self, limit: int = 10) -> Sequence[Event]:
         """获取最近的对话事件，用于构建上下文。"""
         async with self._session_factory() as session:
@@ -46,4 +176,213 @@ class EventRepository:
             result = await session.execute(stmt)
             # 返回的是一个序列，我们需要反转它，让最早的在前面
             events = result.scalars().all()
-            return events[::-1]
\ No newline at end of file
+            return events[::-1]
+
+    async def get_channel_events(
+        self,
+        channel_id: int,
+        limit: int = 50,
+        before: Optional[EventCursor] = None,
+        event_type: Optional[str] = None,
+    ) -> EventPage:
+        """获取某个频道最近的事件，按时间从新到旧分页。使用 (channel_id, created_at) 索引。"""
+        return await self._page([Event.channel_id == channel_id], limit, before, event_type)
+
+    async def get_user_events(
+        self,
+        author_id: int,
+        limit: int = 50,
+        before: Optional[EventCursor] = None,
+        event_type: Optional[str] = None,
+    ) -> EventPage:
+        """获取某个用户最近的事件，按时间从新到旧分页。使用 (author_id, created_at) 索引。"""
+        return await self._page([Event.author_id == author_id], limit, before, event_type)
+
+    async def get_guild_events(
+        self,
+        guild_id: int,
+        event_type: str,
+        limit: int = 50,
+        before: Optional[EventCursor] = None,
+    ) -> EventPage:
+        """获取某个服务器中某种类型最近的事件，按时间从新到旧分页。使用 (guild_id, event_type, created_at) 索引。"""
+        return await self._page([Event.guild_id == guild_id], limit, before, event_type)
+
+    async def _page(
+        self,
+        filters: list,
+        limit: int,
+        before: Optional[EventCursor],
+        event_type: Optional[str],
+    ) -> EventPage:
+        """
+        键集 (keyset) 分页：用上一页最后一个事件的 (created_at, id) 作为游标，
+        下一页只取严格早于它的事件。与 OFFSET 不同，翻到再深的页也只需沿索引读取 `limit` 行，
+        并且翻页期间有新事件写入也不会出现重复或遗漏。id 用于区分同一时刻的多个事件。
+        """
+        if event_type is not None:
+            filters = [*filters, Event.event_type == event_type]
+        if before is not None:
+            filters = [*filters, tuple_(Event.created_at, Event.id) < tuple_(before.created_at, before.id)]
+
+        async with self._session_factory() as session:
+            stmt = (
+                select(Event)
+                .where(*filters)
+                .order_by(Event.created_at.desc(), Event.id.desc())
+                # 多取一行，用来判断是否还有下一页
+                .limit(limit + 1)
+            )
+            events = list((await session.execute(stmt)).scalars().all())
+
+        next_cursor = None
+        if len(events) > limit:
+            events = events[:limit]
+            last = events[-1]
+            next_cursor = EventCursor(last.created_at, last.id)
+        return EventPage(events=events, next_cursor=next_cursor)
+
+    async def get_expired_events(
+        self,
+        cutoff: datetime.datetime,
+        limit: int = 1000,
+        after: Optional[EventCursor] = None,
+        event_type: Optional[str] = None,
+        exclude_types: Sequence[str] = (),
+    ) -> List[Event]:
+        """
+        按时间从旧到新取出一批早于 `cutoff` 的事件，供保留策略归档和删除。
+
+        - 指定 `event_type` 时只取这种类型，沿 (event_type, created_at) 索引读取；
+        - 否则取 `exclude_types` 以外的所有类型 (没有单独设置保留期限的类型)；
+        - `after` 是上一批最后一个事件的 (created_at, id)，与分页查询一样按键集继续读取。
+        """
+        filters = [Event.created_at < cutoff]
+        if event_type is not None:
+            filters.append(Event.event_type == event_type)
+        elif exclude_types:
+            filters.append(Event.event_type.not_in(exclude_types))
+        if after is not None:
+            filters.append(tuple_(Event.created_at, Event.id) > tuple_(after.created_at, after.id))
+
+        async with self._session_factory() as session:
+            stmt = (
+                select(Event)
+                .where(*filters)
+                .order_by(Event.created_at, Event.id)
+                .limit(limit)
+            )
+            return list((await session.execute(stmt)).scalars().all())
+
+    async def delete_events(self, ids: Sequence[int]) -> int:
+        """在一个事务中按主键删除一批事件 (全文索引由触发器同步删除)，返回删除的数量。"""
+        if not ids:
+            return 0
+
+        async def delete_batch(session: AsyncSession) -> int:
+            result = await session.execute(
+                delete(Event).where(Event.id.in_(ids)).execution_options(synchronize_session=False)
+            )
+            return result.rowcount
+
+        return await self._write(delete_batch)
+
+    async def search_events(
+        self,
+        query: str,
+        limit: int = 20,
+        guild_id: Optional[int] = None,
+        channel_id: Optional[int] = None,
+        author_id: Optional[int] = None,
+        event_type: Optional[str] = None,
+        match_any: bool = False,
+    ) -> List[EventSearchResult]:
+        """
+        在事件内容中全文检索，按相关度从高到低返回。
+
+        - 搜索词按空白切分。默认 (`match_any=False`) 要求每个搜索词都出现在内容中；
+        - `match_any=True` 时把搜索词拆成 trigram，命中任意一个即可，按 BM25 排序，
+          命中的 (越罕见的) trigram 越多越靠前，适合用一整句中文话去找相关的历史对话；
+        - 可以按服务器、频道、作者和事件类型过滤。
+
+        SQLite 上使用 FTS5 (events_fts)。PostgreSQL 上使用 pg_trgm 的 GIN 索引：默认模式为 ILIKE 子串匹配，
+        按相似度排序；`match_any=True` 时用 `%>` (word_similarity) 运算符，按 word_similarity 排序。
+        pg_trgm 只在数据库的 LC_CTYPE 不是 C 时 (例如 en_US.UTF-8) 才把中文视为单词字符。
+        """
+        terms = query.split()
+        if not terms:
+            return []
+
+        filters = []
+        if guild_id is not None:
+            filters.append(Event.guild_id == guild_id)
+        if channel_id is not None:
+            filters.append(Event.channel_id == channel_id)
+        if author_id is not None:
+            filters.append(Event.author_id == author_id)
+        if event_type is not None:
+            filters.append(Event.event_type == event_type)
+
+        async with self._session_factory() as session:
+            if session.get_bind().dialect.name == "sqlite":
+                stmt = self._sqlite_search(terms, filters, match_any)
+            else:
+                if match_any:
+                    # 只在当前事务中调低 `%>` 运算符的阈值
+                    await session.execute(
+                        select(
+                            func.set_config(
+                                "pg_trgm.word_similarity_threshold", str(_PG_WORD_SIMILARITY_THRESHOLD), True
+                            )
+                        )
+                    )
+                stmt = self._postgres_search(query, terms, filters, match_any)
+            rows = (await session.execute(stmt.limit(limit))).all()
+        return [EventSearchResult(event=event, score=float(score)) for event, score in rows]
+
+    @staticmethod
+    def _postgres_search(query: str, terms: List[str], filters: list, match_any: bool):
+        if match_any:
+            # 与 SQLite 的 trigram 任意匹配对应：一整句中文只是一个“单词”，不能按空白切分后做子串匹配
+            score = func.word_similarity(query, Event.content)
+            return (
+                select(Event, score)
+                .where(Event.content.op("%>")(query), *filters)
+                .order_by(score.desc())
+            )
+        score = func.similarity(Event.content, query)
+        return (
+            select(Event, score)
+            .where(and_(*(Event.content.icontains(t, autoescape=True) for t in terms)), *filters)
+            .order_by(score.desc())
+        )
+
+    @staticmethod
+    def _sqlite_search(terms: List[str], filters: list, match_any: bool):
+        long_terms = [t for t in terms if len(t) >= _TRIGRAM]
+        short_terms = [t for t in terms if len(t) < _TRIGRAM]
+
+        if match_any:
+            match = " OR ".join(_fts_phrase(g) for g in _trigrams(long_terms))
+            if not match:
+                filters = [*filters, or_(*(Event.content.contains(t, autoescape=True) for t in short_terms))]
+        else:
+            match = " AND ".join(_fts_phrase(t) for t in long_terms)
+            filters = [*filters, *(Event.content.contains(t, autoescape=True) for t in short_terms)]
+
+        if not match:
+            # 只有过短的搜索词：无法使用 FTS 索引，按时间倒序返回 LIKE 匹配的结果
+            return (
+                select(Event, literal_column("0.0"))
+                .where(*filters)
+                .order_by(Event.created_at.desc(), Event.id.desc())
+            )
+
+        # bm25() 越小越相关，取负数作为分数
+        rank = func.bm25(literal_column("events_fts"))
+        return (
+            select(Event, -rank)
+            .join(_events_fts, _events_fts.c.rowid == Event.id)
+            .where(literal_column("events_fts").op("MATCH")(match), *filters)
+            .order_by(rank)
+        )
@@ -1,14 +1,49 @@
 # src/db/repositories/member_repository.py
-from typing import Callable, Optional
+import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import or_
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
 from db.models import Member
+from ..database import DatabaseWriter, WriteJob, run_write
+
+# 支持 INSERT ... ON CONFLICT DO UPDATE ... RETURNING 的数据库方言
+_UPSERT_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def _as_utc_naive(value: datetime.datetime) -> datetime.datetime:
+    """统一成不带时区的 UTC 时间再比较 (SQLite 取回的时间不带时区，Postgres 带时区)。"""
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return value
+
+
+# (Discord ID, name, display_name)
+MemberSnapshot = Tuple[int, str, Optional[str]]
+
 
 class MemberRepository:
     """封装了所有与 Member 模型相关的数据库操作。"""
-    def __init__(self, session_factory: Callable[[], AsyncSession]):
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        writer: Optional[DatabaseWriter] = None,
+    ):
+        """
+        Args:
+            session_factory: 数据库会话工厂，读操作直接使用。
+            writer: 串行写入任务 (SQLite)；为 None 时写操作也直接在新会话中执行。
+        """
         self._session_factory = session_factory
+        self._writer = writer
+
+    async def _write(self, job: WriteJob):
+        return await run_write(self._session_factory, self._writer, job)
 
     async def get_by_id(self, member_id: int) -> Optional[Member]:
         """通过 Discord ID 获取成员。"""
@@ -22,30 +57,143 @@ class MemberRepository:
         获取一个成员，如果不存在则创建。
         如果存在，则更新其 name 和 display_name (如果发生了变化)。
         返回 (成员对象，是否是新创建的布尔值)。
+
+        1. 先读一次：绝大多数 @ 来自信息没有变化的老成员，一次只读查询即可返回；
+        2. 需要写入时，用单条 `INSERT ... ON CONFLICT DO UPDATE ... WHERE 有变化 ... RETURNING`
+           原子地完成插入或更新并带回整行，不需要再 refresh。并发的首次 @ 也不会因为主键冲突而失败。
+           配置了写入任务时，这条语句交给它串行执行。
+        """
+        async with self._session_factory() as session:
+            member = (
+                await session.execute(select(Member).where(Member.id == member_id))
+            ).scalar_one_or_none()
+        if member is not None and member.name == name and member.display_name == display_name:
+            return member, False
+
+        # 用同一个 Python 时间戳作为新行的 created_at 和更新时的 updated_at：
+        # 返回的 created_at 等于它，说明这一行是刚插入的
+        now = datetime.datetime.now(datetime.timezone.utc)
+
+        async def upsert(session: AsyncSession):
+            insert = _UPSERT_INSERTS[session.get_bind().dialect.name]
+            table = Member.__table__
+            stmt = insert(table).values(
+                id=member_id,
+                name=name,
+                display_name=display_name,
+                created_at=now,
+                updated_at=now,
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.id],
+                set_={
+                    "name": stmt.excluded.name,
+                    "display_name": stmt.excluded.display_name,
+                    "updated_at": stmt.excluded.updated_at,
+                },
+                # 只在信息真正变化时才写入 (并发请求可能已经写入了相同的信息)
+                where=or_(
+                    table.c.name != stmt.excluded.name,
+                    table.c.display_name.is_distinct_from(stmt.excluded.display_name),
+                ),
+            ).returning(*table.c)
+            return (await session.execute(stmt)).mappings().first()
+
+        row = await self._write(upsert)
+        if row is None:
+            # 并发请求抢先写入了相同的信息，冲突时没有更新，也就没有返回行
+            return await self.get_by_id(member_id), False
+
+        was_created = _as_utc_naive(row["created_at"]) == _as_utc_naive(now)
+        # 直接用 RETURNING 带回的整行构造对象，省去提交后的 refresh
+        return Member(**row), was_created
+
+    async def sync_many(self, members: Sequence[MemberSnapshot]) -> int:
+        """
+        批量同步一批成员，只写入新成员和名字发生变化的成员。
+
+        先用一次 `IN` 查询取回这批成员在库中的名字，在内存中比较出差异，
+        再用一条 executemany 的 `INSERT ... ON CONFLICT DO UPDATE` 在一个写事务中写入差异。
+        没有任何变化时不会产生写事务。
+
+        Returns:
+            实际写入 (新建或更新) 的成员数量。
+        """
+        if not members:
+            return 0
+
+        async with self._session_factory() as session:
+            result = await session.execute(
+                select(Member.id, Member.name, Member.display_name).where(
+                    Member.id.in_([member_id for member_id, _, _ in members])
+                )
+            )
+            existing = {row.id: (row.name, row.display_name) for row in result}
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        changed = {
+            member_id: {
+                "id": member_id,
+                "name": name,
+                "display_name": display_name,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for member_id, name, display_name in members
+            if existing.get(member_id) != (name, display_name)
+        }
+        if not changed:
+            return 0
+
+        async def upsert_many(session: AsyncSession):
+            insert = _UPSERT_INSERTS[session.get_bind().dialect.name]
+            table = Member.__table__
+            stmt = insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.id],
+                set_={
+                    "name": stmt.excluded.name,
+                    "display_name": stmt.excluded.display_name,
+                    "updated_at": stmt.excluded.updated_at,
+                },
+            )
+            await session.execute(stmt, list(changed.values()))
+
+        await self._write(upsert_many)
+        return len(changed)
+
+    async def create_many(self, members: Sequence[Dict[str, Any]]) -> int:
+        """
+        在一个事务中批量写入成员的完整记录 (包括 created_at / updated_at)，用于导入数据。
+        已经存在的成员保持不变，因此重复导入同一批数据是安全的。
+
+        Returns:
+            本次提交的成员数量 (包括被忽略的已有成员)。
+        """
+        if not members:
+            return 0
+
+        async def insert_many(session: AsyncSession) -> int:
+            insert = _UPSERT_INSERTS[session.get_bind().dialect.name]
+            await session.execute(
+                insert(Member.__table__).on_conflict_do_nothing(index_elements=["id"]),
+                list(members),
+            )
+            return len(members)
+
+        return await self._write(insert_many)
+
+    async def stream_members(self, batch_size: int = 5000) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        按 id 顺序分批读出所有成员的完整记录。
+        使用服务端游标 (stream + yield_per)，无论表有多大，内存中最多只有一批。
         """
         async with self._session_factory() as session:
-            # 尝试获取成员
-            member = await self.get_by_id(member_id)
-            
-            if member:
-                # 如果成员存在，检查是否需要更新信息
-                needs_update = False
-                if member.name != name:
-                    member.name = name
-                    needs_update = True
-                if member.display_name != display_name:
-                    member.display_name = display_name
-                    needs_update = True
-                
-                if needs_update:
-                    session.add(member)
-                    await session.commit()
-                    await session.refresh(member)
-                return member, False
-            
-            # 如果成员不存在，则创建
-            new_member = Member(id=member_id, name=name, display_name=display_name)
-            session.add(new_member)
-            await session.commit()
-            await session.refresh(new_member)
-            return new_member, True
\ No newline at end of file
+            stmt = (
+                select(*Member.__table__.c)
+                .order_by(Member.id)
+                .execution_options(yield_per=batch_size)
+            )
+            result = await session.stream(stmt)
+            async for partition in result.mappings().partitions():
+                yield [dict(row) for row in partition]
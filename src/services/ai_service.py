@@ -1,12 +1,48 @@
+import asyncio
+import logging
+import random
 import discord
-from typing import Dict, Any
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Dict, Any, List, Optional, Sequence, TypeVar
 
 # 导入相关的服务和模型
 from .member_service import MemberService
 from .memory.abstract_memory_service import AbstractMemoryService
-from .gemini_client import GeminiClient
+from .llm.abstract_llm_client import AbstractLLMClient
+from .format_cache import FormattedMessageCache
+from .llm_scheduler import LLMScheduler
+from .message_buffer import ChannelMessageBuffer
+from .prompt_assembler import MessageParts, PromptAssembler
+from .response_cache import ResponseCache
+from .single_flight import SingleFlight
 from ..core.character_manager import CharacterManager
 from ..core.character_model import Character
+from ..core.prompt_template import compile_character_prompt, format_example_dialogue
+from ..core.tracing import RequestTracer, current_trace, span
+from ..db.models import Member
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 短期记忆 (聊天历史) 包含的消息条数
+HISTORY_LIMIT = 10
+
+
+@dataclass
+class ContextTimeouts:
+    """
+    收集上下文的时间预算 (秒)。
+
+    成员、历史和记忆三个阶段并发执行，每个阶段的超时取自身超时与总截止时间中较小的一个；
+    超时或出错的阶段使用降级结果，而不是拖慢整个回复。
+    """
+
+    deadline: float = 3.0
+    member: float = 1.0
+    history: float = 2.0
+    memories: float = 2.0
 
 
 class AIService:
@@ -17,10 +53,20 @@ class AIService:
 
     def __init__(
         self,
-        llm_client: GeminiClient,
+        llm_client: AbstractLLMClient,
         character_manager: CharacterManager,
         member_service: MemberService,
         memory_service: AbstractMemoryService,
+        prompt_assembler: Optional[PromptAssembler] = None,
+        llm_scheduler: Optional[LLMScheduler] = None,
+        response_cache: Optional[ResponseCache] = None,
+        single_flight: Optional[SingleFlight] = None,
+        tracer: Optional[RequestTracer] = None,
+        prompt_log_sample_rate: float = 0.0,
+        prompt_log_max_chars: int = 4000,
+        context_timeouts: Optional[ContextTimeouts] = None,
+        message_buffer: Optional[ChannelMessageBuffer] = None,
+        format_cache: Optional[FormattedMessageCache] = None,
     ):
         """
         初始化 AI 服务。
@@ -30,27 +76,47 @@ class AIService:
             character_manager: 管理 AI 角色的加载和信息。
             member_service: 管理用户信息。
             memory_service: 管理 AI 的长期和短期记忆。
+            prompt_assembler: 按 token 预算裁剪上下文的组装器，为空时使用默认预算。
+            llm_scheduler: 限制 LLM 并发并公平排队的调度器，为空时不做限制。
+            response_cache: (可选) 重复问题的语义响应缓存，为空时不缓存。
+            single_flight: (可选) 在途请求去重器，完全相同的 prompt 的并发请求只调用一次 LLM
+                (prompt 包含提问者的信息，不同用户的请求不会合并)。
+            tracer: (可选) 分阶段计时器；直接调用 generate_response 时用它记录慢请求。
+            prompt_log_sample_rate: 以 DEBUG 级别记录完整 prompt 的采样比例 (0~1)。
+            prompt_log_max_chars: 记录 prompt 时的最大字符数，超出部分被截断。
+            context_timeouts: 收集上下文各阶段的超时和总截止时间，为空时使用默认值。
+            message_buffer: (可选) 本地的频道消息缓冲区，优先从这里读取聊天历史。
+            format_cache: 历史消息格式化结果的缓存，为空时创建一个仅供本实例使用的缓存。
         """
         self.llm_client = llm_client
         self.character_manager = character_manager
         self.member_service = member_service
         self.memory_service = memory_service
+        self.prompt_assembler = prompt_assembler or PromptAssembler()
+        self.llm_scheduler = llm_scheduler
+        self.response_cache = response_cache
+        self.single_flight = single_flight
+        self.tracer = tracer or RequestTracer()
+        self.prompt_log_sample_rate = prompt_log_sample_rate
+        self.prompt_log_max_chars = prompt_log_max_chars
+        self._prompt_log_rng = random.Random()
+        self.context_timeouts = context_timeouts or ContextTimeouts()
+        # 各阶段因超时或出错而降级的次数
+        self.context_fallbacks: Dict[str, int] = {}
+        self.message_buffer = message_buffer
+        self.format_cache = format_cache or FormattedMessageCache()
         self.active_character: Character | None = None
 
     async def _load_active_character(self):
-        """如果当前没有激活的角色，则加载默认角色。"""
-        if self.active_character is None:
-            # 确保在需要时角色信息已经被加载
+        """加载默认角色。"""
+        # CharacterManager 自带内存缓存和热更新，每次都向它要最新的角色卡，
+        # 这样长期存活的 AIService 实例也能拿到修改后的角色卡。
+        with span("character"):
             self.active_character = await self.character_manager.load_character("GO")
 
     def _format_example_dialogue(self, character: Character) -> str:
         """格式化角色的示例对话，用于构建 few-shot prompt。"""
-        return "\n".join(
-            [
-                f"User: {ex.user}\n{character.name}: {ex.bot}"
-                for ex in character.example_dialogue
-            ]
-        )
+        return format_example_dialogue(character)
 
     # =================================================================================
     # ✨ [核心升级] 新增的辅助函数，用于深度解析 Discord 消息 ✨
@@ -66,6 +132,23 @@ class AIService:
         Returns:
             一个格式化后的字符串，准备好被送入 LLM。
         """
+        # 同一条消息 (同一个编辑版本) 只格式化一次
+        text = self.format_cache.get(message)
+        if text is None:
+            text = self._extract_message_parts(message).render()
+            self.format_cache.put(message, text)
+        return text
+
+    def _extract_message_parts(self, message: discord.Message) -> MessageParts:
+        """
+        提取消息中需要送入 LLM 的各个部分 (作者、正文、embed)。
+
+        Args:
+            message: 来自 discord.py 的消息对象。
+
+        Returns:
+            一个 MessageParts 对象，正文和 embed 分开保存，便于按预算裁剪。
+        """
         # 优先使用服务器昵称 (display_name)，如果不在服务器中则使用用户名
         author_name = message.author.display_name
 
@@ -110,53 +193,116 @@ class AIService:
                 # 将这个 embed 的所有部分合并成一个字符串
                 embed_texts.append("\n".join(single_embed_parts))
 
-        # --- 组合最终输出 ---
-        final_message_parts = []
-        # 只有在文本内容确实存在时才添加
-        if content_text:
-            final_message_parts.append(content_text)
-        # 如果有解析出的 embed 文本，也添加进来
-        if embed_texts:
-            # 使用分隔符，以防一条消息有多个 embed
-            final_message_parts.append("\n---\n".join(embed_texts))
-
-        # 如果消息既没有文本也没有可解析的 embed（例如，只有文件附件），提供一个默认文本
-        if not final_message_parts:
-            return f"{author_name}: [发送了一个空消息或仅包含附件]"
+        return MessageParts(
+            author_name=author_name, content_text=content_text, embed_texts=embed_texts
+        )
 
-        # 最终格式："作者：文本内容\n<格式化后的 embeds>"
-        return f"{author_name}: {'\n'.join(final_message_parts)}"
+    def _merge_message_parts(self, messages: Sequence[discord.Message]) -> MessageParts:
+        """
+        把同一用户连续发送的几条消息合并成一个输入：正文按顺序换行拼接，embed 依次排列。
+        作者名取自最后一条消息。
+        """
+        parts = [self._extract_message_parts(m) for m in messages]
+        if len(parts) == 1:
+            return parts[0]
+        return MessageParts(
+            author_name=parts[-1].author_name,
+            content_text="\n".join(p.content_text for p in parts if p.content_text),
+            embed_texts=[text for p in parts for text in p.embed_texts],
+        )
 
     # =================================================================================
     # ✨ [核心升级] 重构上下文获取逻辑 ✨
     # =================================================================================
-    async def _gather_context(self, message: discord.Message) -> Dict[str, Any]:
+    async def _gather_context(
+        self, message: discord.Message, preceding: Sequence[discord.Message] = ()
+    ) -> Dict[str, Any]:
         """
         收集并构建用于生成响应的所有上下文信息。
         这包括用户信息、短期记忆 (最近的聊天记录) 和长期记忆。
+        这里只收集原始材料，按 token 预算裁剪由 PromptAssembler 负责。
 
         Args:
             message: 用户当前发送的消息对象。
+            preceding: 同一用户紧接在 `message` 之前发送、与它合并回复的消息 (从旧到新)。
 
         Returns:
             一个包含所有上下文信息的字典。
         """
-        # 获取用户信息
-        member = await self.member_service.get_or_create_member(message.author)
+        batch = [*preceding, message]
+        # 聊天历史取第一条合并消息之前的记录，避免合并的消息在历史中重复出现
+        first = batch[0]
+        current_input = self._merge_message_parts(batch)
+        # 三个阶段互不依赖，并发执行；任何一个慢了只会让上下文变短，不会拖慢整个回复
+        timeouts = self.context_timeouts
+        member, history_formatted, long_term_memories_list = await asyncio.gather(
+            self._run_context_stage(
+                "member",
+                lambda: self.member_service.get_or_create_member(message.author),
+                timeouts.member,
+                # 降级：使用只在内存中存在的成员对象，不写数据库
+                fallback=lambda: Member(
+                    id=message.author.id,
+                    name=message.author.name,
+                    display_name=message.author.display_name,
+                ),
+                # 成员写入在超时后继续在后台完成，避免把数据库事务中途取消
+                shield=True,
+            ),
+            self._run_context_stage(
+                "history",
+                lambda: self._fetch_history(first),
+                timeouts.history,
+                fallback=list,  # 降级：没有聊天历史
+            ),
+            self._run_context_stage(
+                "memories",
+                lambda: self.memory_service.retrieve_relevant_memories(
+                    message.author.id,
+                    "\n".join(q for q in map(self._memory_query, batch) if q),
+                    guild_id=message.guild.id if message.guild else None,
+                ),
+                timeouts.memories,
+                fallback=list,  # 降级：没有长期记忆 (prompt 中显示“无相关记忆”)
+            ),
+        )
         user_info = f"User '{member.name}' (ID: {member.id}, Display Name: {message.author.display_name})"
 
-        # --- 短期记忆 (聊天历史) ---
-        # 使用 `before=message` 可以精确获取此消息之前的历史，避免重复
-        history_iterator = message.channel.history(limit=10, before=message)
+        return {
+            "user_info": user_info,
+            "history": history_formatted,  # 从旧到新
+            "memories": long_term_memories_list or [],  # 按相关度从高到低
+            # 当前输入的正文和 embed 分开保存，预算不足时可以只截断 embed
+            "current_input": current_input,
+        }
+
+    async def _fetch_history(self, message: discord.Message) -> List[str]:
+        """获取短期记忆 (当前消息之前的最近 10 条聊天记录)，按从旧到新的顺序返回。"""
+        history_messages = None
+        if self.message_buffer is not None:
+            # 优先读取本地缓冲区，省去一次 Discord REST 请求
+            history_messages = self.message_buffer.recent(
+                message.channel.id, before=message, limit=HISTORY_LIMIT
+            )
+        if history_messages is None:
+            # 冷启动或缓冲区有缺口：回退到 REST 请求。
+            # 使用 `before=message` 可以精确获取此消息之前的历史，避免重复
+            history_iterator = message.channel.history(limit=HISTORY_LIMIT, before=message)
+            history_messages = [msg async for msg in history_iterator]
+            if self.message_buffer is not None:
+                self.message_buffer.seed(
+                    message.channel.id, history_messages, before=message, limit=HISTORY_LIMIT
+                )
+
         # 调用新的辅助函数来格式化每一条历史消息
-        history_formatted = [
-            self._format_message_for_llm(msg) async for msg in history_iterator
-        ]
+        history_formatted = [self._format_message_for_llm(msg) for msg in history_messages]
         # history API 返回的是从新到旧的消息，我们需要反转它以符合对话的时间顺序
-        short_term_memory = "\n".join(reversed(history_formatted))
+        history_formatted.reverse()
+        return history_formatted
 
-        # --- 长期记忆检索 ---
-        # 为了进行有效的记忆检索，我们需要一个简洁的查询字符串
+    @staticmethod
+    def _memory_query(message: discord.Message) -> str:
+        """为长期记忆检索构造一个简洁的查询字符串。"""
         # 优先使用消息的文本内容
         query_for_memory = message.clean_content.strip()
         # 如果文本为空（例如，用户只发了一张图），则尝试使用 embed 的描述或标题作为查询
@@ -169,65 +315,271 @@ class AIService:
             else:
                 # 如果都没有，给一个通用描述
                 query_for_memory = "用户发送的嵌入式内容"
+        return query_for_memory
 
-        long_term_memories_list = await self.memory_service.retrieve_relevant_memories(
-            member.id, query_for_memory
-        )
-        long_term_memory = (
-            "\n".join([f"- {mem}" for mem in long_term_memories_list])
-            if long_term_memories_list
-            else "无相关记忆"
-        )
-
-        # --- 当前输入 ---
-        # 同样使用新的辅助函数来格式化当前用户输入的消息
-        current_input_formatted = self._format_message_for_llm(message)
-
-        return {
-            "user_info": user_info,
-            "short_term_memory": short_term_memory,
-            "long_term_memory": long_term_memory,
-            "current_input": current_input_formatted,  # 使用格式化后的完整内容
-        }
+    async def _run_context_stage(
+        self,
+        name: str,
+        stage: Callable[[], Awaitable[T]],
+        timeout: float,
+        fallback: Callable[[], T],
+        shield: bool = False,
+    ) -> T:
+        """
+        在时间预算内执行一个收集上下文的阶段；超时或出错时记录日志并返回降级结果。
 
-    async def generate_response(self, message: discord.Message) -> str:
+        Args:
+            name: 阶段名称，用于计时和日志。
+            stage: 返回该阶段协程的函数。
+            timeout: 该阶段自身的超时 (秒)，实际超时不会超过总截止时间。
+            fallback: 生成降级结果的函数。
+            shield: 超时后是否让该阶段在后台继续执行完 (而不是取消它)。
         """
-        生成 AI 的最终响应。
+        timeout = min(timeout, self.context_timeouts.deadline)
+        with span(name):
+            task = asyncio.ensure_future(stage())
+            try:
+                return await asyncio.wait_for(
+                    asyncio.shield(task) if shield else task, timeout
+                )
+            except asyncio.TimeoutError:
+                logger.warning(
+                    f"Context stage '{name}' timed out after {timeout:.2f}s, using fallback."
+                )
+                if shield:
+                    task.add_done_callback(self._log_background_stage_error)
+            except Exception as e:
+                logger.warning(
+                    f"Context stage '{name}' failed, using fallback: {e}", exc_info=True
+                )
+        self.context_fallbacks[name] = self.context_fallbacks.get(name, 0) + 1
+        return fallback()
+
+    @staticmethod
+    def _log_background_stage_error(task: asyncio.Future) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(
+                f"Context stage finished with an error in the background: {task.exception()}"
+            )
+
+    async def _build_prompt(
+        self, message: discord.Message, preceding: Sequence[discord.Message] = ()
+    ) -> str:
+        """
+        构建发送给 LLM 的最终 prompt。
 
-        这个方法是整个流程的协调者：
         1. 加载角色。
         2. 收集上下文。
-        3. 构建最终的 prompt。
-        4. 调用 LLM 客户端获取响应。
+        3. 按 token 预算裁剪上下文，填充预编译模板。
 
         Args:
             message: 用户发送的原始消息对象。
+            preceding: 与 `message` 合并回复的、同一用户之前发送的消息。
 
         Returns:
-            一个由 LLM 生成的字符串响应。
+            最终的 prompt 字符串。
         """
         # 确保角色已加载
         await self._load_active_character()
         character = self.active_character
 
         # 收集所有上下文信息
-        context = await self._gather_context(message)
-
-        # 使用模板和收集到的上下文，构建最终要发送给 LLM 的 prompt
-        final_prompt = character.main_chat_prompt_template.format(
-            persona_description=character.description,
-            example_dialogue=self._format_example_dialogue(character),
-            long_term_memory=context["long_term_memory"],
-            short_term_memory=context["short_term_memory"],
+        context = await self._gather_context(message, preceding)
+
+        with span("assemble"):
+            final_prompt, assembled = self._assemble_prompt(character, context)
+        logger.info(
+            f"Prompt token usage (estimated {assembled.total_tokens}/{assembled.token_budget}): "
+            f"{assembled.section_tokens}"
+        )
+        self._log_prompt(final_prompt)
+        return final_prompt
+
+    def _assemble_prompt(self, character: Character, context: Dict[str, Any]):
+        """按 token 预算裁剪上下文并填充预编译模板，返回 (最终 prompt, 裁剪结果)。"""
+        prompt_template = compile_character_prompt(character)
+
+        # 按角色的 token 预算裁剪上下文：最旧的历史 -> 排名最低的记忆 -> embed 正文
+        assembled = self.prompt_assembler.assemble(
+            static_tokens=prompt_template.static_tokens,
             user_info=context["user_info"],
-            current_input=context["current_input"],  # 这里现在包含了丰富的信息
-            bot_name=character.name,
+            history=context["history"],
+            memories=context["memories"],
+            current_input=context["current_input"],
+            token_budget=character.context_token_budget,
         )
 
-        # (调试用) 打印最终的 prompt，这对于调试 prompt engineering 非常有用
-        print("=" * 20 + " FINAL PROMPT TO LLM " + "=" * 20)
-        print(final_prompt)
-        print("=" * 60)
+        # 使用预编译模板和收集到的上下文，构建最终要发送给 LLM 的 prompt。
+        # 角色描述和示例对话等静态部分只在角色卡 (重新) 加载后渲染一次，
+        # 这里只填充每条消息都会变化的槽位。
+        final_prompt = prompt_template.render(
+            long_term_memory=assembled.long_term_memory,
+            short_term_memory=assembled.short_term_memory,
+            user_info=context["user_info"],
+            current_input=assembled.current_input,  # 这里现在包含了丰富的信息
+        )
+        return final_prompt, assembled
+
+    def _log_prompt(self, prompt: str) -> None:
+        """
+        (调试用) 按采样比例以 DEBUG 级别记录最终的 prompt，超长部分截断，
+        既能用于调试 prompt engineering，又不会让日志被完整 prompt 淹没。
+        """
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        if self._prompt_log_rng.random() >= self.prompt_log_sample_rate:
+            return
+        if len(prompt) > self.prompt_log_max_chars:
+            omitted = len(prompt) - self.prompt_log_max_chars
+            prompt = prompt[: self.prompt_log_max_chars] + f"\n...[truncated {omitted} chars]"
+        logger.debug(f"Final prompt to LLM:\n{prompt}")
+
+    @asynccontextmanager
+    async def _llm_slot(self, message: discord.Message) -> AsyncIterator[None]:
+        """获取一个 LLM 请求名额；按消息的作者和服务器进行公平排队。排队耗时记为 llm_queue 阶段。"""
+        if self.llm_scheduler is None:
+            yield
+            return
+        trace = current_trace()
+        queued_at = trace.now() if trace else 0.0
+        async with self.llm_scheduler.slot(
+            user_id=message.author.id,
+            guild_id=message.guild.id if message.guild else None,
+        ):
+            if trace:
+                trace.record("llm_queue", trace.now() - queued_at)
+            yield
+
+    def _ensure_llm_capacity(self) -> None:
+        """队列已满时在收集上下文之前就快速失败 (抛出 LLMBusyError)。"""
+        if self.llm_scheduler is not None:
+            self.llm_scheduler.ensure_capacity()
+
+    async def _call_llm(self, prompt: str, message: discord.Message) -> str:
+        """在调度器分配的名额内调用 LLM，返回完整的文本。"""
+        async with self._llm_slot(message):
+            with span("llm"):
+                return await self.llm_client.generate_text(prompt)
+
+    async def _stream_llm(self, prompt: str, message: discord.Message) -> AsyncIterator[str]:
+        """在调度器分配的名额内流式调用 LLM；整个流式输出期间都占用这个名额。"""
+        async with self._llm_slot(message):
+            async for chunk in self.llm_client.generate_text_stream(prompt):
+                yield chunk
+
+    def _response_cache_key(
+        self, message: discord.Message, preceding: Sequence[discord.Message] = ()
+    ) -> Optional[str]:
+        """
+        返回这条消息在响应缓存中的键；不启用缓存或消息不适合缓存时返回 None。
+        回复其他消息、带 embed 的消息或合并了多条消息的输入，其回答依赖具体上下文，因此不缓存。
+        """
+        if (
+            self.response_cache is None
+            or preceding
+            or message.reference is not None
+            or message.embeds
+        ):
+            return None
+        return self.response_cache.cache_key_for(message.clean_content)
+
+    async def generate_response(
+        self, message: discord.Message, preceding: Sequence[discord.Message] = ()
+    ) -> str:
+        """
+        生成 AI 的最终响应。
 
-        # 调用 LLM 客户端并返回生成的文本
-        return await self.llm_client.generate_text(final_prompt)
+        这个方法是整个流程的协调者：先构建 prompt，再调用 LLM 客户端获取完整响应。
+
+        Args:
+            message: 用户发送的原始消息对象。
+            preceding: (可选) 同一用户紧接着之前发送的消息，与 `message` 合并成一个输入。
+
+        Returns:
+            一个由 LLM 生成的字符串响应。
+        """
+        with self.tracer.trace("generate_response"):
+            return await self._generate_response(message, preceding)
+
+    async def _generate_response(
+        self, message: discord.Message, preceding: Sequence[discord.Message]
+    ) -> str:
+        # 重复的问题直接复用缓存的回答，无需收集上下文和调用 LLM
+        await self._load_active_character()
+        character_name = self.active_character.name
+        cache_key = self._response_cache_key(message, preceding)
+        if cache_key is not None:
+            with span("cache_lookup"):
+                cached = await self.response_cache.get(character_name, cache_key)
+            if cached is not None:
+                return cached
+
+        self._ensure_llm_capacity()
+        final_prompt = await self._build_prompt(message, preceding)
+
+        # 调用 LLM 客户端并返回生成的文本。
+        # 完全相同的 prompt (同一用户、同样的输入和上下文) 已在生成时，直接等待它的结果，不再重复调用。
+        if self.single_flight is not None:
+            response = await self.single_flight.do(
+                SingleFlight.key_for(final_prompt),
+                lambda: self._call_llm(final_prompt, message),
+            )
+        else:
+            response = await self._call_llm(final_prompt, message)
+
+        if cache_key is not None:
+            await self.response_cache.put(character_name, cache_key, response)
+        return response
+
+    async def generate_response_stream(
+        self, message: discord.Message, preceding: Sequence[discord.Message] = ()
+    ) -> AsyncIterator[str]:
+        """
+        以流式方式生成 AI 的响应，逐块产出文本片段。
+
+        与 `generate_response` 使用完全相同的 prompt，区别只在于 LLM 的输出
+        一边生成一边交给调用方，让用户更早看到回复的开头。
+
+        Args:
+            message: 用户发送的原始消息对象。
+            preceding: (可选) 同一用户紧接着之前发送的消息，与 `message` 合并成一个输入。
+
+        Yields:
+            LLM 生成的文本片段。
+        """
+        await self._load_active_character()
+        character_name = self.active_character.name
+        cache_key = self._response_cache_key(message, preceding)
+        if cache_key is not None:
+            with span("cache_lookup"):
+                cached = await self.response_cache.get(character_name, cache_key)
+            if cached is not None:
+                yield cached
+                return
+
+        self._ensure_llm_capacity()
+        final_prompt = await self._build_prompt(message, preceding)
+
+        if self.single_flight is not None:
+            stream = self.single_flight.stream(
+                SingleFlight.key_for(final_prompt),
+                lambda: self._stream_llm(final_prompt, message),
+            )
+        else:
+            stream = self._stream_llm(final_prompt, message)
+
+        # 分别记录首块文本的等待时间和之后的流式生成时间 (不包括调用方处理每一块的时间)
+        chunks = []
+        stage = "llm_first_chunk"
+        while True:
+            with span(stage):
+                chunk = await anext(stream, None)
+            if chunk is None:
+                break
+            stage = "llm_stream"
+            chunks.append(chunk)
+            yield chunk
+
+        # 只缓存完整生成的回答
+        if cache_key is not None:
+            await self.response_cache.put(character_name, cache_key, "".join(chunks))
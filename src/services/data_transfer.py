@@ -0,0 +1,293 @@
+import csv
+import datetime
+import gzip
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from src.db.models import Event, Member
+from src.db.repositories.event_repository import EventRepository
+from src.db.repositories.member_repository import MemberRepository
+from src.services.event_retention import ARCHIVE_COLUMNS, as_utc
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("jsonl", "csv")
+
+# 每张表导出的列。events 不导出代理主键 id，与保留策略的归档格式相同，因此归档文件也可以直接导入
+COLUMNS = {
+    "members": tuple(c.name for c in Member.__table__.columns),
+    "events": ARCHIVE_COLUMNS,
+}
+# 导入时把文本还原成各列的 Python 类型
+_TYPES = {
+    "members": {c.name: c.type.python_type for c in Member.__table__.columns},
+    "events": {c.name: c.type.python_type for c in Event.__table__.columns},
+}
+# CSV 中 NULL 的写法：非文本列写为空字段；文本列写为 \N (与 PostgreSQL COPY 相同)，
+# 这样空字符串和 NULL 都能原样还原。内容恰好是 "\N" 的文本在 CSV 中会被还原为 NULL，需要完全无损时使用 JSONL
+_CSV_NULL = "\\N"
+_TEXT_COLUMNS = {table: {c for c, t in types.items() if t is str} for table, types in _TYPES.items()}
+# 导出时先写事件再写成员：事件的作者总是先于事件写入，成员也从不删除，
+# 因此不需要整库快照，导出的事件引用的作者一定都在导出的成员中；导入时反过来，先导入成员
+EXPORT_ORDER = ("events", "members")
+IMPORT_ORDER = ("members", "events")
+
+
+@dataclass
+class TransferStats:
+    """一个文件的导出或导入结果。"""
+
+    table: str
+    path: Path
+    rows: int = 0
+    elapsed: float = 0.0
+    # 续传时跳过的、之前已经导入的行数
+    skipped: int = 0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+def detect_file(path: Path) -> Tuple[str, str]:
+    """
+    从文件名判断数据表和格式：members*.jsonl / events*.csv.gz 等。
+    保留策略的归档 (events-<type>-<时间>.jsonl.gz) 也会被识别为 events 的 JSONL 文件。
+    """
+    name = path.name.removesuffix(".gz")
+    table = next((t for t in COLUMNS if name.startswith(t)), None)
+    fmt = next((f for f in FORMATS if name.endswith("." + f)), None)
+    if table is None or fmt is None:
+        raise ValueError(f"Cannot tell the table and format of '{path}'; expected e.g. members.jsonl or events.csv.gz.")
+    return table, fmt
+
+
+def _file_signature(path: Path) -> Dict[str, int]:
+    """文件的大小和修改时间，记在进度文件中，用来识别文件在上次导入之后是否被替换。"""
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _progress_path(path: Path) -> Path:
+    return path.with_name(path.name + ".progress")
+
+
+def _open(path: Path, mode: str) -> IO[str]:
+    if path.name.endswith(".gz") or path.name.endswith(".gz.partial"):
+        return gzip.open(path, mode + "t", encoding="utf-8", newline="")
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime.datetime):
+        return as_utc(value).isoformat()
+    return value
+
+
+def _decode(value: Any, python_type: type) -> Any:
+    if value is None or isinstance(value, python_type):
+        return value
+    if python_type is datetime.datetime:
+        return datetime.datetime.fromisoformat(value)
+    return python_type(value)
+
+
+def _csv_value(value: str, is_text: bool) -> Optional[str]:
+    if value == (_CSV_NULL if is_text else ""):
+        return None
+    return value
+
+
+class _RecordWriter:
+    """把记录写入 JSONL 或 CSV 文件 (文件名以 .gz 结尾时压缩)。"""
+
+    def __init__(self, path: Path, fmt: str, table: str):
+        self.columns = COLUMNS[table]
+        self.text_columns = _TEXT_COLUMNS[table]
+        self.fmt = fmt
+        self.file = _open(path, "w")
+        if fmt == "csv":
+            self.csv = csv.writer(self.file)
+            self.csv.writerow(self.columns)
+
+    def write(self, rows: Sequence[Dict[str, Any]]) -> None:
+        if self.fmt == "csv":
+            self.csv.writerows([self._csv_field(c, row[c]) for c in self.columns] for row in rows)
+        else:
+            self.file.writelines(
+                json.dumps({c: _encode(row[c]) for c in self.columns}, ensure_ascii=False) + "\n"
+                for row in rows
+            )
+
+    def _csv_field(self, column: str, value: Any) -> Any:
+        if value is None:
+            return _CSV_NULL if column in self.text_columns else ""
+        return _encode(value)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def iter_records(path: Path) -> Iterator[Dict[str, Any]]:
+    """
+    逐行读取一个导出文件或归档文件，按列类型还原数值和时间。
+    CSV 中非文本列的空字段和文本列的 \\N 还原为 NULL，文本列的空字段还原为空字符串。
+    """
+    table, fmt = detect_file(path)
+    types = _TYPES[table]
+    text_columns = _TEXT_COLUMNS[table]
+    with _open(path, "r") as file:
+        try:
+            if fmt == "csv":
+                rows = (
+                    {k: _csv_value(v, k in text_columns) for k, v in row.items()}
+                    for row in csv.DictReader(file)
+                )
+            else:
+                rows = (json.loads(line) for line in file if line.strip())
+            for row in rows:
+                yield {c: _decode(row.get(c), types[c]) for c in COLUMNS[table] if c in row}
+        except EOFError:
+            logger.warning(f"{path} is truncated; only the rows before the cut were read.")
+
+
+class DataTransferService:
+    """
+    members 和 events 表的流式导出和导入，用于迁移数据库 (例如从 SQLite 迁到 PostgreSQL) 或恢复数据。
+
+    - 导出：通过服务端游标按批读取，边读边写 JSONL 或 CSV 文件 (可选 gzip 压缩)，内存占用与表大小无关。
+      先写到 .partial 文件，完成后才改名，中途失败不会留下看起来完整的文件；
+    - 导入：每 `batch_size` 行一个事务，用 `INSERT ... ON CONFLICT DO NOTHING` 批量写入，
+      已经存在的成员和事件 (按 id / event_id) 被忽略，因此重复导入是安全的；
+    - 续传：每提交一批就把该文件已导入的行数 (以及文件的大小和修改时间) 记在旁边的 `<文件>.progress` 中，
+      中断后再次导入会跳过已经提交的行。重新导出时删除旧的进度文件；文件与进度中记录的不一致时也不续传。
+    """
+
+    def __init__(
+        self,
+        member_repo: MemberRepository,
+        event_repo: EventRepository,
+        batch_size: int = 5000,
+        progress: Optional[Callable[[TransferStats], None]] = None,
+    ):
+        self.member_repo = member_repo
+        self.event_repo = event_repo
+        self.batch_size = batch_size
+        # 每处理完一批调用一次，用于显示进度
+        self._progress = progress or (lambda stats: None)
+
+    async def export(self, out_dir: Path, fmt: str = "jsonl", compress: bool = False) -> List[TransferStats]:
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format '{fmt}'; expected one of {FORMATS}.")
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        streams = {
+            "events": self.event_repo.stream_events,
+            "members": self.member_repo.stream_members,
+        }
+        results = []
+        for table in EXPORT_ORDER:
+            path = out_dir / f"{table}.{fmt}{'.gz' if compress else ''}"
+            results.append(await self._export_table(table, path, fmt, streams[table](self.batch_size)))
+        return results
+
+    async def _export_table(
+        self, table: str, path: Path, fmt: str, batches: AsyncIterator[List[Dict[str, Any]]]
+    ) -> TransferStats:
+        stats = TransferStats(table=table, path=path)
+        partial = path.with_name(path.name + ".partial")
+        started = time.perf_counter()
+        writer = _RecordWriter(partial, fmt, table)
+        try:
+            async for batch in batches:
+                writer.write(batch)
+                stats.rows += len(batch)
+                stats.elapsed = time.perf_counter() - started
+                self._progress(stats)
+        finally:
+            writer.close()
+        os.replace(partial, path)
+        # 旧的进度属于上一次导出的文件，不能用于这个文件
+        _progress_path(path).unlink(missing_ok=True)
+        stats.elapsed = time.perf_counter() - started
+        logger.info(f"Exported {stats.rows} {table} to {path} ({stats.rows_per_second:,.0f} rows/s).")
+        return stats
+
+    async def import_files(self, paths: Sequence[Path], restart: bool = False) -> List[TransferStats]:
+        """
+        导入一组文件 (目录会展开为其中的 members*/events* 文件)。成员文件总是先于事件文件导入，
+        使每个提交的事务都满足 events.author_id 的外键约束。
+
+        Args:
+            restart: 忽略之前的续传进度，从头导入。
+        """
+        files = []
+        for path in map(Path, paths):
+            if path.is_dir():
+                files.extend(p for p in sorted(path.iterdir()) if self._is_data_file(p))
+            else:
+                files.append(path)
+        files.sort(key=lambda p: IMPORT_ORDER.index(detect_file(p)[0]))
+        return [await self._import_file(path, restart) for path in files]
+
+    @staticmethod
+    def _is_data_file(path: Path) -> bool:
+        try:
+            detect_file(path)
+        except ValueError:
+            return False
+        return path.is_file()
+
+    async def _import_file(self, path: Path, restart: bool) -> TransferStats:
+        table, _ = detect_file(path)
+        stats = TransferStats(table=table, path=path)
+        progress_path = _progress_path(path)
+        signature = _file_signature(path)
+        done = 0
+        if not restart and progress_path.exists():
+            progress = json.loads(progress_path.read_text())
+            if {key: progress.get(key) for key in signature} == signature:
+                done = progress["rows"]
+            else:
+                logger.warning(f"{path} changed since {progress_path} was written; importing it from the start.")
+        stats.skipped = done
+
+        create_many = self.member_repo.create_many if table == "members" else self.event_repo.create_many
+        started = time.perf_counter()
+        batch: List[Dict[str, Any]] = []
+        for index, record in enumerate(iter_records(path)):
+            if index < done:
+                continue
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                await self._commit(create_many, batch, stats, progress_path, signature, started)
+                batch = []
+        await self._commit(create_many, batch, stats, progress_path, signature, started)
+
+        logger.info(
+            f"Imported {stats.rows} {table} from {path} ({stats.rows_per_second:,.0f} rows/s"
+            + (f", {stats.skipped} rows already imported)." if stats.skipped else ").")
+        )
+        return stats
+
+    async def _commit(
+        self,
+        create_many,
+        batch,
+        stats: TransferStats,
+        progress_path: Path,
+        signature: Dict[str, int],
+        started: float,
+    ) -> None:
+        if batch:
+            await create_many(batch)
+            stats.rows += len(batch)
+        # 只在事务提交之后记录进度：记录之前中断时，这一批会被再次导入并被忽略
+        progress_path.write_text(json.dumps({"rows": stats.skipped + stats.rows, **signature}))
+        stats.elapsed = time.perf_counter() - started
+        self._progress(stats)
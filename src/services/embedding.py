@@ -0,0 +1,59 @@
+import hashlib
+import math
+from abc import ABC, abstractmethod
+from typing import List, Sequence
+
+
+class AbstractEmbedder(ABC):
+    """
+    文本向量化 (embedding) 的抽象接口。
+
+    所有实现都应返回 L2 归一化后的向量，这样两个向量的点积就是它们的余弦相似度。
+    """
+
+    dimension: int
+
+    @abstractmethod
+    async def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        pass
+
+
+def cosine_similarity(a: Sequence[float], b: Sequence[float]) -> float:
+    """两个已归一化向量的余弦相似度 (即点积)。"""
+    return sum(x * y for x, y in zip(a, b))
+
+
+class HashingEmbedder(AbstractEmbedder):
+    """
+    完全离线的哈希向量化器 (feature hashing)。
+
+    把文本切成字符 n-gram (默认 1~3 字)，用稳定哈希映射到固定维度并带符号累加，
+    最后做 L2 归一化。它不理解语义，但对“几乎相同的问题”(多一个字、少一个标点)
+    给出很高的相似度；不需要网络和模型文件，适合测试和作为默认实现。
+    """
+
+    def __init__(self, dimension: int = 256, ngram_range: tuple[int, int] = (1, 3)):
+        self.dimension = dimension
+        self.ngram_range = ngram_range
+
+    async def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        return [self.embed_one(text) for text in texts]
+
+    def embed_one(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimension
+        text = "".join(text.split())
+        min_n, max_n = self.ngram_range
+        for n in range(min_n, max_n + 1):
+            for i in range(len(text) - n + 1):
+                digest = hashlib.blake2b(
+                    text[i : i + n].encode("utf-8"), digest_size=8
+                ).digest()
+                value = int.from_bytes(digest, "little")
+                index = value % self.dimension
+                # 用哈希值的最高位决定符号，减少哈希碰撞带来的偏差
+                vector[index] += 1.0 if value >> 63 else -1.0
+
+        norm = math.sqrt(sum(x * x for x in vector))
+        if norm == 0:
+            return vector
+        return [x / norm for x in vector]
@@ -0,0 +1,202 @@
+import asyncio
+import datetime
+import gzip
+import json
+import logging
+import os
+import re
+import time
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from src.db.database import Database
+from src.db.models import Event
+from src.db.repositories.event_repository import EventCursor, EventRepository
+
+logger = logging.getLogger(__name__)
+
+# 归档的列：代理主键 id 只在当前数据库中有意义，不归档
+ARCHIVE_COLUMNS = tuple(c.name for c in Event.__table__.columns if c.name != "id")
+
+
+def as_utc(moment: datetime.datetime) -> datetime.datetime:
+    """给从数据库读出的时间补上时区：SQLite 读出的时间不带时区，存的是 UTC。"""
+    return moment if moment.tzinfo else moment.replace(tzinfo=datetime.timezone.utc)
+
+
+def event_to_record(event: Event) -> Dict[str, Any]:
+    """把一个事件转换成归档记录 (可以直接 JSON 序列化的字典)。"""
+    record = {name: getattr(event, name) for name in ARCHIVE_COLUMNS}
+    if record["created_at"] is not None:
+        record["created_at"] = as_utc(record["created_at"]).isoformat()
+    return record
+
+
+def read_archive(path: Path) -> Iterator[Dict[str, Any]]:
+    """
+    逐行读取一个归档文件 (gzip 压缩的 JSONL)，created_at 还原为带时区的 datetime。
+
+    写入过程中被中断的归档文件缺少 gzip 结尾，读到末尾时只记录警告，已经写入的记录照常返回。
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        try:
+            for line in file:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if record.get("created_at"):
+                    record["created_at"] = datetime.datetime.fromisoformat(record["created_at"])
+                yield record
+        except EOFError:
+            logger.warning(f"Archive {path} is truncated; returned the records written before the cut.")
+
+
+def read_archives(archive_dir: Path, event_type: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """按文件名 (即归档时间) 顺序读取目录下的所有归档，可以只读取某种事件类型的归档。"""
+    pattern = f"events-{_file_label(event_type)}-*.jsonl.gz" if event_type else "events-*.jsonl.gz"
+    for path in sorted(Path(archive_dir).glob(pattern)):
+        yield from read_archive(path)
+
+
+def _file_label(event_type: str) -> str:
+    return re.sub(r"[^\w-]", "_", event_type)
+
+
+class _ArchiveWriter:
+    """一次清理中按事件类型分别写入的 gzip JSONL 归档文件。"""
+
+    def __init__(self, archive_dir: Path, started_at: datetime.datetime):
+        self.archive_dir = archive_dir
+        self.stamp = started_at.strftime("%Y%m%dT%H%M%SZ")
+        self.paths: List[Path] = []
+        self._files: Dict[str, IO[bytes]] = {}
+
+    def write(self, records: Sequence[Dict[str, Any]]) -> None:
+        """追加一批记录，并确保它们已经落盘 (之后才能删除数据库中的这些事件)。"""
+        touched = set()
+        for record in records:
+            file = self._file(record["event_type"])
+            file.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+            touched.add(record["event_type"])
+        for event_type in touched:
+            file = self._files[event_type]
+            # 同步刷新压缩流，即使之后进程崩溃，这些记录也能从文件中读出
+            file.flush(zlib.Z_SYNC_FLUSH)
+            os.fsync(file.fileobj.fileno())
+
+    def close(self) -> None:
+        for file in self._files.values():
+            file.close()
+        self._files.clear()
+
+    def _file(self, event_type: str):
+        file = self._files.get(event_type)
+        if file is None:
+            self.archive_dir.mkdir(parents=True, exist_ok=True)
+            path = self.archive_dir / f"events-{_file_label(event_type)}-{self.stamp}.jsonl.gz"
+            # 同一秒内重复运行时追加到同一个文件，gzip 支持多个压缩成员首尾相接
+            file = self._files[event_type] = gzip.open(path, "ab")
+            self.paths.append(path)
+        return file
+
+
+@dataclass
+class RetentionResult:
+    """一次清理的结果。"""
+
+    archived: int = 0
+    deleted: int = 0
+    archives: List[Path] = field(default_factory=list)
+    vacuumed_pages: int = 0
+    elapsed: float = 0.0
+
+
+class EventRetentionService:
+    """
+    events 表的保留策略：把过期的事件归档到压缩文件，再从数据库中删除。
+
+    - `ttl_days` 按事件类型设置保留天数；其他类型使用 `default_ttl_days`，为 None 时永久保留；
+    - 每种类型按时间从旧到新，每次取出 `batch_size` 个过期事件，先写入并同步归档文件，
+      再在一个单独的短事务中删除，不会长时间占用写锁而拖住正常的消息记录；
+    - 先归档后删除：删除前崩溃时，下次清理会再次归档这些事件，归档中可能出现重复的 event_id，
+      但不会丢失数据；
+    - 删除完成后用 `PRAGMA incremental_vacuum` 回收最多 `vacuum_pages` 个空闲页 (0 为全部)。
+
+    归档文件是 `archive_dir` 下按类型和时间命名的 gzip JSONL，可以用 `read_archive` / `read_archives` 读回。
+    """
+
+    def __init__(
+        self,
+        event_repo: EventRepository,
+        archive_dir: Path,
+        ttl_days: Optional[Dict[str, float]] = None,
+        default_ttl_days: Optional[float] = None,
+        batch_size: int = 1000,
+        database: Optional[Database] = None,
+        vacuum_pages: int = 0,
+        clock: Callable[[], datetime.datetime] = lambda: datetime.datetime.now(datetime.timezone.utc),
+    ):
+        self.event_repo = event_repo
+        self.archive_dir = Path(archive_dir)
+        self.ttl_days = dict(ttl_days or {})
+        self.default_ttl_days = default_ttl_days
+        self.batch_size = batch_size
+        self.database = database
+        self.vacuum_pages = vacuum_pages
+        self._clock = clock
+
+    async def run(self) -> RetentionResult:
+        result = RetentionResult()
+        started = time.perf_counter()
+        now = self._clock()
+        archive = _ArchiveWriter(self.archive_dir, now)
+        try:
+            for event_type, days in self.ttl_days.items():
+                await self._expire(archive, result, now - datetime.timedelta(days=days), event_type=event_type)
+            if self.default_ttl_days is not None:
+                await self._expire(
+                    archive,
+                    result,
+                    now - datetime.timedelta(days=self.default_ttl_days),
+                    exclude_types=list(self.ttl_days),
+                )
+        finally:
+            await asyncio.to_thread(archive.close)
+        result.archives = archive.paths
+
+        if result.deleted and self.database is not None:
+            result.vacuumed_pages = await self.database.incremental_vacuum(self.vacuum_pages)
+
+        result.elapsed = time.perf_counter() - started
+        logger.info(
+            f"Event retention: archived {result.archived}, deleted {result.deleted} events, "
+            f"reclaimed {result.vacuumed_pages} pages in {result.elapsed:.2f}s."
+        )
+        return result
+
+    async def _expire(
+        self,
+        archive: _ArchiveWriter,
+        result: RetentionResult,
+        cutoff: datetime.datetime,
+        event_type: Optional[str] = None,
+        exclude_types: Sequence[str] = (),
+    ) -> None:
+        cursor = None
+        while True:
+            events = await self.event_repo.get_expired_events(
+                cutoff, self.batch_size, after=cursor, event_type=event_type, exclude_types=exclude_types
+            )
+            if not events:
+                return
+            # 压缩和 fsync 放到线程中，不阻塞事件循环
+            await asyncio.to_thread(archive.write, [event_to_record(e) for e in events])
+            result.archived += len(events)
+            result.deleted += await self.event_repo.delete_events([e.id for e in events])
+            last = events[-1]
+            cursor = EventCursor(last.created_at, last.id)
+            logger.debug(f"Archived and deleted {len(events)} '{event_type or 'other'}' events.")
+            if len(events) < self.batch_size:
+                return
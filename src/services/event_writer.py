@@ -0,0 +1,194 @@
+import asyncio
+import datetime
+import logging
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+import discord
+
+from src.db.repositories.event_repository import EventRepository
+from src.services.member_service import global_display_name
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PendingEvent:
+    """等待写入 events 表的一个事件，以及写入外键所需的作者信息。"""
+
+    event_id: int
+    event_type: str
+    author_id: int
+    author_name: str
+    author_display_name: Optional[str]
+    content: Optional[str]
+    channel_id: Optional[int]
+    guild_id: Optional[int]
+    created_at: datetime.datetime
+
+    @classmethod
+    def from_message(cls, message: discord.Message, event_type: str = "message") -> "PendingEvent":
+        return cls(
+            event_id=message.id,
+            event_type=event_type,
+            author_id=message.author.id,
+            author_name=message.author.name,
+            author_display_name=global_display_name(message.author),
+            content=message.content,
+            channel_id=message.channel.id,
+            guild_id=message.guild.id if message.guild else None,
+            created_at=message.created_at,
+        )
+
+    def event_row(self) -> Dict[str, object]:
+        row = asdict(self)
+        del row["author_name"], row["author_display_name"]
+        return row
+
+    def author_row(self) -> Dict[str, object]:
+        return {"id": self.author_id, "name": self.author_name, "display_name": self.author_display_name}
+
+
+class EventWriter:
+    """
+    events 表的后写 (write-behind) 批量写入器。
+
+    - 生产者调用 `record` 把事件放进内存队列，通常立即返回，不等待数据库；
+    - 后台任务攒够 `batch_size` 个事件，或者距离这一批的第一个事件已过去 `flush_interval` 秒时，
+      用一个事务批量写入；
+    - 队列满时施加背压：`record` 最多等待 `backpressure_timeout` 秒，仍然放不进去就丢弃该事件并计数，
+      保证聊天主流程不会被数据库拖住；
+    - `close` 停止接收新事件，并把队列中剩余的事件全部写完 (关闭机器人时调用)。
+    """
+
+    def __init__(
+        self,
+        event_repo: EventRepository,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_queue: int = 10_000,
+        backpressure_timeout: float = 0.5,
+    ):
+        self.event_repo = event_repo
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.backpressure_timeout = backpressure_timeout
+        self._queue: asyncio.Queue[PendingEvent] = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+        # 正在进行的写入；关闭时不能被取消，否则这一批事件会丢失
+        self._flushing: Optional[asyncio.Future] = None
+        self._closed = False
+
+        # 指标
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self._flush_seconds = 0.0
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        return {
+            "queued": self._queue.qsize(),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "avg_batch_size": self.written / self.batches if self.batches else 0.0,
+            # 数据库侧的写入吞吐量 (事件/秒)，只计算实际花在写入上的时间
+            "events_per_second": self.written / self._flush_seconds if self._flush_seconds else 0.0,
+        }
+
+    def start(self) -> None:
+        """启动后台写入任务 (重复调用无副作用)。"""
+        if self._task is None or self._task.done():
+            self._closed = False
+            self._task = asyncio.create_task(self._run())
+
+    async def record(self, event: PendingEvent) -> bool:
+        """
+        把一个事件放进写入队列。
+
+        Returns:
+            是否成功入队；写入器已关闭，或者背压等待超时时返回 False。
+        """
+        if self._closed:
+            return False
+        self.start()
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(self._queue.put(event), self.backpressure_timeout)
+            except asyncio.TimeoutError:
+                self.dropped += 1
+                logger.warning(f"Event queue is full, dropping event {event.event_id}.")
+                return False
+        self.enqueued += 1
+        return True
+
+    async def close(self) -> None:
+        """停止接收新事件，写完队列中剩余的事件后停止后台任务。"""
+        self._closed = True
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        if self._flushing is not None:
+            await asyncio.gather(self._flushing, return_exceptions=True)
+        # 把取消时还留在队列中的事件全部写完
+        while not self._queue.empty():
+            await self._flush(self._drain(self.batch_size))
+
+    def _drain(self, limit: int) -> List[PendingEvent]:
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            try:
+                while len(batch) < self.batch_size:
+                    batch.extend(self._drain(self.batch_size - len(batch)))
+                    if len(batch) >= self.batch_size:
+                        break
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                # 关闭时已经取出的事件也要写入
+                await self._flush(batch)
+                raise
+            self._flushing = asyncio.ensure_future(self._flush(batch))
+            await asyncio.shield(self._flushing)
+
+    async def _flush(self, batch: List[PendingEvent]) -> None:
+        if not batch:
+            return
+        started = time.perf_counter()
+        # 同一批次中同一作者只需要出现一次
+        authors = {event.author_id: event.author_row() for event in batch}
+        try:
+            await self.event_repo.create_many(
+                [event.event_row() for event in batch], list(authors.values())
+            )
+        except Exception:
+            self.failed += len(batch)
+            logger.error(f"Failed to write a batch of {len(batch)} events.", exc_info=True)
+            return
+        self._flush_seconds += time.perf_counter() - started
+        self.written += len(batch)
+        self.batches += 1
+        logger.debug(f"Wrote {len(batch)} events in {time.perf_counter() - started:.3f}s.")
@@ -0,0 +1,56 @@
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+import discord
+
+
+class FormattedMessageCache:
+    """
+    “消息 -> 送入 LLM 的格式化文本”的有界 LRU 缓存，在所有 @ 请求之间共享。
+
+    热闹的频道里，同一条消息会出现在很多次请求的 10 条历史窗口中，
+    每次都重新遍历它的 embed、字段、图片和页脚是不必要的。
+
+    按消息 ID 缓存，每个条目记录格式化时消息的版本 (最后编辑时间、作者的显示名称)：
+    用户编辑消息或者改了昵称后版本不同，不会命中旧的文本。
+    链接预览的展开和机器人更新 embed 不会改变编辑时间，需要收到消息更新事件时调用 `evict`。
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[Tuple[Hashable, str], str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def version_of(message: discord.Message) -> Tuple[Hashable, str]:
+        return (message.edited_at, message.author.display_name)
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def get(self, message: discord.Message) -> Optional[str]:
+        entry = self._entries.get(message.id)
+        if entry is None or entry[0] != self.version_of(message):
+            self.misses += 1
+            return None
+        self._entries.move_to_end(message.id)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, message: discord.Message, text: str) -> None:
+        self._entries[message.id] = (self.version_of(message), text)
+        self._entries.move_to_end(message.id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def evict(self, message_id: int) -> None:
+        """丢弃一条消息的格式化结果 (消息的内容或 embed 被更新了)。"""
+        self._entries.pop(message_id, None)
@@ -1,27 +1,59 @@
 # src/services/gemini_client.py (升级版)
 import google.generativeai as genai
 import logging
+from typing import AsyncIterator
+
+# LLMClientError 定义在抽象接口模块中，这里重新导出以兼容已有的导入路径
+from .llm.abstract_llm_client import AbstractLLMClient, LLMClientError, TokenUsage
 
 logger = logging.getLogger(__name__)
 
 
-# 【新增】在这里定义自定义异常
-class LLMClientError(Exception):
-    """当与 LLM 客户端交互失败时抛出的通用异常。"""
+# 被视为暂时性错误的 HTTP 状态码：限流、超时和服务端错误
+_RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+def _is_retryable(error: Exception) -> bool:
+    """判断底层异常是否是值得重试的暂时性错误。"""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    # google.api_core 的异常带有 HTTP 状态码 (例如 ResourceExhausted 是 429)
+    return getattr(error, "code", None) in _RETRYABLE_STATUS_CODES
+
 
-    pass
+def _usage_from_metadata(metadata) -> TokenUsage:
+    """从 Gemini 响应的 usage_metadata 中读取 token 用量，缺失的字段记为 0。"""
 
+    def count(name: str) -> int:
+        value = getattr(metadata, name, 0)
+        return value if isinstance(value, int) else 0
 
-class GeminiClient:
+    return TokenUsage(
+        prompt_tokens=count("prompt_token_count"),
+        completion_tokens=count("candidates_token_count"),
+    )
+
+
+class GeminiClient(AbstractLLMClient):
     """
     一个封装了 Google Gemini API 调用的底层客户端。
+
+    `genai.configure` 推迟到第一次调用时才执行，因此只创建客户端不会触碰网络或全局配置。
     """
 
     def __init__(self, api_key: str, model_name: str):
-        # 这部分保持不变
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel(model_name)
-        logger.info(f"GeminiClient initialized with model: {model_name}")
+        super().__init__()
+        self._api_key = api_key
+        self.model_name = model_name
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            genai.configure(api_key=self._api_key)
+            self._model = genai.GenerativeModel(self.model_name)
+            logger.info(f"GeminiClient initialized with model: {self.model_name}")
+        return self._model
 
     async def generate_text(self, prompt: str) -> str:
         """
@@ -34,9 +66,36 @@ class GeminiClient:
             # Gemini 有时可能返回空内容或有安全阻断，这里做个简单检查
             if not response.text:
                 raise LLMClientError("Gemini API returned an empty response.")
+            self._record_usage(_usage_from_metadata(getattr(response, "usage_metadata", None)))
             return response.text
         except Exception as e:
             logger.error(f"Error calling Gemini API: {e}", exc_info=True)
             # 【关键变更】抛出自定义异常，而不是返回字符串
             # 我们将原始异常包装起来，方便追溯问题
-            raise LLMClientError(f"Gemini API call failed: {e}") from e
+            raise LLMClientError(
+                f"Gemini API call failed: {e}", retryable=_is_retryable(e)
+            ) from e
+
+    async def generate_text_stream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        以流式方式生成文本，按 Gemini 返回的顺序逐块产出文本片段。
+        调用方可以在完整回复生成之前就开始展示内容。
+        如果失败 (包括整个流没有产出任何文本)，抛出 LLMClientError。
+        """
+        produced_any = False
+        try:
+            response = await self.model.generate_content_async(prompt, stream=True)
+            async for chunk in response:
+                text = chunk.text
+                if text:
+                    produced_any = True
+                    yield text
+            # 流式响应的最后一块携带整次调用的 usage_metadata
+            self._record_usage(_usage_from_metadata(getattr(response, "usage_metadata", None)))
+        except Exception as e:
+            logger.error(f"Error streaming from Gemini API: {e}", exc_info=True)
+            raise LLMClientError(
+                f"Gemini API stream failed: {e}", retryable=_is_retryable(e)
+            ) from e
+        if not produced_any:
+            raise LLMClientError("Gemini API returned an empty response.")
@@ -0,0 +1,72 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import AsyncIterator
+
+
+class LLMClientError(Exception):
+    """当与 LLM 客户端交互失败时抛出的通用异常。"""
+
+    def __init__(self, message: str, retryable: bool = False):
+        """
+        Args:
+            message: 错误描述。
+            retryable: 该错误是否是暂时性的 (限流、超时、服务端 5xx 等)，重试可能会成功。
+        """
+        super().__init__(message)
+        self.retryable = retryable
+
+
+@dataclass
+class TokenUsage:
+    """一次 (或累计的) LLM 调用消耗的 token 数。"""
+
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, other: "TokenUsage") -> None:
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+
+
+class AbstractLLMClient(ABC):
+    """
+    LLM 后端的抽象接口。
+
+    业务层 (AIService、调度器、韧性包装层) 只依赖这个接口，
+    具体使用哪个后端 (Gemini、本地假后端等) 由 Settings.LLM_BACKEND 在容器中选择。
+
+    实现类在每次调用完成后通过 `_record_usage` 记录 token 用量，
+    调用方可以通过 `last_usage` 和 `total_usage` 读取。
+    """
+
+    def __init__(self):
+        self.last_usage = TokenUsage()
+        self.total_usage = TokenUsage()
+
+    @abstractmethod
+    async def generate_text(self, prompt: str) -> str:
+        """
+        根据给定的 prompt 生成完整的文本。
+
+        Raises:
+            LLMClientError: 调用失败或返回了空内容。
+        """
+        pass
+
+    @abstractmethod
+    def generate_text_stream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        以流式方式逐块产出文本。
+
+        Raises:
+            LLMClientError: 调用失败，或者整个流没有产出任何文本。
+        """
+        pass
+
+    def _record_usage(self, usage: TokenUsage) -> None:
+        self.last_usage = usage
+        self.total_usage.add(usage)
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import math
+import random
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from ...core.token_estimator import estimate_tokens
+from .abstract_llm_client import AbstractLLMClient, LLMClientError, TokenUsage
+
+logger = logging.getLogger(__name__)
+
+# 假后端输出所用的词表：中英混合，使 token 估算与真实回复大致相当
+_VOCABULARY = (
+    "你好", "今天", "社群", "一起", "玩", "游戏", "哈哈", "是的", "可以", "明白",
+    "hello", "nice", "ok", "sure", "well", "lol",
+)
+
+LATENCY_DISTRIBUTIONS = ("constant", "uniform", "normal", "lognormal")
+
+
+class FakeLLMClient(AbstractLLMClient):
+    """
+    完全离线、结果可复现的假 LLM 后端，用于在没有网络的情况下对整条链路做压测。
+
+    - 延迟：按 `latency_distribution` 采样，均值为 `latency_mean` 秒，
+      离散程度由 `latency_stddev` 控制 (uniform 为 mean±stddev 的均匀分布)；
+    - 错误：以 `error_rate` 的概率抛出可重试的 LLMClientError (模拟 429)；
+    - 输出：长度在 [`output_tokens_min`, `output_tokens_max`] 之间的随机文本，
+      流式接口每 `stream_chunk_tokens` 个词产出一块，延迟均匀分摊到各块之间。
+
+    相同的 `seed` 和相同的调用顺序总是得到相同的延迟、错误和输出。
+    """
+
+    def __init__(
+        self,
+        latency_distribution: str = "lognormal",
+        latency_mean: float = 0.8,
+        latency_stddev: float = 0.3,
+        error_rate: float = 0.0,
+        output_tokens_min: int = 20,
+        output_tokens_max: int = 120,
+        stream_chunk_tokens: int = 8,
+        seed: Optional[int] = 0,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        super().__init__()
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(
+                f"Unknown latency distribution '{latency_distribution}', "
+                f"expected one of {LATENCY_DISTRIBUTIONS}."
+            )
+        if output_tokens_min < 1 or output_tokens_max < output_tokens_min:
+            raise ValueError("Invalid output token range.")
+        self.latency_distribution = latency_distribution
+        self.latency_mean = latency_mean
+        self.latency_stddev = latency_stddev
+        self.error_rate = error_rate
+        self.output_tokens_min = output_tokens_min
+        self.output_tokens_max = output_tokens_max
+        self.stream_chunk_tokens = max(1, stream_chunk_tokens)
+        self._rng = random.Random(seed)
+        self._sleep = sleep
+
+        # 指标
+        self.calls = 0
+        self.errors = 0
+
+    def sample_latency(self) -> float:
+        """按配置的分布采样一次调用的总延迟 (秒)，结果不小于 0。"""
+        mean, stddev = self.latency_mean, self.latency_stddev
+        if self.latency_distribution == "constant" or mean <= 0:
+            latency = mean
+        elif self.latency_distribution == "uniform":
+            latency = self._rng.uniform(mean - stddev, mean + stddev)
+        elif self.latency_distribution == "normal":
+            latency = self._rng.gauss(mean, stddev)
+        else:
+            # 由目标均值和标准差反推对数正态分布的参数
+            sigma2 = math.log(1 + (stddev / mean) ** 2)
+            latency = self._rng.lognormvariate(math.log(mean) - sigma2 / 2, math.sqrt(sigma2))
+        return max(0.0, latency)
+
+    def _plan_call(self):
+        """为一次调用预先决定延迟、是否失败以及输出的词。"""
+        self.calls += 1
+        latency = self.sample_latency()
+        fails = self._rng.random() < self.error_rate
+        length = self._rng.randint(self.output_tokens_min, self.output_tokens_max)
+        words = [self._rng.choice(_VOCABULARY) for _ in range(length)]
+        return latency, fails, words
+
+    def _fail(self) -> None:
+        self.errors += 1
+        raise LLMClientError("Fake LLM backend injected a rate limit error.", retryable=True)
+
+    def _finish(self, prompt: str, text: str) -> None:
+        self._record_usage(
+            TokenUsage(prompt_tokens=estimate_tokens(prompt), completion_tokens=estimate_tokens(text))
+        )
+
+    async def generate_text(self, prompt: str) -> str:
+        latency, fails, words = self._plan_call()
+        await self._sleep(latency)
+        if fails:
+            self._fail()
+        text = " ".join(words)
+        self._finish(prompt, text)
+        return text
+
+    async def generate_text_stream(self, prompt: str) -> AsyncIterator[str]:
+        latency, fails, words = self._plan_call()
+        chunks = [
+            " ".join(words[i : i + self.stream_chunk_tokens])
+            for i in range(0, len(words), self.stream_chunk_tokens)
+        ]
+        if fails:
+            # 失败发生在第一块输出之前，与真实服务商的限流行为一致
+            await self._sleep(latency / len(chunks))
+            self._fail()
+
+        for index, chunk in enumerate(chunks):
+            await self._sleep(latency / len(chunks))
+            yield chunk if index == 0 else " " + chunk
+        self._finish(prompt, " ".join(words))
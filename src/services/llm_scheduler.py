@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Deque, Dict, Hashable, Optional, Tuple
+
+from .gemini_client import LLMClientError
+
+logger = logging.getLogger(__name__)
+
+
+class LLMBusyError(LLMClientError):
+    """当 LLM 请求队列已满、无法再接受新请求时抛出。"""
+
+    pass
+
+
+@dataclass
+class _Waiter:
+    future: asyncio.Future
+    enqueued_at: float
+
+
+class LLMScheduler:
+    """
+    位于 LLM 客户端之前的调度层。
+
+    - 限制同时在途的 LLM 请求数 (`max_in_flight`)，避免突发流量触发服务商的 429；
+    - 排队的请求按“服务器 -> 用户”两级轮询 (round-robin) 出队：
+      每个服务器轮流获得空闲名额，同一服务器内每个用户轮流获得名额，
+      因此刷屏的用户只会拉长自己的队伍，而不会饿死其他人；
+    - 排队总数超过 `max_queue_depth` 时立即抛出 LLMBusyError，让交互层快速回复“忙”；
+    - 记录排队等待时间等指标。
+
+    用法：
+        async with scheduler.slot(user_id=..., guild_id=...):
+            await llm_client.generate_text(prompt)
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 4,
+        max_queue_depth: int = 32,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.max_in_flight = max_in_flight
+        self.max_queue_depth = max_queue_depth
+        self._clock = clock
+
+        self._in_flight = 0
+        self._queued = 0
+        # 轮询顺序：服务器队列，以及每个服务器内的用户队列
+        self._guild_order: Deque[Hashable] = deque()
+        self._user_order: Dict[Hashable, Deque[Hashable]] = {}
+        self._waiters: Dict[Tuple[Hashable, Hashable], Deque[_Waiter]] = {}
+
+        # 指标
+        self.admitted = 0
+        self.rejected = 0
+        self._recent_waits: Deque[float] = deque(maxlen=1024)
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queued
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """返回调度器的当前状态和排队等待时间指标 (秒)。"""
+        waits = sorted(self._recent_waits)
+
+        def percentile(p: float) -> float:
+            if not waits:
+                return 0.0
+            return waits[min(len(waits) - 1, int(p * len(waits)))]
+
+        return {
+            "in_flight": self._in_flight,
+            "queue_depth": self._queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "wait_avg": self._total_wait / self.admitted if self.admitted else 0.0,
+            "wait_p50": percentile(0.50),
+            "wait_p95": percentile(0.95),
+            "wait_max": self._max_wait,
+        }
+
+    def ensure_capacity(self) -> None:
+        """
+        在做任何昂贵的准备工作之前检查队列是否已满。
+
+        Raises:
+            LLMBusyError: 如果当前已无法再接受新的请求。
+        """
+        if self._in_flight >= self.max_in_flight and self._queued >= self.max_queue_depth:
+            self.rejected += 1
+            raise LLMBusyError(
+                f"LLM queue is full ({self._queued} queued, {self._in_flight} in flight)."
+            )
+
+    @asynccontextmanager
+    async def slot(
+        self, user_id: Optional[int] = None, guild_id: Optional[int] = None
+    ) -> AsyncIterator[None]:
+        """
+        获取一个 LLM 请求名额，在 `async with` 块结束时释放。
+
+        Raises:
+            LLMBusyError: 如果队列已满。
+        """
+        await self._acquire(user_id, guild_id)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, user_id: Optional[int], guild_id: Optional[int]) -> None:
+        now = self._clock()
+        if self._in_flight < self.max_in_flight and self._queued == 0:
+            self._in_flight += 1
+            self._record_wait(0.0)
+            return
+
+        self.ensure_capacity()
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), now)
+        key = (guild_id, user_id)
+        queue = self._waiters.get(key)
+        if queue is None:
+            queue = self._waiters[key] = deque()
+            users = self._user_order.get(guild_id)
+            if users is None:
+                users = self._user_order[guild_id] = deque()
+                self._guild_order.append(guild_id)
+            users.append(user_id)
+        queue.append(waiter)
+        self._queued += 1
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.cancelled():
+                # 仍在排队时被取消：留下一个“墓碑”，出队时跳过
+                self._queued -= 1
+            else:
+                # 名额已分配，但调用方在恢复运行前被取消：归还名额
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._in_flight < self.max_in_flight and self._guild_order:
+            waiter = self._pop_next_waiter()
+            if waiter.future.done():
+                continue
+            self._queued -= 1
+            self._in_flight += 1
+            self._record_wait(self._clock() - waiter.enqueued_at)
+            waiter.future.set_result(None)
+
+    def _pop_next_waiter(self) -> _Waiter:
+        """按“服务器 -> 用户”两级轮询取出下一个等待者。"""
+        guild_id = self._guild_order.popleft()
+        users = self._user_order[guild_id]
+        user_id = users.popleft()
+        queue = self._waiters[(guild_id, user_id)]
+        waiter = queue.popleft()
+
+        if queue:
+            users.append(user_id)
+        else:
+            del self._waiters[(guild_id, user_id)]
+        if users:
+            self._guild_order.append(guild_id)
+        else:
+            del self._user_order[guild_id]
+        return waiter
+
+    def _record_wait(self, wait: float) -> None:
+        self.admitted += 1
+        self._recent_waits.append(wait)
+        self._total_wait += wait
+        self._max_wait = max(self._max_wait, wait)
+        if wait > 1.0:
+            logger.info(f"LLM request waited {wait:.2f}s in queue (depth now {self._queued}).")
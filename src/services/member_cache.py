@@ -0,0 +1,76 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from src.db.models import Member
+
+
+class MemberCache:
+    """
+    成员快照的有界 LRU + TTL 缓存，在所有请求之间共享。
+
+    成员的 name 和 display_name 几乎不会变化，每次 @ 都去数据库确认一遍是不必要的。
+    命中的前提是快照没有过期，并且名字与 Discord 对象上当前的名字一致；
+    名字变了就视为未命中，交给数据库更新。
+    `on_member_update` / `on_user_update` 时应调用 `invalidate` 丢弃旧快照。
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        ttl: float = 600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[int, Tuple[Member, float]]" = OrderedDict()
+
+        # 指标
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def get(self, member_id: int, name: str, display_name: Optional[str]) -> Optional[Member]:
+        """返回未过期且名字一致的成员快照；否则返回 None。"""
+        entry = self._entries.get(member_id)
+        if entry is not None:
+            member, expires_at = entry
+            if self._clock() >= expires_at:
+                del self._entries[member_id]
+            elif member.name == name and member.display_name == display_name:
+                self._entries.move_to_end(member_id)
+                self.hits += 1
+                return member
+        self.misses += 1
+        return None
+
+    def put(self, member: Member) -> None:
+        self._entries[member.id] = (member, self._clock() + self.ttl)
+        self._entries.move_to_end(member.id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, member_id: int) -> bool:
+        """丢弃某个成员的快照，返回是否确实有快照被丢弃。"""
+        if self._entries.pop(member_id, None) is None:
+            return False
+        self.invalidations += 1
+        return True
+
+    def clear(self) -> None:
+        self._entries.clear()
@@ -1,15 +1,27 @@
 import discord
-from typing import Union
+from typing import Optional, Union
 
 from src.db.models import Member
 from src.db.repositories.member_repository import MemberRepository
+from src.services.member_cache import MemberCache
+
+
+def global_display_name(user: Union[discord.User, discord.Member]) -> str:
+    """
+    用户的全局显示名称 (个人资料中设置的名字，没有设置时为用户名)。
+
+    members 表每个用户只有一行，保存的是与服务器无关的名字。服务器昵称 (discord.Member.display_name)
+    每个服务器各不相同，如果写进这一行，同一个用户在不同服务器中说话或同步时就会反复改写它。
+    """
+    return user.global_name or user.name
+
 
 class MemberService:
     """
     服务层，用于处理与成员相关的业务逻辑。
     """
 
-    def __init__(self, member_repo: MemberRepository):
+    def __init__(self, member_repo: MemberRepository, member_cache: Optional[MemberCache] = None):
         """
         初始化 MemberService。
 
@@ -19,8 +31,11 @@ class MemberService:
 
         Args:
             member_repo: 成员数据仓库的实例。
+            member_cache: 成员快照缓存。MemberService 每次请求都会重新创建，
+                因此缓存应由容器以单例注入，才能在请求之间共享。
         """
         self.member_repo = member_repo
+        self.member_cache = member_cache or MemberCache()
 
     async def get_or_create_member(self, user: Union[discord.User, discord.Member]) -> Member:
         """
@@ -35,12 +50,18 @@ class MemberService:
         Returns:
             与该 Discord 用户对应的数据库中的 Member ORM 对象。
         """
+        # 缓存中有未过期且名字没变的快照时，完全跳过数据库
+        display_name = global_display_name(user)
+        cached = self.member_cache.get(user.id, user.name, display_name)
+        if cached is not None:
+            return cached
+
         # 从 discord.User 对象中提取所需的数据，
         # 并调用我们已经编写好的 repository 方法。
         member, was_created = await self.member_repo.get_or_create(
             member_id=user.id,
             name=user.name,
-            display_name=user.display_name
+            display_name=display_name
         )
 
         # 在服务层，我们可以根据 was_created 的值执行额外的逻辑，
@@ -50,4 +71,9 @@ class MemberService:
             # logger.info(f"新成员已注册：{user.name} (ID: {user.id})")
             pass
 
-        return member
\ No newline at end of file
+        self.member_cache.put(member)
+        return member
+
+    def invalidate(self, user_id: int) -> None:
+        """成员信息在 Discord 上发生变化时丢弃缓存的快照，下次请求会回到数据库。"""
+        self.member_cache.invalidate(user_id)
\ No newline at end of file
@@ -0,0 +1,75 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import List
+
+import discord
+
+from src.db.repositories.member_repository import MemberRepository, MemberSnapshot
+from src.services.member_service import global_display_name
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class GuildSyncResult:
+    """一次服务器成员同步的结果。"""
+
+    guild_id: int
+    seen: int = 0
+    written: int = 0
+    elapsed: float = 0.0
+
+
+class MemberSyncService:
+    """
+    把整个服务器的成员列表批量同步到 `members` 表。
+
+    - 通过 `guild.fetch_members` 分块拉取成员列表，边拉取边写入，不需要一次性把整个列表放进内存；
+    - 每攒够 `batch_size` 个成员，就在一个事务中批量写入，并记录一条进度日志；
+    - 只写入新成员和名字发生变化的成员，因此重启后的再次同步几乎没有写入。
+    """
+
+    def __init__(self, member_repo: MemberRepository, batch_size: int = 1000):
+        self.member_repo = member_repo
+        self.batch_size = batch_size
+
+    async def sync_guild(self, guild: discord.Guild) -> GuildSyncResult:
+        result = GuildSyncResult(guild_id=guild.id)
+        total = guild.member_count or "?"
+        started = time.perf_counter()
+        logger.info(f"Syncing members of guild '{guild.name}' ({total} members)...")
+
+        batch: List[MemberSnapshot] = []
+        async for member in guild.fetch_members(limit=None):
+            # 机器人不会与我们对话，不需要记录
+            if member.bot:
+                continue
+            # 写入全局名字而不是这个服务器的昵称，多个服务器的同步不会互相覆盖
+            batch.append((member.id, member.name, global_display_name(member)))
+            if len(batch) >= self.batch_size:
+                await self._flush(guild, batch, result, total)
+                batch = []
+        if batch:
+            await self._flush(guild, batch, result, total)
+
+        result.elapsed = time.perf_counter() - started
+        logger.info(
+            f"Synced guild '{guild.name}': {result.seen} members checked, "
+            f"{result.written} written in {result.elapsed:.2f}s."
+        )
+        return result
+
+    async def _flush(
+        self,
+        guild: discord.Guild,
+        batch: List[MemberSnapshot],
+        result: GuildSyncResult,
+        total,
+    ) -> None:
+        result.written += await self.member_repo.sync_many(batch)
+        result.seen += len(batch)
+        logger.info(
+            f"Guild '{guild.name}' sync progress: {result.seen}/{total} checked, "
+            f"{result.written} written."
+        )
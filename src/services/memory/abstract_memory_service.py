@@ -1,10 +1,18 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional
 
 
 class AbstractMemoryService(ABC):
     @abstractmethod
     async def retrieve_relevant_memories(
-        self, user_id: int, query_text: str
+        self, user_id: int, query_text: str, guild_id: Optional[int] = None
     ) -> List[str]:
+        """
+        检索与 `query_text` 相关的长期记忆，按相关度从高到低返回。
+
+        Args:
+            user_id: 说话的用户，只返回属于这个用户或所有人共享的记忆。
+            query_text: 用户当前说的话。
+            guild_id: 消息所在的服务器 (私信为 None)，只返回属于这个服务器或所有服务器共享的记忆。
+        """
         pass
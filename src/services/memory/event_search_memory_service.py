@@ -0,0 +1,47 @@
+import logging
+from typing import List, Optional
+
+from src.db.repositories.event_repository import EventRepository
+from .abstract_memory_service import AbstractMemoryService
+
+logger = logging.getLogger(__name__)
+
+
+class EventSearchMemoryService(AbstractMemoryService):
+    """
+    基于历史消息全文检索的长期记忆。
+
+    用用户当前说的话在 events 表中检索这个用户过去说过的相关内容 (trigram 任意匹配，BM25 排序)，
+    把最相关的几条作为长期记忆交给 prompt 组装器。
+    """
+
+    def __init__(self, event_repo: EventRepository, limit: int = 5, max_chars: int = 200):
+        self.event_repo = event_repo
+        self.limit = limit
+        self.max_chars = max_chars
+
+    async def retrieve_relevant_memories(
+        self, user_id: int, query_text: str, guild_id: Optional[int] = None
+    ) -> List[str]:
+        # 多取一条：当前这条消息可能已经被记录，会与查询完全一致，需要排除
+        hits = await self.event_repo.search_events(
+            query_text,
+            limit=self.limit + 1,
+            author_id=user_id,
+            guild_id=guild_id,
+            event_type="message",
+            match_any=True,
+        )
+        query = query_text.strip()
+        memories = []
+        for hit in hits:
+            content = (hit.event.content or "").strip()
+            if not content or content == query:
+                continue
+            if len(content) > self.max_chars:
+                content = content[: self.max_chars] + "…"
+            memories.append(f"{hit.event.created_at:%Y-%m-%d} 这位用户说过：{content}")
+            if len(memories) == self.limit:
+                break
+        logger.debug(f"Retrieved {len(memories)} memories for user {user_id}.")
+        return memories
@@ -1,18 +1,21 @@
-from typing import List
+from typing import List, Optional
 from .abstract_memory_service import AbstractMemoryService
 
+# 写死的示例记忆 (社群里的梗)。向量记忆后端首次启动时也会把它们作为所有人共享的记忆导入
+DEFAULT_MEMORIES = [
+    "Go 学长知道“性压抑”这个梗，专指瓦罗兰特社群中，部分男性玩家在游戏中（尤其是在语音或文字聊天中）一旦发现有女性玩家，就会表现出极度反常、过度谄媚甚至带有冒犯性的行为，比如不分场合地“狂舔”（指无条件夸赞、维护）、频繁地喊“妈妈”等。这个梗反映了瓦圈内一种被社群诟病的、对女性玩家不健康的追捧现象，通常带贬义和嘲讽。",
+    "Go 学长知道“兰花草 / 我从山中来”这个梗，源于瓦罗兰特明星选手 zmjjkk。他特别喜欢在比赛胜利后，兴奋地唱起歌曲《兰花草》。其中歌词“我从山中来，带着兰花草，家中无富贵，口袋无财宝。寒风终刺骨，勤为好仕途，博得明月出，用兰花换锦服”成为了他标志性的个人标签和粉丝应援语。这个梗常被用来调侃瓦学弟们对偶像的狂热，或是在吹嘘自己“白手起家”的“励志”人设。",
+    "Go 学长知道“朝天门”这个梗，同样也和瓦罗兰特选手 zmjjkk 有关。它其实是另一首歌的梗，歌词风格更为张扬、充满“底层逆袭”和“嚣张狂妄”的意味，比如“我喜欢在丛林里面抢肉吃，因为我是来自真正的底层”、“我太帅了，I got the ring”、“下苦力只为了买个衣”等。这个梗被瓦罗兰特玩家们用来表达自信、狂傲，有时也用来调侃那些稍微取得点成就就得意忘形、仿佛“翻身农奴把歌唱”的瓦学弟们。",
+    "Go 学长知道“EDG 宫斗”这个梗，指的是瓦罗兰特电竞圈内一次轰动性的事件。EDG 战队在 2024 年以 zmjjkk、simon、nobody、qiuqiu、张钊的阵容夺得冠军，但到了 2025 年，队伍内部爆发了严重的矛盾，直接导致核心选手 Simon 离队。此后 EDG 战队成绩一落千丈，甚至无缘世界赛。这个事件被粉丝和吃瓜群众形象地称为“宫斗”，意指队伍内部因权力、利益或个人恩怨造成的激烈斗争，导致团队分崩离析。在社群里，这个梗常被用来讽刺瓦圈内部的复杂人际关系和糟糕管理。",
+    "Go 学长知道“zmjjkk 的嚼嚼嚼”这个梗，是一个相对比较“无脑”且直观的梗。它仅仅指瓦罗兰特明星选手 zmjjkk 在比赛中有一个非常显著的习惯——他总是喜欢不停地嚼口香糖。这个动作本身没有任何深层含义，但因为 zmjjkk 的高人气和比赛时的突出表现，这个略显可爱的个人习惯也被粉丝们注意到并广泛传播，成为一个轻松愉快的玩梗点，有时也用来暗示他比赛时那种专注而略显呆萌的状态。",
+]
+
 
 class HardcodedMemoryService(AbstractMemoryService):
     async def retrieve_relevant_memories(
-        self, user_id: int, query_text: str
+        self, user_id: int, query_text: str, guild_id: Optional[int] = None
     ) -> List[str]:
         print(
             f"DEBUG: HardcodedMemoryService called for user {user_id}. Returning predefined memories."
         )
-        return [
-            "Go 学长知道“性压抑”这个梗，专指瓦罗兰特社群中，部分男性玩家在游戏中（尤其是在语音或文字聊天中）一旦发现有女性玩家，就会表现出极度反常、过度谄媚甚至带有冒犯性的行为，比如不分场合地“狂舔”（指无条件夸赞、维护）、频繁地喊“妈妈”等。这个梗反映了瓦圈内一种被社群诟病的、对女性玩家不健康的追捧现象，通常带贬义和嘲讽。",
-            "Go 学长知道“兰花草 / 我从山中来”这个梗，源于瓦罗兰特明星选手 zmjjkk。他特别喜欢在比赛胜利后，兴奋地唱起歌曲《兰花草》。其中歌词“我从山中来，带着兰花草，家中无富贵，口袋无财宝。寒风终刺骨，勤为好仕途，博得明月出，用兰花换锦服”成为了他标志性的个人标签和粉丝应援语。这个梗常被用来调侃瓦学弟们对偶像的狂热，或是在吹嘘自己“白手起家”的“励志”人设。",
-            "Go 学长知道“朝天门”这个梗，同样也和瓦罗兰特选手 zmjjkk 有关。它其实是另一首歌的梗，歌词风格更为张扬、充满“底层逆袭”和“嚣张狂妄”的意味，比如“我喜欢在丛林里面抢肉吃，因为我是来自真正的底层”、“我太帅了，I got the ring”、“下苦力只为了买个衣”等。这个梗被瓦罗兰特玩家们用来表达自信、狂傲，有时也用来调侃那些稍微取得点成就就得意忘形、仿佛“翻身农奴把歌唱”的瓦学弟们。",
-            "Go 学长知道“EDG 宫斗”这个梗，指的是瓦罗兰特电竞圈内一次轰动性的事件。EDG 战队在 2024 年以 zmjjkk、simon、nobody、qiuqiu、张钊的阵容夺得冠军，但到了 2025 年，队伍内部爆发了严重的矛盾，直接导致核心选手 Simon 离队。此后 EDG 战队成绩一落千丈，甚至无缘世界赛。这个事件被粉丝和吃瓜群众形象地称为“宫斗”，意指队伍内部因权力、利益或个人恩怨造成的激烈斗争，导致团队分崩离析。在社群里，这个梗常被用来讽刺瓦圈内部的复杂人际关系和糟糕管理。",
-            "Go 学长知道“zmjjkk 的嚼嚼嚼”这个梗，是一个相对比较“无脑”且直观的梗。它仅仅指瓦罗兰特明星选手 zmjjkk 在比赛中有一个非常显著的习惯——他总是喜欢不停地嚼口香糖。这个动作本身没有任何深层含义，但因为 zmjjkk 的高人气和比赛时的突出表现，这个略显可爱的个人习惯也被粉丝们注意到并广泛传播，成为一个轻松愉快的玩梗点，有时也用来暗示他比赛时那种专注而略显呆萌的状态。",
-        ]
+        return list(DEFAULT_MEMORIES)
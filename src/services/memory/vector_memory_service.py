@@ -0,0 +1,94 @@
+import asyncio
+import logging
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from src.services.embedding import AbstractEmbedder
+from .abstract_memory_service import AbstractMemoryService
+from .vector_store import MemoryRecord, VectorMemoryStore
+
+logger = logging.getLogger(__name__)
+
+
+class VectorMemoryService(AbstractMemoryService):
+    """
+    基于向量检索的长期记忆。
+
+    记忆和它们的向量保存在 `VectorMemoryStore` 中；检索时把用户当前说的话向量化，
+    在这个用户和这个服务器可见的记忆中取余弦相似度最高、且不低于 `min_score` 的 `limit` 条。
+    与写死的记忆不同，不相关的记忆不会被放进 prompt。
+
+    向量化器可以替换 (AbstractEmbedder)，默认使用离线的 HashingEmbedder。
+    默认的 `min_score` (0.15) 是在 HashingEmbedder 下对示例记忆测出来的：
+    相关的记忆大约在 0.16-0.39，无关的问题在 0.15 以下，区分度有限，更换向量化器后需要重新调整。
+
+    记忆库为空时，首次使用会把 `seed_memories` 作为所有人共享的记忆导入。
+    目前机器人不会自动写入新的记忆：只有 `add_memories` 能写入属于某个用户或服务器的记忆，
+    实际运行时记忆库里只有这些共享的示例记忆。
+    """
+
+    def __init__(
+        self,
+        store: VectorMemoryStore,
+        embedder: AbstractEmbedder,
+        limit: int = 5,
+        min_score: float = 0.15,
+        seed_memories: Sequence[str] = (),
+    ):
+        if embedder.dimension != store.dimension:
+            raise ValueError(
+                f"Embedder dimension {embedder.dimension} does not match the memory store ({store.dimension})."
+            )
+        self.store = store
+        self.embedder = embedder
+        self.limit = limit
+        self.min_score = min_score
+        self._seed_memories = list(seed_memories)
+        self._seed_lock = asyncio.Lock()
+
+    async def add_memories(
+        self,
+        texts: Sequence[str],
+        user_id: Optional[int] = None,
+        guild_id: Optional[int] = None,
+    ) -> int:
+        """
+        新增一批记忆。user_id / guild_id 为 None 时对所有用户 / 所有服务器可见。
+
+        Returns:
+            新增的记忆条数 (空白文本被忽略)。
+        """
+        texts = [t.strip() for t in texts if t and t.strip()]
+        if not texts:
+            return 0
+        vectors = np.asarray(await self.embedder.embed(texts), dtype=np.float32)
+        records = [MemoryRecord(text=t, user_id=user_id, guild_id=guild_id) for t in texts]
+        # 写文件和 fsync 放到线程中，不阻塞事件循环
+        await asyncio.to_thread(self.store.add, vectors, records)
+        return len(records)
+
+    async def retrieve_relevant_memories(
+        self, user_id: int, query_text: str, guild_id: Optional[int] = None
+    ) -> List[str]:
+        await self._ensure_seeded()
+        if not query_text.strip():
+            return []
+        query = np.asarray((await self.embedder.embed([query_text]))[0], dtype=np.float32)
+        hits = await asyncio.to_thread(
+            self.store.search, query, self.limit, user_id, guild_id, self.min_score
+        )
+        logger.debug(
+            f"Retrieved {len(hits)} memories for user {user_id}: "
+            + ", ".join(f"{hit.score:.2f}" for hit in hits)
+        )
+        return [hit.record.text for hit in hits]
+
+    async def _ensure_seeded(self) -> None:
+        if not self._seed_memories:
+            return
+        async with self._seed_lock:
+            if self._seed_memories and len(self.store) == 0:
+                added = await self.add_memories(self._seed_memories)
+                logger.info(f"Seeded the memory store with {added} shared memories.")
+            self._seed_memories = []
@@ -0,0 +1,210 @@
+import datetime
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 所有用户 / 所有服务器共享的记忆，在归属数组中记为 -1 (Discord ID 都是正数)
+_SHARED = -1
+
+
+@dataclass
+class MemoryRecord:
+    """一条记忆的文本和归属。user_id / guild_id 为 None 表示所有用户 / 所有服务器共享。"""
+
+    text: str
+    user_id: Optional[int] = None
+    guild_id: Optional[int] = None
+    created_at: datetime.datetime = field(
+        default_factory=lambda: datetime.datetime.now(datetime.timezone.utc)
+    )
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "text": self.text,
+                "user_id": self.user_id,
+                "guild_id": self.guild_id,
+                "created_at": self.created_at.isoformat(),
+            },
+            ensure_ascii=False,
+        )
+
+    @classmethod
+    def from_json(cls, line: str) -> "MemoryRecord":
+        data = json.loads(line)
+        return cls(
+            text=data["text"],
+            user_id=data["user_id"],
+            guild_id=data["guild_id"],
+            created_at=datetime.datetime.fromisoformat(data["created_at"]),
+        )
+
+
+@dataclass
+class MemoryHit:
+    """一条检索结果，score 为余弦相似度。"""
+
+    record: MemoryRecord
+    score: float
+
+
+def _ids(values: Sequence[Optional[int]]) -> np.ndarray:
+    return np.array([_SHARED if v is None else v for v in values], dtype=np.int64)
+
+
+def _scope_mask(ids: np.ndarray, value: Optional[int]) -> np.ndarray:
+    """共享的记忆总是可见；value 为 None 时只有共享的记忆可见。"""
+    if value is None:
+        return ids == _SHARED
+    return (ids == _SHARED) | (ids == value)
+
+
+class VectorMemoryStore:
+    """
+    记忆向量的本地存储与暴力 (brute-force) top-k 检索。
+
+    `directory` 下的文件：
+    - `vectors.f32`：float32 矩阵 (容量 × 维度)，按行连续存放，通过 `np.memmap` 映射到内存，
+      不需要在启动时整个读入；容量不足时按倍数扩大文件；
+    - `records.jsonl`：每行一条记忆的文本和归属，第 i 行对应矩阵的第 i 行，行数就是记忆条数；
+    - `store.json`：向量维度，换了不同维度的向量化器时拒绝打开，避免混用。
+
+    追加时先写向量再写记录，记录写完才算追加成功，因此进程在中途崩溃不会留下没有向量的记录。
+    检索时对可见范围内的所有向量做一次矩阵乘法得到余弦相似度，再用 `argpartition` 在 O(n) 内选出 top-k，
+    只对这 k 个结果排序。几十万条以内的记忆不需要近似索引。
+    """
+
+    VECTORS = "vectors.f32"
+    RECORDS = "records.jsonl"
+    HEADER = "store.json"
+
+    def __init__(self, directory: Path, dimension: int, initial_capacity: int = 1024):
+        self.directory = Path(directory)
+        self.dimension = dimension
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # 追加在线程中执行，锁保证追加互斥。检索不需要加锁：先读条数再读矩阵和归属数组，
+        # 数组只会被替换成更大的、并且条数以内的行在条数更新之前就已经写好
+        self._lock = threading.Lock()
+        self._check_dimension()
+        self._records = self._load_records()
+
+        vectors_path = self.directory / self.VECTORS
+        if not vectors_path.exists():
+            self._resize_file(max(initial_capacity, len(self._records)))
+        capacity = vectors_path.stat().st_size // (4 * dimension)
+        self._vectors = self._map(capacity)
+        self._users = np.full(capacity, _SHARED, dtype=np.int64)
+        self._guilds = np.full(capacity, _SHARED, dtype=np.int64)
+        count = len(self._records)
+        self._users[:count] = _ids([r.user_id for r in self._records])
+        self._guilds[:count] = _ids([r.guild_id for r in self._records])
+        logger.info(f"Loaded {count} memories from {self.directory}.")
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _check_dimension(self) -> None:
+        header = self.directory / self.HEADER
+        if header.exists():
+            stored = json.loads(header.read_text())["dimension"]
+            if stored != self.dimension:
+                raise ValueError(
+                    f"Memory store {self.directory} holds {stored}-dimensional vectors, "
+                    f"but the embedder produces {self.dimension}; rebuild the store or restore the old embedder."
+                )
+        else:
+            header.write_text(json.dumps({"dimension": self.dimension}))
+
+    def _load_records(self) -> List[MemoryRecord]:
+        path = self.directory / self.RECORDS
+        if not path.exists():
+            return []
+        data = path.read_bytes()
+        complete = data.rfind(b"\n") + 1
+        if complete < len(data):
+            # 上次追加写到一半：丢弃不完整的最后一行
+            logger.warning(f"Dropping a partially written memory record in {path}.")
+            with open(path, "r+b") as file:
+                file.truncate(complete)
+        return [MemoryRecord.from_json(line) for line in data[:complete].decode("utf-8").splitlines()]
+
+    def _resize_file(self, capacity: int) -> None:
+        # 扩大文件时新增的部分由文件系统填零
+        with open(self.directory / self.VECTORS, "ab") as file:
+            file.truncate(capacity * self.dimension * 4)
+
+    def _map(self, capacity: int) -> np.memmap:
+        return np.memmap(
+            self.directory / self.VECTORS, dtype=np.float32, mode="r+", shape=(capacity, self.dimension)
+        )
+
+    def _grow(self, needed: int) -> None:
+        capacity = max(needed, 2 * len(self._vectors))
+        self._vectors.flush()
+        self._resize_file(capacity)
+        # 正在进行的检索仍然持有旧的映射，旧映射在文件扩大后依然有效
+        self._vectors = self._map(capacity)
+        pad = np.full(capacity - len(self._users), _SHARED, dtype=np.int64)
+        self._users = np.concatenate([self._users, pad])
+        self._guilds = np.concatenate([self._guilds, pad])
+
+    def add(self, vectors: np.ndarray, records: Sequence[MemoryRecord]) -> None:
+        """追加一批记忆。`vectors` 的形状为 (len(records), dimension)，应当已经 L2 归一化。"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(records), self.dimension)
+        with self._lock:
+            start = len(self._records)
+            end = start + len(records)
+            if end > len(self._vectors):
+                self._grow(end)
+            self._vectors[start:end] = vectors
+            self._vectors.flush()
+            self._users[start:end] = _ids([r.user_id for r in records])
+            self._guilds[start:end] = _ids([r.guild_id for r in records])
+            with open(self.directory / self.RECORDS, "a", encoding="utf-8") as file:
+                file.write("".join(r.to_json() + "\n" for r in records))
+                file.flush()
+                os.fsync(file.fileno())
+            # 最后才更新条数，检索在此之前看不到这批记忆 (检索只读取它开始时的条数以内的记录)
+            self._records.extend(records)
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        user_id: Optional[int] = None,
+        guild_id: Optional[int] = None,
+        min_score: float = -1.0,
+    ) -> List[MemoryHit]:
+        """
+        返回与 `query` 余弦相似度最高、且不低于 `min_score` 的至多 k 条记忆 (从高到低)。
+        只在属于 `user_id` 和 `guild_id` (或共享) 的记忆中检索。
+        """
+        records = self._records
+        count = len(records)
+        vectors, users, guilds = self._vectors, self._users, self._guilds
+        if count == 0 or k <= 0:
+            return []
+
+        scores = vectors[:count] @ np.asarray(query, dtype=np.float32)
+        visible = _scope_mask(users[:count], user_id) & _scope_mask(guilds[:count], guild_id)
+        visible &= scores >= min_score
+        candidates = np.flatnonzero(visible)
+        if len(candidates) == 0:
+            return []
+        candidate_scores = scores[candidates]
+        if len(candidates) > k:
+            top = np.argpartition(-candidate_scores, k - 1)[:k]
+            candidates, candidate_scores = candidates[top], candidate_scores[top]
+        order = np.argsort(-candidate_scores, kind="stable")
+        return [MemoryHit(records[i], float(s)) for i, s in zip(candidates[order], candidate_scores[order])]
+
+    def close(self) -> None:
+        self._vectors.flush()
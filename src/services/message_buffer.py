@@ -0,0 +1,160 @@
+import logging
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Iterable, List, Optional
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+class _ChannelBuffer:
+    """单个频道最近的消息，按消息 ID (即时间) 从旧到新排列。"""
+
+    def __init__(self, capacity: int):
+        self.messages: Deque[discord.Message] = deque(maxlen=capacity)
+        # 缓冲区之外是否可能还有更早的消息 (被挤出、被删除或尚未从 REST 补齐)
+        self.has_older = True
+        # 是否已经用 REST 历史补齐过，补齐之后缓冲区里的消息是连续的
+        self.seeded = False
+
+    def append(self, message: discord.Message) -> None:
+        if self.messages and message.id <= self.messages[-1].id:
+            # 乱序到达 (极少见)：按 ID 插入到正确的位置
+            if any(m.id == message.id for m in self.messages):
+                return
+            ordered = sorted([*self.messages, message], key=lambda m: m.id)
+            self._replace(ordered)
+            return
+        if len(self.messages) == self.messages.maxlen:
+            self.has_older = True
+        self.messages.append(message)
+
+    def _replace(self, ordered: List[discord.Message]) -> None:
+        capacity = self.messages.maxlen
+        if len(ordered) > capacity:
+            self.has_older = True
+            ordered = ordered[-capacity:]
+        self.messages = deque(ordered, maxlen=capacity)
+
+
+class ChannelMessageBuffer:
+    """
+    按频道保存最近消息的本地环形缓冲区，用来代替每次 @ 都要发起的 `channel.history` REST 请求。
+
+    - ChatCog 把看到的每一条消息 (包括没有 @ 机器人的消息) 都写进来，并同步编辑和删除；
+    - 每个频道最多保存 `per_channel` 条消息，最多跟踪 `max_channels` 个频道，超出时按 LRU 淘汰；
+    - 冷启动 (频道还没用 REST 历史补齐过) 或者出现缺口 (删除、被挤出导致条数不够) 时，
+      `recent` 返回 None，调用方应回退到 REST 请求，并用 `seed` 把结果写回缓冲区；
+    - 重新连接网关 (可能错过了消息) 时调用 `clear` 丢弃全部缓冲。
+    """
+
+    def __init__(self, per_channel: int = 50, max_channels: int = 500):
+        self.per_channel = per_channel
+        self.max_channels = max_channels
+        self._channels: "OrderedDict[int, _ChannelBuffer]" = OrderedDict()
+
+        # 指标
+        self.hits = 0
+        self.cold_misses = 0
+        self.gap_misses = 0
+        self.evictions = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "channels": len(self._channels),
+            "hits": self.hits,
+            "cold_misses": self.cold_misses,
+            "gap_misses": self.gap_misses,
+            "evictions": self.evictions,
+        }
+
+    def _channel(self, channel_id: int, create: bool = False) -> Optional[_ChannelBuffer]:
+        buffer = self._channels.get(channel_id)
+        if buffer is not None:
+            self._channels.move_to_end(channel_id)
+            return buffer
+        if not create:
+            return None
+        buffer = self._channels[channel_id] = _ChannelBuffer(self.per_channel)
+        while len(self._channels) > self.max_channels:
+            self._channels.popitem(last=False)
+            self.evictions += 1
+        return buffer
+
+    def add(self, message: discord.Message) -> None:
+        """记录一条新消息。"""
+        self._channel(message.channel.id, create=True).append(message)
+
+    def update(self, message: discord.Message) -> None:
+        """用编辑后的消息替换缓冲区中的旧版本；不在缓冲区中的消息直接忽略。"""
+        buffer = self._channels.get(message.channel.id)
+        if buffer is None:
+            return
+        for index, existing in enumerate(buffer.messages):
+            if existing.id == message.id:
+                buffer.messages[index] = message
+                return
+
+    def delete(self, channel_id: int, message_ids: Iterable[int]) -> None:
+        """从缓冲区中移除被删除的消息。"""
+        buffer = self._channels.get(channel_id)
+        if buffer is None:
+            return
+        deleted = set(message_ids)
+        kept = [m for m in buffer.messages if m.id not in deleted]
+        if len(kept) != len(buffer.messages):
+            buffer.messages = deque(kept, maxlen=self.per_channel)
+
+    def clear(self) -> None:
+        """丢弃所有缓冲 (例如网关重新连接、可能错过了消息时)。"""
+        self._channels.clear()
+
+    def recent(
+        self, channel_id: int, before: discord.Message, limit: int
+    ) -> Optional[List[discord.Message]]:
+        """
+        返回 `before` 之前最近的 `limit` 条消息 (从新到旧，与 `channel.history` 一致)。
+
+        Returns:
+            消息列表；如果缓冲区无法保证结果完整 (冷启动或有缺口)，返回 None。
+        """
+        buffer = self._channel(channel_id)
+        if buffer is None or not buffer.seeded:
+            self.cold_misses += 1
+            return None
+
+        result = []
+        for message in reversed(buffer.messages):
+            if message.id >= before.id:
+                continue
+            result.append(message)
+            if len(result) == limit:
+                break
+
+        if len(result) < limit and buffer.has_older:
+            self.gap_misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def seed(
+        self,
+        channel_id: int,
+        history: List[discord.Message],
+        before: discord.Message,
+        limit: int,
+    ) -> None:
+        """
+        用 REST 获取到的历史 (`before` 之前最近的 `limit` 条，从新到旧) 补齐缓冲区。
+
+        REST 返回的消息紧挨着 `before`，而 `before` 之后的消息都由 `add` 实时写入，
+        因此合并后的缓冲区是连续的。
+        """
+        buffer = self._channel(channel_id, create=True)
+        merged = {m.id: m for m in history}
+        # 已经在缓冲区里的消息可能更新 (例如收到过编辑事件)，优先保留
+        merged.update({m.id: m for m in buffer.messages})
+        buffer.has_older = len(history) >= limit
+        buffer._replace(sorted(merged.values(), key=lambda m: m.id))
+        buffer.seeded = True
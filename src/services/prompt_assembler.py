@@ -0,0 +1,178 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from ..core.token_estimator import estimate_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+NO_MEMORY_PLACEHOLDER = "无相关记忆"
+EMBED_TRUNCATED_MARKER = "\n[提示：嵌入内容过长，已截断]"
+
+
+@dataclass
+class MessageParts:
+    """
+    一条消息中送入 LLM 的各个组成部分。
+    把正文和 embed 分开保存，预算不足时可以只截断 embed 部分。
+    """
+
+    author_name: str
+    content_text: str
+    embed_texts: List[str] = field(default_factory=list)
+
+    @property
+    def embed_text(self) -> str:
+        # 使用分隔符，以防一条消息有多个 embed
+        return "\n---\n".join(self.embed_texts)
+
+    def render(self, embed_text: Optional[str] = None) -> str:
+        """
+        渲染为最终格式："作者：文本内容\\n<格式化后的 embeds>"。
+
+        Args:
+            embed_text: 替换用的 embed 文本 (例如截断后的版本)，为空时使用原始 embed。
+        """
+        if embed_text is None:
+            embed_text = self.embed_text
+
+        final_message_parts = []
+        # 只有在文本内容确实存在时才添加
+        if self.content_text:
+            final_message_parts.append(self.content_text)
+        if embed_text:
+            final_message_parts.append(embed_text)
+
+        # 如果消息既没有文本也没有可解析的 embed（例如，只有文件附件），提供一个默认文本
+        if not final_message_parts:
+            return f"{self.author_name}: [发送了一个空消息或仅包含附件]"
+        return f"{self.author_name}: {'\n'.join(final_message_parts)}"
+
+
+@dataclass
+class AssembledContext:
+    """按 token 预算裁剪后的 prompt 动态部分，以及各部分的 token 用量。"""
+
+    short_term_memory: str
+    long_term_memory: str
+    current_input: str
+    token_budget: int
+    # 各部分的估算 token 数：static / user_info / short_term_memory / long_term_memory / current_input
+    section_tokens: Dict[str, int]
+    dropped_history: int = 0
+    dropped_memories: int = 0
+    embed_truncated: bool = False
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(self.section_tokens.values())
+
+
+class PromptAssembler:
+    """
+    带 token 预算的 prompt 组装器。
+
+    超出预算时按优先级依次裁剪：
+    1. 最旧的聊天历史；
+    2. 排名最低的长期记忆 (记忆服务按相关度从高到低返回)；
+    3. 当前消息中的 embed 正文。
+    prompt 的静态部分、用户信息和当前消息的正文始终保留。
+    """
+
+    def __init__(self, default_token_budget: int = 8000):
+        self.default_token_budget = default_token_budget
+
+    def assemble(
+        self,
+        static_tokens: int,
+        user_info: str,
+        history: Sequence[str],
+        memories: Sequence[str],
+        current_input: MessageParts,
+        token_budget: Optional[int] = None,
+    ) -> AssembledContext:
+        """
+        Args:
+            static_tokens: prompt 模板静态部分 (角色描述、示例对话等) 的 token 数。
+            user_info: 用户信息。
+            history: 格式化后的聊天历史，从旧到新排列。
+            memories: 长期记忆，按相关度从高到低排列。
+            current_input: 当前消息。
+            token_budget: 本次请求的 token 预算，为空时使用默认预算。
+        """
+        budget = token_budget or self.default_token_budget
+
+        user_info_tokens = estimate_tokens(user_info)
+        head_tokens = estimate_tokens(current_input.render(embed_text=""))
+        embed_text = current_input.embed_text
+        embed_tokens = estimate_tokens(embed_text)
+        history_tokens = [estimate_tokens(line) for line in history]
+        memory_tokens = [estimate_tokens(f"- {mem}") for mem in memories]
+
+        available = budget - static_tokens - user_info_tokens - head_tokens
+        used = sum(history_tokens) + sum(memory_tokens) + embed_tokens
+
+        # 1. 从最旧的一条开始丢弃聊天历史
+        dropped_history = 0
+        while used > available and dropped_history < len(history_tokens):
+            used -= history_tokens[dropped_history]
+            dropped_history += 1
+
+        # 2. 从排名最低的一条开始丢弃长期记忆
+        kept_memories = len(memory_tokens)
+        while used > available and kept_memories > 0:
+            kept_memories -= 1
+            used -= memory_tokens[kept_memories]
+
+        # 3. 截断当前消息的 embed 正文
+        embed_truncated = False
+        if used > available and embed_text:
+            # 记忆被全部丢弃后会换成占位文本；再预留正文与 embed 之间的换行符
+            placeholder_tokens = 0 if kept_memories else estimate_tokens(NO_MEMORY_PLACEHOLDER)
+            embed_budget = max(
+                available
+                - (used - embed_tokens)
+                - placeholder_tokens
+                - estimate_tokens(EMBED_TRUNCATED_MARKER)
+                - 1,
+                0,
+            )
+            embed_text = truncate_to_tokens(embed_text, embed_budget) + EMBED_TRUNCATED_MARKER
+            embed_truncated = True
+
+        kept_history = list(history[dropped_history:])
+        kept_memory_list = list(memories[:kept_memories])
+        short_term_memory = "\n".join(kept_history)
+        long_term_memory = (
+            "\n".join([f"- {mem}" for mem in kept_memory_list])
+            if kept_memory_list
+            else NO_MEMORY_PLACEHOLDER
+        )
+        current = current_input.render(embed_text=embed_text)
+
+        assembled = AssembledContext(
+            short_term_memory=short_term_memory,
+            long_term_memory=long_term_memory,
+            current_input=current,
+            token_budget=budget,
+            section_tokens={
+                "static": static_tokens,
+                "user_info": user_info_tokens,
+                "short_term_memory": sum(history_tokens[dropped_history:]),
+                "long_term_memory": (
+                    sum(memory_tokens[:kept_memories])
+                    if kept_memories
+                    else estimate_tokens(NO_MEMORY_PLACEHOLDER)
+                ),
+                "current_input": estimate_tokens(current),
+            },
+            dropped_history=dropped_history,
+            dropped_memories=len(memory_tokens) - kept_memories,
+            embed_truncated=embed_truncated,
+        )
+        if assembled.dropped_history or assembled.dropped_memories or embed_truncated:
+            logger.info(
+                f"Prompt trimmed to fit budget {budget}: dropped {assembled.dropped_history} history "
+                f"message(s), {assembled.dropped_memories} memory(ies), embed truncated={embed_truncated}."
+            )
+        return assembled
@@ -0,0 +1,291 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Set
+
+from .llm.abstract_llm_client import AbstractLLMClient, LLMClientError, TokenUsage
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(LLMClientError):
+    """熔断器处于打开状态 (服务商被判定为不可用) 时抛出，调用会立即失败。"""
+
+    pass
+
+
+@dataclass
+class RetryPolicy:
+    """
+    带抖动的指数退避重试策略。
+
+    第 n 次重试前等待 `uniform(0, min(max_delay, base_delay * 2**n))` 秒 ("full jitter")，
+    避免大量请求在同一时刻一起重试。
+    """
+
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+
+    def backoff(self, retry_number: int, rng: random.Random) -> float:
+        return rng.uniform(0, min(self.max_delay, self.base_delay * (2**retry_number)))
+
+
+class CircuitBreaker:
+    """
+    简单的三态熔断器。
+
+    - closed：正常放行；连续失败达到 `failure_threshold` 次后进入 open；
+    - open：所有调用立即失败，`recovery_timeout` 秒后进入 half-open；
+    - half-open：只放行一个试探请求，成功则回到 closed，失败则重新 open。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_in_progress = False
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.recovery_timeout:
+            return self.HALF_OPEN
+        return self._state
+
+    def before_call(self) -> None:
+        """
+        在每次调用之前检查是否放行。
+
+        Raises:
+            CircuitOpenError: 熔断器打开，或者半开状态下已有试探请求在进行。
+        """
+        state = self.state
+        if state == self.CLOSED:
+            return
+        if state == self.HALF_OPEN and not self._trial_in_progress:
+            self._state = self.HALF_OPEN
+            self._trial_in_progress = True
+            return
+        raise CircuitOpenError("LLM provider circuit is open, failing fast.")
+
+    def record_success(self) -> None:
+        if self._state != self.CLOSED:
+            logger.info("LLM circuit breaker closed again after a successful trial call.")
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._trial_in_progress = False
+
+    def abandon(self) -> None:
+        """
+        调用被取消，或者因为请求本身的问题失败 (既不算成功也不算失败) 时调用，
+        让半开状态可以发起新的试探请求。
+        """
+        self._trial_in_progress = False
+
+    def record_failure(self) -> None:
+        self._consecutive_failures += 1
+        self._trial_in_progress = False
+        if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                logger.warning(
+                    f"LLM circuit breaker opened after {self._consecutive_failures} consecutive failure(s)."
+                )
+            self._state = self.OPEN
+            self._opened_at = self._clock()
+
+
+class ResilientLLMClient(AbstractLLMClient):
+    """
+    为 LLM 客户端增加韧性的包装层，对外提供与被包装客户端相同的接口。
+
+    - 对可重试的错误 (`LLMClientError.retryable`) 做带抖动的指数退避重试；
+    - 通过熔断器在服务商持续故障时快速失败，而不是让每个请求都等到超时 (只有可重试的错误计入熔断)；
+    - (可选) 对冲请求：第一个请求耗时超过近期 p95 延迟时，再发一个相同的请求，
+      取先成功返回的结果，另一个被取消。以少量额外调用换取更低的长尾延迟。
+
+    流式接口只在产出第一块文本之前重试，且不做对冲，避免向用户重复输出内容。
+    """
+
+    def __init__(
+        self,
+        client: AbstractLLMClient,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        hedge_enabled: bool = False,
+        hedge_min_samples: int = 20,
+        hedge_percentile: float = 0.95,
+        latency_window: int = 200,
+        rng: Optional[random.Random] = None,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            client: 被包装的 LLM 后端 (例如 GeminiClient 或 FakeLLMClient)。
+            retry_policy: 重试策略，为空时使用默认策略。
+            circuit_breaker: 熔断器，为空时使用默认参数创建。
+            hedge_enabled: 是否启用对冲请求。
+            hedge_min_samples: 启用对冲前至少需要的延迟样本数。
+            hedge_percentile: 触发对冲的延迟分位数。
+            latency_window: 用于计算分位数的最近成功请求数。
+        """
+        # 不调用 super().__init__()：token 用量直接读取被包装后端的记录
+        self.client = client
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.hedge_enabled = hedge_enabled
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_percentile = hedge_percentile
+        self._latencies: Deque[float] = deque(maxlen=latency_window)
+        self._rng = rng or random.Random()
+        self._sleep = sleep
+        self._clock = clock
+
+        # 指标
+        self.calls = 0
+        self.retries = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    @property
+    def stats(self) -> Dict[str, object]:
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "circuit_state": self.circuit_breaker.state,
+            "hedge_delay": self._hedge_delay(),
+        }
+
+    @property
+    def last_usage(self) -> TokenUsage:
+        """token 用量由被包装的后端记录，重试和对冲产生的调用也会计入。"""
+        return self.client.last_usage
+
+    @property
+    def total_usage(self) -> TokenUsage:
+        return self.client.total_usage
+
+    async def generate_text(self, prompt: str) -> str:
+        """带重试、熔断和 (可选) 对冲的 `generate_text`。"""
+        self.calls += 1
+        attempts = self.retry_policy.max_attempts
+        attempt = 0
+        while True:
+            self.circuit_breaker.before_call()
+            try:
+                text = await self._call_with_hedge(prompt)
+            except LLMClientError as e:
+                self._record_error(e)
+                if not e.retryable or attempt == attempts - 1:
+                    raise
+                await self._backoff(attempt, e)
+                attempt += 1
+            except BaseException:
+                # 被取消，或者后端抛出了意料之外的异常：不说明服务商是否可用，
+                # 但必须释放半开状态的试探名额，否则熔断器会一直拒绝请求
+                self.circuit_breaker.abandon()
+                raise
+            else:
+                self.circuit_breaker.record_success()
+                return text
+
+    async def generate_text_stream(self, prompt: str) -> AsyncIterator[str]:
+        """带重试和熔断的流式生成；一旦产出过文本就不再重试。"""
+        self.calls += 1
+        attempts = self.retry_policy.max_attempts
+        for attempt in range(attempts):
+            self.circuit_breaker.before_call()
+            produced_any = False
+            try:
+                async for chunk in self.client.generate_text_stream(prompt):
+                    produced_any = True
+                    yield chunk
+            except LLMClientError as e:
+                self._record_error(e)
+                if produced_any or not e.retryable or attempt == attempts - 1:
+                    raise
+                await self._backoff(attempt, e)
+            except BaseException:
+                # 调用方被取消或提前关闭了流 (GeneratorExit)，或者后端抛出了意料之外的异常：
+                # 同样只释放半开状态的试探名额
+                self.circuit_breaker.abandon()
+                raise
+            else:
+                self.circuit_breaker.record_success()
+                return
+
+    def _record_error(self, error: LLMClientError) -> None:
+        """
+        只有可重试的错误 (限流、超时、5xx 等) 说明服务商可能不可用，计入熔断器。
+        安全拦截、空响应、400 等不可重试的错误是这个请求本身的问题，
+        否则一批被拦截的 prompt 就会让所有用户的请求都被熔断。
+        """
+        if error.retryable:
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.abandon()
+
+    async def _backoff(self, attempt: int, error: LLMClientError) -> None:
+        delay = self.retry_policy.backoff(attempt, self._rng)
+        self.retries += 1
+        logger.warning(
+            f"Retryable LLM error (attempt {attempt + 1}/{self.retry_policy.max_attempts}), "
+            f"retrying in {delay:.2f}s: {error}"
+        )
+        await self._sleep(delay)
+
+    def _hedge_delay(self) -> Optional[float]:
+        """返回触发对冲的等待时间 (近期延迟的 p95)，样本不足时返回 None。"""
+        if not self.hedge_enabled or len(self._latencies) < self.hedge_min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(self.hedge_percentile * len(ordered)))
+        return ordered[index]
+
+    async def _call_with_hedge(self, prompt: str) -> str:
+        started = self._clock()
+        hedge_delay = self._hedge_delay()
+        primary = asyncio.create_task(self.client.generate_text(prompt))
+        tasks: Set[asyncio.Task] = {primary}
+        try:
+            if hedge_delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+                if not done:
+                    self.hedged += 1
+                    tasks.add(asyncio.create_task(self.client.generate_text(prompt)))
+
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_wins += 1
+                        self._latencies.append(self._clock() - started)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
@@ -0,0 +1,183 @@
+import logging
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .embedding import AbstractEmbedder, HashingEmbedder, cosine_similarity
+
+logger = logging.getLogger(__name__)
+
+# 提及 (@某人) 以及首尾的标点和语气符号，不影响问题本身的含义
+_MENTION_PATTERN = re.compile(r"@\S+")
+_EDGE_PUNCTUATION = "?？!！。.,，~～、…:：;；\"'“”‘’()（）[]【】 "
+
+# 出现这些指代或承接上文的词时，回答通常依赖短期上下文，不能复用给别人
+_CONTEXT_DEPENDENT_MARKERS = (
+    "上面", "楼上", "刚才", "刚刚", "前面", "之前", "上一条", "这个", "那个", "这条",
+    "那条", "这张", "那张", "这些", "那些", "他", "她", "它", "他们", "继续", "然后呢",
+    "还有呢", "你说的", "你刚",
+)
+_CONTEXT_DEPENDENT_WORDS = re.compile(r"\b(it|this|that|these|those|above|he|she|they)\b")
+
+# 问到提问者自己 (“我是谁”“你记得我吗”) 时，回答依赖 prompt 中提问者的成员信息，不能复用给别人
+_PERSONAL_MARKERS = ("我", "咱", "俺")
+_PERSONAL_WORDS = re.compile(r"\b(i|me|my|mine|myself)\b")
+
+# 否定词：字符 n-gram 的相似度几乎不受多一个“不”字影响，但问题的意思完全相反，
+# 因此两个问题中否定词的出现次数不同时不做相似匹配
+_NEGATIONS = ("不", "没", "别", "非", "无", "未", "not", "n't")
+
+
+@dataclass
+class _CacheEntry:
+    character: str
+    normalized_input: str
+    vector: List[float]
+    response: str
+    expires_at: float
+
+
+class ResponseCache:
+    """
+    语义响应缓存：相同 (或几乎相同) 的问题直接复用之前的回答，省去一次完整的 LLM 调用。
+
+    - 键为 (角色名，归一化后的用户输入)：社群里反复被问到的问题，不同的人问也复用同一个回答；
+    - 先做精确匹配，未命中时再用 embedding 余弦相似度在同一角色的缓存条目中查找，
+      相似度不低于 `similarity_threshold` 且否定词一致时视为命中。默认的哈希向量化器只比较字面，
+      “今天天气怎么样”和“明天天气怎么样”的相似度也有 0.85，因此阈值默认为 0.95，
+      只匹配多一个语气词、标点之类几乎相同的问题；换用真正的语义向量化器时可以适当调低；
+    - 每个条目有 TTL，总条目数超过 `max_entries` 时按 LRU 淘汰；
+    - 依赖短期上下文的问题 (含“上面”“这个”“他”等指代词) 和问到提问者自己的问题
+      (含“我”，回答依赖 prompt 中提问者的成员信息) 不会被缓存。
+    """
+
+    def __init__(
+        self,
+        embedder: Optional[AbstractEmbedder] = None,
+        ttl: float = 3600.0,
+        max_entries: int = 512,
+        similarity_threshold: float = 0.95,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.embedder = embedder or HashingEmbedder()
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self._clock = clock
+        self._entries: "OrderedDict[Tuple[str, str], _CacheEntry]" = OrderedDict()
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """归一化用户输入：全半角统一、去掉提及、合并空白、去掉首尾标点、小写。"""
+        text = unicodedata.normalize("NFKC", text)
+        text = _MENTION_PATTERN.sub(" ", text)
+        text = " ".join(text.split())
+        return text.strip(_EDGE_PUNCTUATION).lower()
+
+    @staticmethod
+    def is_context_dependent(normalized_input: str) -> bool:
+        """判断问题是否依赖短期上下文 (指代上文的内容)。"""
+        if any(marker in normalized_input for marker in _CONTEXT_DEPENDENT_MARKERS):
+            return True
+        return bool(_CONTEXT_DEPENDENT_WORDS.search(normalized_input))
+
+    @staticmethod
+    def is_personal(normalized_input: str) -> bool:
+        """判断问题是否问到提问者自己 (回答依赖提问者的成员信息)。"""
+        if any(marker in normalized_input for marker in _PERSONAL_MARKERS):
+            return True
+        return bool(_PERSONAL_WORDS.search(normalized_input))
+
+    def cache_key_for(self, user_input: str) -> Optional[str]:
+        """
+        返回用于缓存的归一化输入；如果这个输入不适合缓存 (过短、依赖上下文或问到提问者自己)，返回 None。
+        """
+        normalized = self.normalize(user_input)
+        if (
+            len(normalized) < 2
+            or self.is_context_dependent(normalized)
+            or self.is_personal(normalized)
+        ):
+            return None
+        return normalized
+
+    @staticmethod
+    def _negations(normalized_input: str) -> Tuple[int, ...]:
+        return tuple(normalized_input.count(word) for word in _NEGATIONS)
+
+    async def get(self, character: str, normalized_input: str) -> Optional[str]:
+        """查找缓存的回答：先精确匹配，再按 embedding 相似度匹配。"""
+        now = self._clock()
+        key = (character, normalized_input)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires_at > now:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry.response
+            del self._entries[key]
+
+        best_key, best_score = None, self.similarity_threshold
+        query_vector = None
+        negations = self._negations(normalized_input)
+        for candidate_key, candidate in list(self._entries.items()):
+            if candidate.character != character:
+                continue
+            if candidate.expires_at <= now:
+                del self._entries[candidate_key]
+                continue
+            if self._negations(candidate.normalized_input) != negations:
+                continue
+            if query_vector is None:
+                query_vector = (await self.embedder.embed([normalized_input]))[0]
+            score = cosine_similarity(query_vector, candidate.vector)
+            if score >= best_score:
+                best_key, best_score = candidate_key, score
+
+        if best_key is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(best_key)
+        self.semantic_hits += 1
+        logger.info(
+            f"Semantic response cache hit (similarity {best_score:.3f}): "
+            f"'{normalized_input[:50]}' ~ '{best_key[1][:50]}'"
+        )
+        return self._entries[best_key].response
+
+    async def put(self, character: str, normalized_input: str, response: str) -> None:
+        """缓存一条回答。"""
+        if not response:
+            return
+        vector = (await self.embedder.embed([normalized_input]))[0]
+        key = (character, normalized_input)
+        self._entries[key] = _CacheEntry(
+            character=character,
+            normalized_input=normalized_input,
+            vector=vector,
+            response=response,
+            expires_at=self._clock() + self.ttl,
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Awaitable, Callable, Dict, Hashable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    在途请求去重 (single-flight)。
+
+    相同键的调用如果已经有一个正在进行，后来的调用者不会再发起新的请求，
+    而是等待正在进行的那一个，并共享它的结果 (或异常)。
+    如果领头的调用被取消，等待者会自己重新发起调用，而不是跟着被取消。
+
+    AIService 以完整 prompt 的哈希为键，因此只合并完全相同的请求：prompt 中包含提问者的成员信息
+    和频道历史，不同用户问同样的问题不会合并 (回答是针对提问者生成的，本来也不能共享)。
+    能合并的是同一个请求被并发地重复提交，例如同一条消息同时经过没有 IdempotencyGuard 保护的调用方；
+    重复投递的网关消息已经由 ChatCog 中的 IdempotencyGuard 挡掉。
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._in_flight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
+
+    @staticmethod
+    def key_for(prompt: str) -> str:
+        """用 prompt 的哈希作为去重键，避免在内存中保存多份完整的 prompt。"""
+        return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """执行 `fn()`；如果相同键的调用已在进行，则等待并共享其结果。"""
+        while True:
+            future = self._in_flight.get(key)
+            if future is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                # 领头的调用被取消了：重新竞争，由某个等待者接手
+
+        future = self._lead(key)
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._fail(key, future, e)
+            raise
+        self._succeed(key, future, result)
+        return result
+
+    async def stream(
+        self, key: Hashable, factory: Callable[[], AsyncIterator[str]]
+    ) -> AsyncIterator[str]:
+        """
+        流式版本的 `do`：领头的调用者逐块产出文本；
+        等待者在领头者完成后一次性拿到完整文本。
+        """
+        while True:
+            future = self._in_flight.get(key)
+            if future is None:
+                break
+            self.coalesced += 1
+            try:
+                yield await asyncio.shield(future)
+                return
+            except asyncio.CancelledError:
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        future = self._lead(key)
+        chunks = []
+        try:
+            async for chunk in factory():
+                chunks.append(chunk)
+                yield chunk
+        except BaseException as e:
+            self._fail(key, future, e)
+            raise
+        self._succeed(key, future, "".join(chunks))
+
+    def _lead(self, key: Hashable) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        self.leaders += 1
+        return future
+
+    def _succeed(self, key: Hashable, future: asyncio.Future, result) -> None:
+        self._in_flight.pop(key, None)
+        future.set_result(result)
+
+    def _fail(self, key: Hashable, future: asyncio.Future, error: BaseException) -> None:
+        self._in_flight.pop(key, None)
+        if isinstance(error, (asyncio.CancelledError, GeneratorExit)):
+            future.cancel()
+        else:
+            future.set_exception(error)
+            # 标记异常已被读取，没有等待者时也不会产生 "exception was never retrieved" 警告
+            future.exception()
+
+
+class IdempotencyGuard:
+    """
+    按 Discord 消息 ID 记录已处理过的消息。
+
+    网关重连后可能会重复投递同一条消息；同一个 ID 在 `ttl` 秒内只会被认领一次，
+    从而保证同一条消息不会触发第二次生成。记录数量有上限，超出时淘汰最旧的记录。
+    """
+
+    def __init__(
+        self,
+        ttl: float = 600.0,
+        max_entries: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._seen: "OrderedDict[int, float]" = OrderedDict()
+        self.duplicates = 0
+
+    def claim(self, message_id: int) -> bool:
+        """
+        认领一条消息。
+
+        Returns:
+            第一次看到这条消息时返回 True；重复投递时返回 False。
+        """
+        now = self._clock()
+        # 清理过期记录 (OrderedDict 按认领时间排序，只需从头部检查)
+        while self._seen:
+            oldest_id, claimed_at = next(iter(self._seen.items()))
+            if now - claimed_at < self.ttl:
+                break
+            del self._seen[oldest_id]
+
+        if message_id in self._seen:
+            self.duplicates += 1
+            logger.info(f"Ignoring duplicate delivery of message {message_id}.")
+            return False
+
+        self._seen[message_id] = now
+        if len(self._seen) > self.max_entries:
+            self._seen.popitem(last=False)
+        return True
@@ -5,3 +5,272 @@ import pytest
 def test_placeholder():
     """A placeholder test to ensure the file is picked up by pytest."""
     assert True
+
+
+# --- ChatCog 流式回复流程 ---
+from unittest.mock import AsyncMock, MagicMock
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.cogs.chat_cog import ChatCog
+
+
+def make_mention(bot_user: MagicMock) -> MagicMock:
+    """创建一条提及机器人的模拟消息。"""
+    message = MagicMock()
+    message.author.bot = False
+    message.author.name = "tester"
+    message.clean_content = "@bot 你好"
+    message.posted = MagicMock(edit=AsyncMock())
+    message.reply = AsyncMock(return_value=message.posted)
+    typing_cm = MagicMock()
+    typing_cm.__aenter__ = AsyncMock()
+    typing_cm.__aexit__ = AsyncMock(return_value=False)
+    message.channel.typing.return_value = typing_cm
+    bot_user.mentioned_in.return_value = True
+    return message
+
+
+def make_cog(chunks=None, error=None) -> ChatCog:
+    bot = MagicMock()
+    ai_service = MagicMock()
+
+    async def fake_stream(message, preceding=()):
+        for chunk in chunks or []:
+            yield chunk
+        if error:
+            raise error
+
+    ai_service.generate_response_stream = fake_stream
+    return ChatCog(bot=bot, ai_service=ai_service, stream_edit_interval=0)
+
+
+@pytest.mark.asyncio
+async def test_on_message_streams_reply():
+    """【单元测试】提及机器人时，流式输出被渐进地发送为回复。"""
+    cog = make_cog(chunks=["你好", "呀"])
+    message = make_mention(cog.bot.user)
+
+    await cog.on_message(message)
+
+    message.reply.assert_awaited_once_with("你好")
+    message.posted.edit.assert_awaited_once_with(content="你好呀")
+
+
+@pytest.mark.asyncio
+async def test_on_message_empty_stream_sends_fallback():
+    """【单元测试】服务层没有产出任何文本时，回复一条兜底消息。"""
+    cog = make_cog(chunks=[])
+    message = make_mention(cog.bot.user)
+
+    await cog.on_message(message)
+
+    message.reply.assert_awaited_once_with("我好像没什么好说的了，换个话题试试？")
+
+
+@pytest.mark.asyncio
+async def test_on_message_error_sends_friendly_message():
+    """【单元测试】服务层抛出异常时，回复友好的错误提示。"""
+    cog = make_cog(error=RuntimeError("boom"))
+    message = make_mention(cog.bot.user)
+
+    await cog.on_message(message)
+
+    assert "大脑好像短路了" in message.reply.await_args.args[0]
+
+
+@pytest.mark.asyncio
+async def test_on_message_ignores_bots():
+    """【单元测试】忽略其他机器人发送的消息。"""
+    cog = make_cog(chunks=["不应该出现"])
+    message = make_mention(cog.bot.user)
+    message.author.bot = True
+
+    await cog.on_message(message)
+
+    message.reply.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_on_message_busy_replies_fast():
+    """【单元测试】LLM 队列已满时，回复“忙”的提示而不是错误提示。"""
+    from src.services.llm_scheduler import LLMBusyError
+
+    cog = make_cog(error=LLMBusyError("full"))
+    message = make_mention(cog.bot.user)
+
+    await cog.on_message(message)
+
+    assert "有点忙" in message.reply.await_args.args[0]
+
+
+@pytest.mark.asyncio
+async def test_on_message_ignores_duplicate_delivery():
+    """【单元测试】同一条消息被重复投递时，只生成一次回复。"""
+    cog = make_cog(chunks=["你好"])
+    message = make_mention(cog.bot.user)
+    message.id = 12345
+
+    await cog.on_message(message)
+    await cog.on_message(message)
+
+    message.reply.assert_awaited_once()
+    assert cog.idempotency_guard.duplicates == 1
+
+
+@pytest.mark.asyncio
+async def test_on_message_records_request_trace():
+    """【单元测试】每次处理 @ 都会生成一条计时记录，包含 Discord 发送阶段。"""
+    cog = make_cog(chunks=["你好"])
+    message = make_mention(cog.bot.user)
+
+    await cog.on_message(message)
+
+    assert cog.tracer.requests == 1
+    assert "discord_send" in cog.tracer.stats["stage_avg"]
+
+
+@pytest.mark.asyncio
+async def test_message_buffer_tracks_messages_edits_and_deletes():
+    """【单元测试】所有消息 (包括没有 @ 的) 都写入缓冲区，并同步编辑和删除。"""
+    from types import SimpleNamespace
+    from src.services.message_buffer import ChannelMessageBuffer
+
+    cog = make_cog()
+    cog.message_buffer = ChannelMessageBuffer()
+    cog.bot.user.mentioned_in.return_value = False
+    channel = SimpleNamespace(id=1)
+
+    def plain(message_id, content):
+        m = MagicMock(id=message_id, channel=channel)
+        m.author.bot = False
+        m.clean_content = content
+        return m
+
+    await cog.on_message(plain(1, "旧内容"))
+    await cog.on_message(plain(2, "另一条"))
+    await cog.on_message_edit(None, plain(1, "新内容"))
+    await cog.on_raw_message_delete(SimpleNamespace(channel_id=1, message_ids=None, message_id=2))
+
+    buffered = list(cog.message_buffer._channels[1].messages)
+    assert [m.clean_content for m in buffered] == ["新内容"]
+
+
+@pytest.mark.asyncio
+async def test_message_update_evicts_formatted_text():
+    """【单元测试】消息更新事件 (例如链接预览展开，edited_at 不变) 会丢弃这条消息缓存的格式化结果。"""
+    from types import SimpleNamespace
+    from src.services.format_cache import FormattedMessageCache
+
+    cog = make_cog()
+    cog.format_cache = FormattedMessageCache()
+    message = SimpleNamespace(id=1, edited_at=None, author=SimpleNamespace(display_name="A"))
+    cog.format_cache.put(message, "A: https://example.com")
+
+    await cog.on_raw_message_edit(SimpleNamespace(message_id=1, channel_id=10))
+
+    assert cog.format_cache.get(message) is None
+
+
+@pytest.mark.asyncio
+async def test_rapid_mentions_are_answered_once():
+    """【单元测试】开启合并窗口后，同一用户的连续 @ 只回复一次，回复最后一条消息。"""
+    import asyncio
+
+    bot = MagicMock()
+    calls = []
+
+    async def fake_stream(message, preceding=()):
+        calls.append((message, list(preceding)))
+        yield "一起回答"
+
+    ai_service = MagicMock()
+    ai_service.generate_response_stream = fake_stream
+    cog = ChatCog(bot=bot, ai_service=ai_service, stream_edit_interval=0, debounce_window=0.02)
+
+    first, second = make_mention(bot.user), make_mention(bot.user)
+    for m in (first, second):
+        m.channel.id, m.author.id = 1, 2
+    await cog.on_message(first)
+    await cog.on_message(second)
+    await asyncio.sleep(0.06)
+
+    assert calls == [(second, [first])]
+    second.reply.assert_awaited_once()
+    first.reply.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_superseded_generation_deletes_its_partial_reply():
+    """【单元测试】生成进行中同一用户又 @ 了一次：已经发出的不完整回复被删除，合并后的一批重新完整回复。"""
+    import asyncio
+
+    bot = MagicMock()
+    release = asyncio.Event()
+
+    async def fake_stream(message, preceding=()):
+        yield f"回答{len(preceding) + 1}条"
+        await release.wait()
+        yield "，完"
+
+    ai_service = MagicMock()
+    ai_service.generate_response_stream = fake_stream
+    cog = ChatCog(bot=bot, ai_service=ai_service, stream_edit_interval=0, debounce_window=0.02)
+
+    first, second = make_mention(bot.user), make_mention(bot.user)
+    for m in (first, second):
+        m.channel.id, m.author.id = 1, 2
+        m.posted.delete = AsyncMock()
+    await cog.on_message(first)
+    await asyncio.sleep(0.01)
+    first.reply.assert_awaited_once_with("回答1条")
+
+    await cog.on_message(second)
+    await asyncio.sleep(0.01)
+    first.posted.delete.assert_awaited_once()
+
+    release.set()
+    await asyncio.sleep(0.05)
+    second.reply.assert_awaited_once_with("回答2条")
+    second.posted.edit.assert_awaited_once_with(content="回答2条，完")
+    second.posted.delete.assert_not_awaited()
+    await cog.cog_unload()
+
+
+@pytest.mark.asyncio
+async def test_every_message_is_recorded_through_event_writer():
+    """【单元测试】所有消息 (包括没有 @ 和机器人发出的) 都交给事件写入器记录。"""
+    cog = make_cog()
+    cog.event_writer = MagicMock(record=AsyncMock())
+    cog.bot.user.mentioned_in.return_value = False
+
+    for message_id, is_bot in ((1, False), (2, True)):
+        message = MagicMock(id=message_id)
+        message.author.bot = is_bot
+        await cog.on_message(message)
+
+    recorded = [call.args[0].event_id for call in cog.event_writer.record.await_args_list]
+    assert recorded == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_full_event_queue_does_not_delay_replies():
+    """【单元测试】@ 消息先开始回复再记录事件，写入队列满时的背压不会推迟回复。"""
+    cog = make_cog(chunks=["你好"])
+    message = make_mention(cog.bot.user)
+    message.id = 7
+    order = []
+
+    async def record(event):
+        order.append(("recorded", message.reply.await_count))
+
+    cog.event_writer = MagicMock(record=AsyncMock(side_effect=record))
+
+    await cog.on_message(message)
+
+    # 记录事件时回复已经发出
+    assert order == [("recorded", 1)]
+    assert cog.event_writer.record.await_args.args[0].event_id == 7
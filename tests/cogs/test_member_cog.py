@@ -0,0 +1,86 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+# 确保测试可以找到src目录下的模块
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.cogs.member_cog import MemberCog
+
+
+def user(name="alice", global_name="Alice", display_name="Alice", user_id=1):
+    return SimpleNamespace(id=user_id, name=name, global_name=global_name, display_name=display_name)
+
+
+@pytest.mark.asyncio
+async def test_member_update_invalidates_changed_member():
+    """【单元测试】全局显示名称变化时丢弃该成员的缓存快照；只改服务器昵称时保留 (昵称不保存在 members 表中)。"""
+    member_service = MagicMock()
+    cog = MemberCog(bot=MagicMock(), member_service=member_service)
+
+    await cog.on_member_update(user(), user(display_name="Queen Alice"))
+    member_service.invalidate.assert_not_called()
+
+    await cog.on_member_update(user(), user(global_name="Queen Alice"))
+    member_service.invalidate.assert_called_once_with(1)
+
+
+@pytest.mark.asyncio
+async def test_unrelated_updates_keep_the_cache():
+    """【单元测试】名字没有变化的更新 (例如角色、头像变化) 不会丢弃缓存。"""
+    member_service = MagicMock()
+    cog = MemberCog(bot=MagicMock(), member_service=member_service)
+
+    await cog.on_member_update(user(), user())
+    await cog.on_user_update(user(), user())
+
+    member_service.invalidate.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_user_update_invalidates_renamed_user():
+    """【单元测试】用户名变化时丢弃该用户的缓存快照。"""
+    member_service = MagicMock()
+    cog = MemberCog(bot=MagicMock(), member_service=member_service)
+
+    await cog.on_user_update(user(), user(name="alice2"))
+
+    member_service.invalidate.assert_called_once_with(1)
+
+
+@pytest.mark.asyncio
+async def test_guilds_are_synced_once_on_startup_and_on_join():
+    """【单元测试】首次 on_ready 同步所有服务器，重新连接不重复同步；加入新服务器时同步该服务器。"""
+    member_sync = MagicMock()
+    member_sync.sync_guild = AsyncMock()
+    bot = MagicMock()
+    bot.guilds = [SimpleNamespace(name="g1"), SimpleNamespace(name="g2")]
+    cog = MemberCog(bot=bot, member_service=MagicMock(), member_sync=member_sync)
+
+    await cog.on_ready()
+    await cog.on_ready()
+    new_guild = SimpleNamespace(name="g3")
+    await cog.on_guild_join(new_guild)
+    await asyncio.gather(*cog._sync_tasks)
+
+    synced = [call.args[0].name for call in member_sync.sync_guild.await_args_list]
+    assert synced == ["g1", "g2", "g3"]
+
+
+@pytest.mark.asyncio
+async def test_failed_guild_sync_does_not_stop_the_others():
+    """【单元测试】某个服务器同步失败时，继续同步其余服务器。"""
+    member_sync = MagicMock()
+    member_sync.sync_guild = AsyncMock(side_effect=[RuntimeError("boom"), None])
+    bot = MagicMock()
+    bot.guilds = [SimpleNamespace(name="g1"), SimpleNamespace(name="g2")]
+    cog = MemberCog(bot=bot, member_service=MagicMock(), member_sync=member_sync)
+
+    await cog.on_ready()
+    await asyncio.gather(*cog._sync_tasks)
+
+    assert member_sync.sync_guild.await_count == 2
@@ -0,0 +1,108 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+
+# 确保测试可以找到src目录下的模块
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.cogs.mention_debouncer import MentionDebouncer
+
+
+def mention(message_id, user_id=1, channel_id=1):
+    return SimpleNamespace(
+        id=message_id,
+        author=SimpleNamespace(id=user_id, name=f"user{user_id}"),
+        channel=SimpleNamespace(id=channel_id),
+    )
+
+
+def recording_handler(batches, release=None):
+    async def handler(batch):
+        batches.append([m.id for m in batch])
+        if release is not None:
+            await release.wait()
+
+    return handler
+
+
+@pytest.mark.asyncio
+async def test_first_mention_starts_without_waiting():
+    """【单元测试】没有进行中的生成时，@ 立即交给 handler，不等待合并窗口。"""
+    batches = []
+    debouncer = MentionDebouncer(10, recording_handler(batches))
+
+    debouncer.submit(mention(1))
+    await asyncio.sleep(0.01)
+
+    assert batches == [[1]]
+    assert debouncer._states == {}
+
+
+@pytest.mark.asyncio
+async def test_rapid_mentions_are_merged_into_one_batch():
+    """【单元测试】生成进行中收到的连续 @ 在窗口内合并成一批，最终只完整生成一次。"""
+    batches = []
+    release = asyncio.Event()
+    debouncer = MentionDebouncer(0.05, recording_handler(batches, release))
+
+    for message_id in (1, 2, 3):
+        debouncer.submit(mention(message_id))
+        await asyncio.sleep(0.01)
+    release.set()
+    await asyncio.sleep(0.1)
+
+    assert batches == [[1], [1, 2, 3]]
+    assert debouncer.merged == 2
+    assert debouncer._states == {}
+
+
+@pytest.mark.asyncio
+async def test_different_users_and_channels_are_independent():
+    """【单元测试】不同用户、不同频道的消息各自成批。"""
+    batches = []
+    debouncer = MentionDebouncer(0.02, recording_handler(batches))
+
+    debouncer.submit(mention(1, user_id=1))
+    debouncer.submit(mention(2, user_id=2))
+    debouncer.submit(mention(3, user_id=1, channel_id=2))
+    await asyncio.sleep(0.06)
+
+    assert sorted(batches) == [[1], [2], [3]]
+
+
+@pytest.mark.asyncio
+async def test_new_mention_supersedes_in_flight_generation():
+    """【单元测试】生成进行中又收到新的 @：取消正在进行的生成，旧消息并入新的一批。"""
+    batches = []
+    release = asyncio.Event()
+    debouncer = MentionDebouncer(0.02, recording_handler(batches, release))
+
+    debouncer.submit(mention(1))
+    await asyncio.sleep(0.04)
+    assert batches == [[1]]
+    first_generation = next(iter(debouncer._states.values())).generation
+
+    debouncer.submit(mention(2))
+    await asyncio.sleep(0.04)
+    release.set()
+    await asyncio.sleep(0)
+
+    assert first_generation.cancelled()
+    assert batches == [[1], [1, 2]]
+    assert debouncer.superseded == 1
+
+
+@pytest.mark.asyncio
+async def test_close_cancels_pending_work():
+    """【单元测试】关闭时取消所有等待中的窗口，不再调用 handler。"""
+    batches = []
+    debouncer = MentionDebouncer(10, recording_handler(batches))
+    debouncer.submit(mention(1))
+
+    await debouncer.close()
+
+    assert batches == []
+    assert debouncer._states == {}
@@ -0,0 +1,28 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+# 确保测试可以找到src目录下的模块
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.cogs.retention_cog import RetentionCog
+
+
+@pytest.mark.asyncio
+async def test_retention_runs_periodically_and_survives_failures():
+    """【单元测试】保留策略按间隔反复执行，某一次失败不会中断之后的执行；卸载时停止。"""
+    retention = MagicMock()
+    retention.run = AsyncMock(side_effect=[RuntimeError("db is gone"), None, None, None, None])
+    cog = RetentionCog(bot=MagicMock(), retention=retention, interval=0.01, initial_delay=0)
+
+    await cog.cog_load()
+    await asyncio.sleep(0.05)
+    await cog.cog_unload()
+    calls = retention.run.await_count
+    await asyncio.sleep(0.03)
+
+    assert calls >= 3
+    assert retention.run.await_count == calls
@@ -0,0 +1,88 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+# 确保测试可以找到src目录下的模块
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.cogs.streaming_reply import StreamingReply
+
+
+class FakeClock:
+    """一个可以手动拨动的时钟。"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_source_message():
+    """创建一个模拟的原始消息，每次 reply 都返回一条新的模拟消息。"""
+    source = MagicMock()
+    source.reply = AsyncMock(side_effect=lambda text: MagicMock(edit=AsyncMock()))
+    return source
+
+
+@pytest.mark.asyncio
+async def test_first_chunk_is_posted_immediately_and_edits_are_throttled():
+    """
+    【单元测试】第一块文本立即回复；在编辑间隔内到达的文本不会触发编辑，
+    直到间隔过去或流结束。
+    """
+    clock = FakeClock()
+    source = make_source_message()
+    reply = StreamingReply(source, edit_interval=1.0, clock=clock)
+
+    await reply.push("你好")
+    source.reply.assert_awaited_once_with("你好")
+    posted = reply.sent_messages[0]
+
+    clock.now = 0.5
+    await reply.push("，世界")
+    posted.edit.assert_not_awaited()
+
+    clock.now = 1.2
+    await reply.push("！")
+    posted.edit.assert_awaited_once_with(content="你好，世界！")
+
+    await reply.push("再见")
+    await reply.finish()
+    assert posted.edit.await_args.kwargs["content"] == "你好，世界！再见"
+    assert reply.has_output
+
+
+@pytest.mark.asyncio
+async def test_long_stream_is_split_into_multiple_messages():
+    """
+    【单元测试】超过单条消息长度的流被切分到多条消息中，且每条都不超过上限。
+    """
+    source = make_source_message()
+    reply = StreamingReply(source, edit_interval=0, max_length=10, clock=FakeClock())
+
+    for _ in range(5):
+        await reply.push("abcdef")
+    await reply.finish()
+
+    assert len(reply.sent_messages) == 3
+    final_texts = []
+    for sent, call in zip(reply.sent_messages, source.reply.await_args_list):
+        last = sent.edit.await_args.kwargs["content"] if sent.edit.await_args else call.args[0]
+        assert len(last) <= 10
+        final_texts.append(last)
+    assert "".join(final_texts) == "abcdef" * 5
+
+
+@pytest.mark.asyncio
+async def test_empty_stream_sends_nothing():
+    """【单元测试】流没有产出任何文本时，不发送任何消息。"""
+    source = make_source_message()
+    reply = StreamingReply(source)
+
+    await reply.finish()
+
+    source.reply.assert_not_awaited()
+    assert not reply.has_output
@@ -3,6 +3,7 @@ import pytest_asyncio
 from unittest.mock import patch, AsyncMock  # <-- 导入 AsyncMock
 from pathlib import Path
 import json
+import os
 
 # 确保测试可以找到src目录下的模块
 import sys
@@ -101,3 +102,95 @@ async def test_load_character_invalid_json(char_manager: CharacterManager):
             ValueError, match="Error parsing character card 'invalid.json'"
         ):
             await char_manager.load_character("invalid")
+
+
+# --- 缓存与热更新 (使用真实的临时目录) ---
+
+
+def _write_card(path: Path, name: str) -> None:
+    path.write_text(
+        json.dumps(
+            {
+                "name": name,
+                "description": "A test bot.",
+                "first_message": "Hello!",
+                "example_dialogue": [{"user": "hi", "bot": "hello"}],
+                "main_chat_prompt_template": "template: {persona_description}",
+            }
+        ),
+        encoding="utf-8",
+    )
+
+
+@pytest.mark.asyncio
+async def test_load_character_is_cached(tmp_path: Path):
+    """
+    【单元测试】同一张角色卡第二次加载时应直接命中缓存，不再读取文件。
+    """
+    _write_card(tmp_path / "bot.json", "CachedBot")
+    manager = CharacterManager(tmp_path, reload_check_interval=60)
+
+    first = await manager.load_character("bot")
+    with patch("aiofiles.open") as mock_aio_open:
+        second = await manager.load_character("bot")
+        mock_aio_open.assert_not_called()
+
+    assert first is second
+    assert manager.cache_stats["hits"] == 1
+    assert manager.cache_stats["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_load_character_hot_reloads_changed_file(tmp_path: Path):
+    """
+    【单元测试】角色卡文件被修改后，应在下一次检查时重新加载并替换缓存。
+    """
+    card_path = tmp_path / "bot.json"
+    _write_card(card_path, "OldName")
+    manager = CharacterManager(tmp_path, reload_check_interval=0)
+
+    old = await manager.load_character("bot")
+    _write_card(card_path, "NewName")
+    # 确保 mtime 一定发生变化，避免文件系统时间精度导致的偶发失败
+    stat = card_path.stat()
+    os.utime(card_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    new = await manager.load_character("bot")
+
+    assert old.name == "OldName"
+    assert new.name == "NewName"
+    assert manager.cache_stats["reloads"] == 1
+
+
+@pytest.mark.asyncio
+async def test_broken_edit_keeps_previous_version(tmp_path: Path):
+    """
+    【单元测试】热更新时如果新文件无法解析，应继续使用上一个可用版本。
+    """
+    card_path = tmp_path / "bot.json"
+    _write_card(card_path, "GoodName")
+    manager = CharacterManager(tmp_path, reload_check_interval=0)
+    await manager.load_character("bot")
+
+    card_path.write_text('{"name": "Broken",', encoding="utf-8")
+    stat = card_path.stat()
+    os.utime(card_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    character = await manager.load_character("bot")
+    assert character.name == "GoodName"
+
+
+@pytest.mark.asyncio
+async def test_preload_validates_every_card(tmp_path: Path):
+    """
+    【单元测试】preload 应加载所有合法角色卡，并跳过无法解析的角色卡。
+    """
+    _write_card(tmp_path / "a.json", "A")
+    _write_card(tmp_path / "b.json", "B")
+    (tmp_path / "broken.json").write_text("not json", encoding="utf-8")
+    manager = CharacterManager(tmp_path)
+
+    loaded = await manager.preload()
+
+    assert loaded == ["a", "b"]
+    assert manager.cache_stats["cached"] == 2
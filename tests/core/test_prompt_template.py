@@ -0,0 +1,78 @@
+import json
+import pytest
+
+# 确保测试可以找到src目录下的模块
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.core.character_model import Character, DialogueExample
+from src.core.prompt_template import (
+    CompiledPromptTemplate,
+    compile_character_prompt,
+    format_example_dialogue,
+)
+
+CHARACTERS_DIR = Path(__file__).resolve().parents[2] / "data" / "characters"
+
+DYNAMIC_VALUES = {
+    "long_term_memory": "- 记忆",
+    "short_term_memory": "A: 你好",
+    "user_info": "User 'a' (ID: 1, Display Name: A)",
+    "current_input": "A: 你们社群名字啥意思",
+}
+
+
+@pytest.mark.parametrize("card", sorted(CHARACTERS_DIR.glob("*.json")))
+def test_render_matches_str_format(card: Path):
+    """
+    【单元测试】预编译模板的渲染结果必须与直接 str.format 完全一致。
+    """
+    character = Character.model_validate(json.loads(card.read_text("utf-8")))
+
+    expected = character.main_chat_prompt_template.format(
+        persona_description=character.description,
+        example_dialogue=format_example_dialogue(character),
+        bot_name=character.name,
+        **DYNAMIC_VALUES,
+    )
+    assert compile_character_prompt(character).render(**DYNAMIC_VALUES) == expected
+
+
+def test_compiled_template_handles_escapes_and_format_specs():
+    """
+    【单元测试】转义的花括号和 format spec 应与 str.format 行为一致。
+    """
+    template = "{{literal}} {bot_name!r} {user_info:>6} {current_input}"
+    compiled = CompiledPromptTemplate(template, static_values={"bot_name": "Go"})
+
+    assert compiled.slot_names == {"user_info", "current_input"}
+    assert compiled.render(user_info="u", current_input="hi") == template.format(
+        bot_name="Go", user_info="u", current_input="hi"
+    )
+
+
+def test_unknown_placeholder_fails_at_compile_time():
+    """
+    【单元测试】模板中的未知占位符应在编译时就抛出 KeyError。
+    """
+    with pytest.raises(KeyError):
+        CompiledPromptTemplate("{no_such_field}", static_values={})
+
+
+def test_compile_character_prompt_is_cached_per_character():
+    """
+    【单元测试】同一个角色对象只编译一次；新的角色对象 (热更新后) 会重新编译。
+    """
+    character = Character(
+        name="Bot",
+        description="desc",
+        first_message="hi",
+        example_dialogue=[DialogueExample(user="q", bot="a")],
+        main_chat_prompt_template="{persona_description}|{current_input}",
+    )
+    reloaded = character.model_copy(update={"description": "new desc"})
+
+    assert compile_character_prompt(character) is compile_character_prompt(character)
+    assert compile_character_prompt(reloaded).render(current_input="x") == "new desc|x"
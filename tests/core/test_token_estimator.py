@@ -0,0 +1,35 @@
+import pytest
+
+# 确保测试可以找到src目录下的模块
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.core.token_estimator import estimate_tokens, truncate_to_tokens
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("", 0),
+        ("你好世界", 4),  # CJK：每字一个 token
+        ("hello world!", 3),  # ASCII：每 4 个字符一个 token
+        ("你好 hello", 2 + 2),
+        ("，。！", 3),  # 全角标点按 CJK 计算
+    ],
+)
+def test_estimate_tokens(text: str, expected: int):
+    """【单元测试】CJK 感知的 token 估算。"""
+    assert estimate_tokens(text) == expected
+
+
+def test_truncate_to_tokens_returns_longest_fitting_prefix():
+    """【单元测试】截断结果应是满足预算的最长前缀。"""
+    text = "你好世界" * 10
+
+    truncated = truncate_to_tokens(text, 7)
+
+    assert truncated == text[:7]
+    assert truncate_to_tokens(text, 1000) == text
+    assert truncate_to_tokens(text, 0) == ""
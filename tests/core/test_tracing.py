@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import pytest
+
+# 确保测试可以找到src目录下的模块
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.core.tracing import RequestTracer, current_trace, span
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_span_without_trace_is_noop():
+    """【单元测试】没有正在进行的请求记录时，span 什么也不做。"""
+    with span("anything"):
+        pass
+    assert current_trace() is None
+
+
+def test_stages_are_recorded_and_accumulated():
+    """【单元测试】各阶段的耗时按名称累加，并保持首次出现的顺序。"""
+    clock = FakeClock()
+    tracer = RequestTracer(slow_threshold=100, clock=clock)
+
+    with tracer.trace("req") as trace:
+        with span("member"):
+            clock.now += 0.5
+        with span("llm"):
+            clock.now += 2.0
+        with span("member"):
+            clock.now += 0.25
+
+    assert list(trace.stages) == ["member", "llm"]
+    assert trace.stages["member"] == pytest.approx(0.75)
+    assert trace.total == pytest.approx(2.75)
+    assert tracer.stats["requests"] == 1
+    assert tracer.stats["stage_avg"]["llm"] == pytest.approx(2.0)
+    assert current_trace() is None
+
+
+def test_slow_request_logs_breakdown(caplog):
+    """【单元测试】超过阈值的请求以 WARNING 级别记录阶段耗时明细。"""
+    clock = FakeClock()
+    tracer = RequestTracer(slow_threshold=1.0, clock=clock)
+
+    with caplog.at_level(logging.WARNING, logger="src.core.tracing"):
+        with tracer.trace("fast"):
+            clock.now += 0.1
+        with tracer.trace("slow"):
+            with span("history"):
+                clock.now += 3.0
+
+    assert tracer.slow_requests == 1
+    assert len(caplog.records) == 1
+    assert "slow" in caplog.text and "history=3.000s" in caplog.text
+
+
+def test_nested_trace_reuses_outer_trace():
+    """【单元测试】嵌套的 trace 复用外层记录，只在外层结束时汇总一次。"""
+    tracer = RequestTracer()
+
+    with tracer.trace("outer") as outer:
+        with tracer.trace("inner") as inner:
+            assert inner is outer
+
+    assert tracer.requests == 1
+
+
+@pytest.mark.asyncio
+async def test_trace_propagates_to_child_tasks():
+    """【单元测试】在请求内创建的 asyncio 任务也会把 span 记到同一条记录上。"""
+    tracer = RequestTracer()
+
+    async def stage(name):
+        with span(name):
+            await asyncio.sleep(0)
+
+    with tracer.trace("req") as trace:
+        await asyncio.gather(stage("a"), stage("b"))
+
+    assert set(trace.stages) == {"a", "b"}
@@ -1,7 +1,266 @@
+import datetime
 import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 
-# TODO: Add tests for src/db/repositories/event_repository.py
+# 确保能找到 src 目录
+import sys
+from pathlib import Path
 
-def test_placeholder():
-    """A placeholder test to ensure the file is picked up by pytest."""
-    assert True
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+from src.db.repositories.event_repository import EventCursor, EventRepository
+from src.db.models import Event, Member
+
+
+@pytest.fixture
+def event_repo(db_session: AsyncSession) -> EventRepository:
+    """创建一个 EventRepository 实例，注入来自 conftest.py 的 db_session。"""
+    return EventRepository(session_factory=lambda: db_session)
+
+
+def event_row(event_id, author_id=1, content="hi"):
+    return {
+        "event_id": event_id,
+        "event_type": "message",
+        "author_id": author_id,
+        "content": content,
+        "channel_id": 10,
+        "guild_id": 20,
+        "created_at": datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc),
+    }
+
+
+@pytest.mark.asyncio
+async def test_create_many_inserts_events_and_missing_authors(
+    event_repo: EventRepository, db_session: AsyncSession
+):
+    """测试批量写入事件，并为库中还没有的作者补上成员记录，已有的作者保持不变。"""
+    db_session.add(Member(id=1, name="old", display_name="Old"))
+    await db_session.commit()
+
+    written = await event_repo.create_many(
+        [event_row(100, author_id=1), event_row(101, author_id=2)],
+        [
+            {"id": 1, "name": "renamed", "display_name": "Renamed"},
+            {"id": 2, "name": "new", "display_name": None},
+        ],
+    )
+    assert written == 2
+
+    db_session.expire_all()
+    events = (await db_session.execute(select(Event).order_by(Event.event_id))).scalars().all()
+    assert [(e.event_id, e.author_id) for e in events] == [(100, 1), (101, 2)]
+    members = {m.id: m.name for m in (await db_session.execute(select(Member))).scalars()}
+    assert members == {1: "old", 2: "new"}
+
+
+@pytest.mark.asyncio
+async def test_create_many_ignores_duplicate_event_ids(
+    event_repo: EventRepository, db_session: AsyncSession
+):
+    """测试重复投递的事件 (相同 event_id) 被忽略，不会导致整批写入失败。"""
+    author = [{"id": 1, "name": "author", "display_name": None}]
+    await event_repo.create_many([event_row(200, content="first")], author)
+    await event_repo.create_many([event_row(200, content="again"), event_row(201)], author)
+
+    db_session.expire_all()
+    events = (await db_session.execute(select(Event).order_by(Event.event_id))).scalars().all()
+    assert [(e.event_id, e.content) for e in events] == [(200, "first"), (201, "hi")]
+
+
+async def seed_events(event_repo: EventRepository):
+    """写入 7 个事件：两个频道、两个作者，其中两个事件时间完全相同。"""
+    base = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+    rows = []
+    for index in range(7):
+        row = event_row(300 + index, author_id=1 + index % 2)
+        row["channel_id"] = 10 if index < 5 else 11
+        row["event_type"] = "message" if index != 3 else "reaction_add"
+        # 300 和 301 发生在同一时刻，需要用 id 区分先后
+        row["created_at"] = base + datetime.timedelta(minutes=max(index, 1))
+        rows.append(row)
+    authors = [{"id": i, "name": f"user{i}", "display_name": None} for i in (1, 2)]
+    await event_repo.create_many(rows, authors)
+
+
+@pytest.mark.asyncio
+async def test_channel_events_are_keyset_paginated(event_repo: EventRepository):
+    """测试按频道从新到旧分页，游标能正确跨过时间相同的事件，最后一页没有游标。"""
+    await seed_events(event_repo)
+
+    pages = []
+    cursor = None
+    while True:
+        page = await event_repo.get_channel_events(10, limit=2, before=cursor)
+        pages.append([e.event_id for e in page.events])
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert pages == [[304, 303], [302, 301], [300]]
+
+
+@pytest.mark.asyncio
+async def test_events_created_one_by_one_are_keyset_paginated(
+    event_repo: EventRepository, db_session: AsyncSession
+):
+    """测试逐条写入 (create_event) 的事件在同一秒内也能正确翻页，不会反复返回同一页。"""
+    db_session.add(Member(id=1, name="author", display_name=None))
+    await db_session.commit()
+    for event_id in range(1, 6):
+        await event_repo.create_event(event_id, "message", author_id=1, content="hi", channel_id=9)
+
+    pages = []
+    cursor = None
+    for _ in range(5):
+        page = await event_repo.get_channel_events(9, limit=2, before=cursor)
+        pages.append([e.event_id for e in page.events])
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert pages == [[5, 4], [3, 2], [1]]
+
+
+@pytest.mark.asyncio
+async def test_user_and_guild_events_filter_by_type(event_repo: EventRepository):
+    """测试按用户、按服务器和事件类型查询最近事件。"""
+    await seed_events(event_repo)
+
+    user_page = await event_repo.get_user_events(2, limit=10)
+    assert [e.event_id for e in user_page.events] == [305, 303, 301]
+    assert user_page.next_cursor is None
+
+    messages = await event_repo.get_user_events(2, event_type="message")
+    assert [e.event_id for e in messages.events] == [305, 301]
+
+    reactions = await event_repo.get_guild_events(20, "reaction_add")
+    assert [e.event_id for e in reactions.events] == [303]
+
+
+async def seed_conversation(event_repo: EventRepository):
+    rows = []
+    contents = [
+        (400, 1, 10, "昨天的瓦罗兰特比赛太精彩了"),
+        (401, 2, 10, "我觉得 EDG 宫斗之后就不行了"),
+        (402, 1, 11, "今晚一起打瓦罗兰特吗"),
+        (403, 2, 11, "晚饭吃火锅"),
+        (404, 1, 10, "zmjjkk 又在嚼口香糖"),
+    ]
+    for event_id, author_id, channel_id, content in contents:
+        row = event_row(event_id, author_id=author_id, content=content)
+        row["channel_id"] = channel_id
+        rows.append(row)
+    authors = [{"id": i, "name": f"user{i}", "display_name": None} for i in (1, 2)]
+    await event_repo.create_many(rows, authors)
+
+
+@pytest.mark.asyncio
+async def test_search_events_finds_chinese_substrings(event_repo: EventRepository):
+    """测试全文检索可以命中中文子串，并按频道、作者过滤。"""
+    await seed_conversation(event_repo)
+
+    hits = await event_repo.search_events("瓦罗兰特")
+    assert sorted(hit.event.event_id for hit in hits) == [400, 402]
+
+    in_channel = await event_repo.search_events("瓦罗兰特", channel_id=11)
+    assert [hit.event.event_id for hit in in_channel] == [402]
+
+    by_author = await event_repo.search_events("瓦罗兰特", author_id=2)
+    assert by_author == []
+
+
+@pytest.mark.asyncio
+async def test_search_events_match_any_ranks_by_bm25(event_repo: EventRepository):
+    """测试任意匹配模式：用一整句话检索，命中越多的事件排得越靠前。"""
+    await seed_conversation(event_repo)
+
+    hits = await event_repo.search_events("还记得那场瓦罗兰特比赛吗", match_any=True)
+
+    assert [hit.event.event_id for hit in hits][:2] == [400, 402]
+    assert hits[0].score > hits[1].score
+
+
+@pytest.mark.asyncio
+async def test_search_events_match_any_finds_related_sentences(event_repo: EventRepository):
+    """
+    测试用一整句 (没有空格的) 中文检索相关的历史消息，这是事件检索记忆的用法：
+    内容不必与整句相同，只要有足够多相同的片段；无关的消息不会命中。
+    设置 TEST_DATABASE_URL 时在 PostgreSQL 上走 pg_trgm 的 word_similarity。
+    """
+    await seed_conversation(event_repo)
+
+    hits = await event_repo.search_events("那场瓦罗兰特比赛你看了吗", match_any=True)
+    by_author = await event_repo.search_events("zmjjkk 为什么一直嚼口香糖", author_id=1, match_any=True)
+
+    assert [hit.event.event_id for hit in hits] == [400, 402]
+    assert [hit.event.event_id for hit in by_author] == [404]
+
+
+def test_postgres_match_any_uses_trigram_word_similarity():
+    """测试 PostgreSQL 上的任意匹配使用 pg_trgm 的 `%>` 运算符，而不是对整句做 ILIKE 子串匹配。"""
+    from sqlalchemy.dialects import postgresql
+
+    query = "那场瓦罗兰特比赛你看了吗"
+    sql = str(
+        EventRepository._postgres_search(query, query.split(), [], match_any=True).compile(
+            dialect=postgresql.dialect()
+        )
+    )
+
+    assert "events.content %%> " in sql
+    assert "ORDER BY word_similarity(" in sql
+    assert "ILIKE" not in sql
+
+
+@pytest.mark.asyncio
+async def test_search_events_short_terms_and_query_syntax(event_repo: EventRepository):
+    """测试过短的搜索词退化为子串匹配，搜索词中的 FTS 语法字符和通配符不会出错。"""
+    await seed_conversation(event_repo)
+
+    assert [hit.event.event_id for hit in await event_repo.search_events("火锅")] == [403]
+    assert [hit.event.event_id for hit in await event_repo.search_events('EDG "宫斗"')] == []
+    assert [hit.event.event_id for hit in await event_repo.search_events("EDG 宫斗")] == [401]
+    assert await event_repo.search_events("100%") == []
+    assert await event_repo.search_events("   ") == []
+
+
+@pytest.mark.asyncio
+async def test_search_index_follows_updates_and_deletes(
+    event_repo: EventRepository, db_session: AsyncSession
+):
+    """测试触发器让全文索引与 events 表的修改和删除保持同步。"""
+    await seed_conversation(event_repo)
+    event = (await db_session.execute(select(Event).where(Event.event_id == 403))).scalar_one()
+    event.content = "晚饭吃烧烤"
+    await db_session.commit()
+
+    assert await event_repo.search_events("火锅") == []
+    assert [hit.event.event_id for hit in await event_repo.search_events("吃烧烤")] == [403]
+
+    await db_session.delete(event)
+    await db_session.commit()
+    assert await event_repo.search_events("吃烧烤") == []
+
+
+@pytest.mark.asyncio
+async def test_expired_events_are_read_in_batches_and_deleted(event_repo: EventRepository):
+    """测试按类型从旧到新分批取出过期事件 (游标跨过时间相同的事件)，以及按主键批量删除。"""
+    await seed_events(event_repo)
+    cutoff = datetime.datetime(2025, 1, 1, 0, 5, tzinfo=datetime.timezone.utc)
+
+    first = await event_repo.get_expired_events(cutoff, limit=2, event_type="message")
+    last = first[-1]
+    second = await event_repo.get_expired_events(
+        cutoff, limit=2, after=EventCursor(last.created_at, last.id), event_type="message"
+    )
+    assert [e.event_id for e in first + second] == [300, 301, 302, 304]
+
+    others = await event_repo.get_expired_events(cutoff, exclude_types=["message"])
+    assert [e.event_id for e in others] == [303]
+
+    assert await event_repo.delete_events([e.id for e in first]) == 2
+    assert await event_repo.delete_events([]) == 0
+    remaining = await event_repo.get_expired_events(cutoff, event_type="message")
+    assert [e.event_id for e in remaining] == [302, 304]
@@ -1,3 +1,4 @@
+import datetime
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -54,3 +55,90 @@ async def test_get_or_create_retrieves_and_updates_member(
     assert created is False
     assert member.id == 456
     assert member.display_name == "Veteran"
+
+
+@pytest.mark.asyncio
+async def test_get_or_create_unchanged_member_does_not_write(
+    member_repo: MemberRepository, db_session: AsyncSession
+):
+    """测试信息没有变化时，返回已有成员且不更新 updated_at。"""
+    await member_repo.get_or_create(member_id=789, name="Same", display_name="Same Name")
+    first = (
+        await db_session.execute(select(Member.updated_at).where(Member.id == 789))
+    ).scalar_one()
+
+    member, created = await member_repo.get_or_create(
+        member_id=789, name="Same", display_name="Same Name"
+    )
+    second = (
+        await db_session.execute(select(Member.updated_at).where(Member.id == 789))
+    ).scalar_one()
+
+    assert created is False
+    assert member.name == "Same"
+    assert first == second
+
+
+@pytest.mark.asyncio
+async def test_get_or_create_detects_display_name_cleared(
+    member_repo: MemberRepository, db_session: AsyncSession
+):
+    """测试 display_name 从有值变为 None 也会被识别为变化并写入。"""
+    await member_repo.get_or_create(member_id=790, name="Nick", display_name="Nickname")
+
+    member, created = await member_repo.get_or_create(
+        member_id=790, name="Nick", display_name=None
+    )
+
+    assert created is False
+    assert member.display_name is None
+    stored = (
+        await db_session.execute(select(Member.display_name).where(Member.id == 790))
+    ).scalar_one()
+    assert stored is None
+
+
+@pytest.mark.asyncio
+async def test_sync_many_writes_only_differences(
+    member_repo: MemberRepository, db_session: AsyncSession
+):
+    """测试批量同步只写入新成员和名字变化的成员，没有变化时不写入。"""
+    written = await member_repo.sync_many(
+        [(901, "a", "A"), (902, "b", None), (903, "c", "C")]
+    )
+    assert written == 3
+
+    # 再次同步相同的数据：没有任何写入
+    assert await member_repo.sync_many([(901, "a", "A"), (902, "b", None)]) == 0
+
+    # 一个改了昵称，一个是新成员
+    written = await member_repo.sync_many(
+        [(901, "a", "A"), (902, "b", "B"), (904, "d", "D")]
+    )
+    assert written == 2
+
+    db_session.expire_all()
+    result = await db_session.execute(select(Member).where(Member.id.in_([902, 904])))
+    names = {m.id: m.display_name for m in result.scalars()}
+    assert names == {902: "B", 904: "D"}
+
+
+@pytest.mark.asyncio
+async def test_create_many_keeps_existing_members_and_stream_reads_in_batches(
+    member_repo: MemberRepository, db_session: AsyncSession
+):
+    """测试批量写入完整的成员记录时已有成员保持不变，并可以按 id 顺序分批流式读出。"""
+    created = datetime.datetime(2024, 5, 1, 12, 0)
+    await member_repo.sync_many([(951, "old", None)])
+    rows = [
+        {"id": i, "name": f"m{i}", "display_name": None, "created_at": created, "updated_at": created}
+        for i in (950, 951, 952)
+    ]
+    assert await member_repo.create_many(rows) == 3
+    assert await member_repo.create_many([]) == 0
+
+    batches = [batch async for batch in member_repo.stream_members(batch_size=2)]
+    members = [row for batch in batches for row in batch if row["id"] >= 950]
+    assert [(m["id"], m["name"]) for m in members] == [(950, "m950"), (951, "old"), (952, "m952")]
+    assert members[0]["created_at"] == created
+    assert all(len(batch) <= 2 for batch in batches)
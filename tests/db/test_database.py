@@ -0,0 +1,139 @@
+import asyncio
+import pytest
+from sqlalchemy import text
+
+# 确保能找到 src 目录
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.db.database import Database, PoolSettings, SqlitePragmas
+
+
+@pytest.fixture
+async def database(tmp_path):
+    """一个基于临时文件的 SQLite 数据库。"""
+    db = Database(f"sqlite+aiosqlite:///{(tmp_path / 'test.db').as_posix()}", reader_pool_size=2)
+    async with db.engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, value TEXT)"))
+    yield db
+    await db.dispose()
+
+
+@pytest.mark.asyncio
+async def test_pragmas_are_applied_on_connect(tmp_path):
+    """测试每个连接建立时都会设置 WAL、synchronous、busy_timeout 等 PRAGMA。"""
+    db = Database(
+        f"sqlite+aiosqlite:///{(tmp_path / 'pragmas.db').as_posix()}",
+        pragmas=SqlitePragmas(busy_timeout=1234, cache_size=-2000),
+    )
+    async with db.engine.connect() as conn:
+        values = [
+            (await conn.execute(text(f"PRAGMA {name}"))).scalar()
+            for name in ("journal_mode", "synchronous", "busy_timeout", "cache_size")
+        ]
+    await db.dispose()
+
+    # synchronous=NORMAL 对应 1
+    assert values == ["wal", 1, 1234, -2000]
+
+
+@pytest.mark.asyncio
+async def test_writer_runs_jobs_one_at_a_time(database: Database):
+    """测试并发提交的写任务被串行执行，并各自拿到结果。"""
+    active = 0
+    max_active = 0
+
+    def make_job(i):
+        async def job(session):
+            nonlocal active, max_active
+            active += 1
+            max_active = max(max_active, active)
+            await session.execute(text("INSERT INTO items (id, value) VALUES (:id, 'x')"), {"id": i})
+            await asyncio.sleep(0)
+            active -= 1
+            return i
+
+        return job
+
+    results = await asyncio.gather(*(database.writer.run(make_job(i)) for i in range(20)))
+
+    assert results == list(range(20))
+    assert max_active == 1
+    async with database.session_factory() as session:
+        assert (await session.execute(text("SELECT COUNT(*) FROM items"))).scalar() == 20
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_rolled_back_and_writer_keeps_running(database: Database):
+    """测试失败的写任务向调用方抛出异常并回滚，之后的写任务照常执行。"""
+
+    async def failing(session):
+        await session.execute(text("INSERT INTO items (id, value) VALUES (1, 'rolled back')"))
+        raise ValueError("boom")
+
+    async def ok(session):
+        await session.execute(text("INSERT INTO items (id, value) VALUES (2, 'kept')"))
+
+    with pytest.raises(ValueError):
+        await database.writer.run(failing)
+    await database.writer.run(ok)
+
+    async with database.session_factory() as session:
+        rows = (await session.execute(text("SELECT id FROM items"))).scalars().all()
+    assert rows == [2]
+    assert database.writer.stats["failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_dispose_finishes_queued_writes(tmp_path):
+    """测试 dispose 会先执行完排队中的写任务，之后不再接收新的写任务。"""
+    db = Database(f"sqlite+aiosqlite:///{(tmp_path / 'dispose.db').as_posix()}")
+    async with db.engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY)"))
+
+    def insert(i):
+        async def job(session):
+            await session.execute(text("INSERT INTO items (id) VALUES (:id)"), {"id": i})
+
+        return job
+
+    pending = [asyncio.create_task(db.writer.run(insert(i))) for i in range(5)]
+    await asyncio.sleep(0)
+    writer = db.writer
+    await db.dispose()
+
+    await asyncio.gather(*pending)
+    assert writer.stats["committed"] == 5
+    with pytest.raises(RuntimeError):
+        await writer.run(insert(99))
+
+
+def test_pool_settings_configure_postgres_pool_and_statement_cache():
+    """测试 PostgreSQL 连接池参数被转换为对应的引擎参数 (包括两层预编译语句缓存)。"""
+    options = PoolSettings(size=5, max_overflow=2, recycle=60, timeout=3, statement_cache_size=0).engine_options()
+
+    assert options["pool_size"] == 5
+    assert options["max_overflow"] == 2
+    assert options["pool_recycle"] == 60
+    assert options["pool_timeout"] == 3
+    assert options["connect_args"] == {"prepared_statement_cache_size": 0, "statement_cache_size": 0}
+
+
+@pytest.mark.asyncio
+async def test_incremental_vacuum_reclaims_free_pages(database: Database):
+    """测试新建的数据库使用 auto_vacuum=INCREMENTAL，删除数据后可以分批回收空闲页。"""
+    await database.writer.run(
+        lambda session: session.execute(
+            text("INSERT INTO items (id, value) VALUES (:id, :value)"),
+            [{"id": i, "value": "x" * 1000} for i in range(200)],
+        )
+    )
+    await database.writer.run(lambda session: session.execute(text("DELETE FROM items")))
+
+    assert await database.incremental_vacuum(max_pages=10) == 10
+    assert await database.incremental_vacuum() > 0
+    async with database.engine.connect() as conn:
+        assert (await conn.execute(text("PRAGMA auto_vacuum"))).scalar() == 2
+        assert (await conn.execute(text("PRAGMA freelist_count"))).scalar() == 0
@@ -1,7 +0,0 @@
-import pytest
-
-# TODO: Add tests for src/db/session.py
-
-def test_placeholder():
-    """A placeholder test to ensure the file is picked up by pytest."""
-    assert True
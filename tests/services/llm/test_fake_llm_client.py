@@ -0,0 +1,99 @@
+import pytest
+
+# 确保测试可以找到src目录下的模块
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+from src.services.llm.abstract_llm_client import AbstractLLMClient, LLMClientError
+from src.services.llm.fake_llm_client import FakeLLMClient
+
+
+def make_client(**kwargs) -> FakeLLMClient:
+    """创建一个不真正休眠、记录所有等待时长的假后端。"""
+    slept = []
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+
+    client = FakeLLMClient(sleep=fake_sleep, **kwargs)
+    client.slept = slept
+    return client
+
+
+@pytest.mark.asyncio
+async def test_same_seed_gives_same_output_and_latency():
+    """【单元测试】相同的种子和调用顺序得到完全相同的输出和延迟。"""
+    first, second = make_client(seed=42), make_client(seed=42)
+
+    assert await first.generate_text("你好") == await second.generate_text("你好")
+    assert first.slept == second.slept
+    assert isinstance(first, AbstractLLMClient)
+
+
+@pytest.mark.asyncio
+async def test_output_length_and_token_usage():
+    """【单元测试】输出长度在配置范围内，并记录 token 用量。"""
+    client = make_client(output_tokens_min=5, output_tokens_max=5)
+
+    text = await client.generate_text("hello world")
+
+    assert len(text.split(" ")) == 5
+    assert client.last_usage.prompt_tokens > 0
+    assert client.last_usage.completion_tokens > 0
+    first_total = client.last_usage.total_tokens
+    await client.generate_text("hello world")
+    assert client.total_usage.total_tokens == first_total + client.last_usage.total_tokens
+
+
+@pytest.mark.asyncio
+async def test_constant_latency_is_spread_across_stream_chunks():
+    """【单元测试】流式输出按块产出，总延迟均匀分摊到各块之间。"""
+    client = make_client(
+        latency_distribution="constant",
+        latency_mean=1.0,
+        output_tokens_min=10,
+        output_tokens_max=10,
+        stream_chunk_tokens=4,
+    )
+
+    chunks = [chunk async for chunk in client.generate_text_stream("hi")]
+
+    assert len(chunks) == 3
+    assert len("".join(chunks).split(" ")) == 10
+    assert sum(client.slept) == pytest.approx(1.0)
+
+
+@pytest.mark.asyncio
+async def test_error_rate_injects_retryable_errors():
+    """【单元测试】error_rate 为 1 时每次调用都抛出可重试的 LLMClientError，且不产出任何文本。"""
+    client = make_client(error_rate=1.0)
+
+    with pytest.raises(LLMClientError) as exc_info:
+        await client.generate_text("hi")
+    assert exc_info.value.retryable
+
+    chunks = []
+    with pytest.raises(LLMClientError):
+        async for chunk in client.generate_text_stream("hi"):
+            chunks.append(chunk)
+    assert chunks == []
+    assert client.errors == 2
+
+
+@pytest.mark.parametrize("distribution", ["uniform", "normal", "lognormal"])
+def test_sampled_latency_is_non_negative_and_near_mean(distribution):
+    """【单元测试】各种延迟分布的采样值都不小于 0，且均值接近配置值。"""
+    client = make_client(latency_distribution=distribution, latency_mean=0.5, latency_stddev=0.2)
+
+    samples = [client.sample_latency() for _ in range(2000)]
+
+    assert min(samples) >= 0
+    assert sum(samples) / len(samples) == pytest.approx(0.5, abs=0.05)
+
+
+def test_unknown_distribution_is_rejected():
+    """【单元测试】未知的延迟分布名在创建时就报错。"""
+    with pytest.raises(ValueError):
+        FakeLLMClient(latency_distribution="pareto")
@@ -0,0 +1,38 @@
+import datetime
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+# 确保测试可以找到src目录下的模块
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+from src.services.memory.event_search_memory_service import EventSearchMemoryService
+
+
+def hit(content, score=1.0):
+    event = SimpleNamespace(content=content, created_at=datetime.datetime(2025, 3, 1))
+    return SimpleNamespace(event=event, score=score)
+
+
+@pytest.mark.asyncio
+async def test_memories_come_from_the_users_own_messages():
+    """【单元测试】用当前消息检索该用户过去的消息，排除当前消息本身，并截断过长的内容。"""
+    repo = AsyncMock()
+    repo.search_events.return_value = [
+        hit("今晚一起打瓦罗兰特吗"),
+        hit("昨天的瓦罗兰特比赛" + "太精彩了" * 10),
+        hit("还记得瓦罗兰特吗"),
+    ]
+    service = EventSearchMemoryService(repo, limit=2, max_chars=12)
+
+    memories = await service.retrieve_relevant_memories(42, " 今晚一起打瓦罗兰特吗 ")
+
+    kwargs = repo.search_events.await_args.kwargs
+    assert kwargs["author_id"] == 42 and kwargs["match_any"] is True
+    assert memories == [
+        "2025-03-01 这位用户说过：昨天的瓦罗兰特比赛太精彩…",
+        "2025-03-01 这位用户说过：还记得瓦罗兰特吗",
+    ]
@@ -0,0 +1,56 @@
+import asyncio
+import pytest
+
+# 确保测试可以找到src目录下的模块
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+from src.services.embedding import HashingEmbedder
+from src.services.memory.hardcoded_memory_service import DEFAULT_MEMORIES
+from src.services.memory.vector_memory_service import VectorMemoryService
+from src.services.memory.vector_store import VectorMemoryStore
+
+
+def make_service(tmp_path, **kwargs) -> VectorMemoryService:
+    return VectorMemoryService(
+        VectorMemoryStore(tmp_path, dimension=256), HashingEmbedder(dimension=256), **kwargs
+    )
+
+
+@pytest.mark.asyncio
+async def test_only_relevant_seed_memories_are_retrieved(tmp_path):
+    """【单元测试】空的记忆库导入示例记忆 (只导入一次)；只返回与当前问题相关的记忆，无关的问题不返回记忆。"""
+    service = make_service(tmp_path, limit=5, min_score=0.15, seed_memories=DEFAULT_MEMORIES)
+
+    chewing, unrelated = await asyncio.gather(
+        service.retrieve_relevant_memories(1, "zmjjkk 比赛的时候为什么一直嚼口香糖"),
+        service.retrieve_relevant_memories(1, "今天晚饭吃什么"),
+    )
+
+    assert len(service.store) == len(DEFAULT_MEMORIES)
+    assert chewing[0].startswith("Go 学长知道“zmjjkk 的嚼嚼嚼”")
+    assert len(chewing) < len(DEFAULT_MEMORIES)
+    assert unrelated == []
+    assert await service.retrieve_relevant_memories(1, "   ") == []
+
+
+@pytest.mark.asyncio
+async def test_user_memories_stay_in_their_scope(tmp_path):
+    """【单元测试】用户自己的记忆只对这个用户 (在记录它的服务器中) 可见。"""
+    service = make_service(tmp_path, min_score=0.1)
+    assert await service.add_memories(["我最喜欢的游戏是瓦罗兰特", "  "], user_id=1, guild_id=10) == 1
+    await service.add_memories(["我最喜欢的游戏是原神"], user_id=2, guild_id=10)
+
+    mine = await service.retrieve_relevant_memories(1, "我最喜欢的游戏是什么", guild_id=10)
+    elsewhere = await service.retrieve_relevant_memories(1, "我最喜欢的游戏是什么", guild_id=11)
+
+    assert mine == ["我最喜欢的游戏是瓦罗兰特"]
+    assert elsewhere == []
+
+
+def test_embedder_must_match_the_store_dimension(tmp_path):
+    """【单元测试】向量化器的维度与记忆库不一致时拒绝创建服务。"""
+    with pytest.raises(ValueError):
+        VectorMemoryService(VectorMemoryStore(tmp_path, dimension=128), HashingEmbedder(dimension=256))
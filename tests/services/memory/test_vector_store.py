@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+# 确保测试可以找到src目录下的模块
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+from src.services.memory.vector_store import MemoryRecord, VectorMemoryStore
+
+
+def unit_vectors(count, dimension, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(count, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_search_returns_the_exact_top_k_in_order(tmp_path):
+    """【单元测试】argpartition 选出的 top-k 与完整排序的结果一致，并按相似度从高到低排列。"""
+    store = VectorMemoryStore(tmp_path, dimension=16, initial_capacity=8)
+    vectors = unit_vectors(500, 16)
+    # 分几批追加，中途多次扩容
+    for start in range(0, 500, 120):
+        batch = vectors[start:start + 120]
+        store.add(batch, [MemoryRecord(text=str(start + i)) for i in range(len(batch))])
+    query = unit_vectors(1, 16, seed=1)[0]
+
+    hits = store.search(query, k=10)
+
+    expected = np.argsort(-(vectors @ query))[:10]
+    assert [int(hit.record.text) for hit in hits] == list(expected)
+    assert [hit.score for hit in hits] == sorted((hit.score for hit in hits), reverse=True)
+    assert len(store) == 500
+
+
+def test_search_only_sees_the_users_and_guilds_memories(tmp_path):
+    """【单元测试】只检索属于该用户、该服务器的记忆以及共享的记忆；私信 (guild_id=None) 只看到不属于任何服务器的记忆。"""
+    store = VectorMemoryStore(tmp_path, dimension=4)
+    same = np.tile(np.array([1.0, 0, 0, 0], dtype=np.float32), (5, 1))
+    store.add(
+        same,
+        [
+            MemoryRecord("shared"),
+            MemoryRecord("alice anywhere", user_id=1),
+            MemoryRecord("alice in guild 10", user_id=1, guild_id=10),
+            MemoryRecord("bob", user_id=2),
+            MemoryRecord("guild 11", guild_id=11),
+        ],
+    )
+    query = np.array([1.0, 0, 0, 0])
+
+    in_guild = {hit.record.text for hit in store.search(query, k=10, user_id=1, guild_id=10)}
+    in_dm = {hit.record.text for hit in store.search(query, k=10, user_id=1, guild_id=None)}
+
+    assert in_guild == {"shared", "alice anywhere", "alice in guild 10"}
+    assert in_dm == {"shared", "alice anywhere"}
+
+
+def test_min_score_filters_unrelated_memories(tmp_path):
+    """【单元测试】相似度低于 min_score 的记忆不会返回，即使不足 k 条。"""
+    store = VectorMemoryStore(tmp_path, dimension=2)
+    store.add(np.array([[1.0, 0.0], [0.6, 0.8], [0.0, 1.0]]), [MemoryRecord(t) for t in "abc"])
+
+    hits = store.search(np.array([1.0, 0.0]), k=3, min_score=0.5)
+
+    assert [(hit.record.text, round(hit.score, 2)) for hit in hits] == [("a", 1.0), ("b", 0.6)]
+
+
+def test_store_is_reopened_from_disk(tmp_path):
+    """【单元测试】重新打开记忆库时从内存映射的向量文件和记录文件恢复；写到一半的记录被丢弃。"""
+    store = VectorMemoryStore(tmp_path, dimension=8, initial_capacity=2)
+    vectors = unit_vectors(5, 8)
+    store.add(vectors, [MemoryRecord(f"m{i}", user_id=7) for i in range(5)])
+    store.close()
+    with open(tmp_path / VectorMemoryStore.RECORDS, "a", encoding="utf-8") as file:
+        file.write('{"text": "half wri')
+
+    reopened = VectorMemoryStore(tmp_path, dimension=8)
+
+    assert len(reopened) == 5
+    hits = reopened.search(vectors[3], k=1, user_id=7)
+    assert hits[0].record.text == "m3" and hits[0].score == pytest.approx(1.0)
+    reopened.add(vectors[:1], [MemoryRecord("m5")])
+    assert len(VectorMemoryStore(tmp_path, dimension=8)) == 6
+
+    with pytest.raises(ValueError):
+        VectorMemoryStore(tmp_path, dimension=16)
@@ -198,3 +198,377 @@ async def test_generate_response_with_embed_message(
     # 也可以继续检查其他部分
     assert "我是一个用于测试的看板娘。" in final_prompt
     assert "假的长期记忆1" in final_prompt
+
+
+@pytest.mark.asyncio
+async def test_generate_response_stream_uses_same_prompt(
+    ai_service: AIService, mock_llm_client: AsyncMock
+):
+    """
+    【测试用例3】流式生成应使用与非流式完全相同的 prompt，并原样转发 LLM 的分块。
+    """
+    mock_message = MagicMock()
+    mock_message.author = MagicMock(display_name="TestUser")
+    mock_message.clean_content = "流式测试"
+    mock_message.embeds = []
+    mock_message.channel.history.side_effect = lambda **kwargs: async_iter([])
+
+    streamed_prompts = []
+
+    async def fake_stream(prompt):
+        streamed_prompts.append(prompt)
+        yield "第一块"
+        yield "第二块"
+
+    mock_llm_client.generate_text_stream = fake_stream
+
+    chunks = [chunk async for chunk in ai_service.generate_response_stream(mock_message)]
+    await ai_service.generate_response(mock_message)
+
+    assert chunks == ["第一块", "第二块"]
+    assert streamed_prompts == [mock_llm_client.generate_text.call_args[0][0]]
+
+
+@pytest.mark.asyncio
+async def test_generate_response_uses_response_cache(
+    mock_llm_client: AsyncMock,
+    mock_character_manager: AsyncMock,
+    mock_member_service: AsyncMock,
+    mock_memory_service: AsyncMock,
+):
+    """
+    【测试用例4】启用响应缓存时，重复的问题 (不论是谁问的) 直接返回缓存的回答，不再调用 LLM；
+    依赖上下文或问到提问者自己的问题不会命中缓存。
+    """
+    from src.services.response_cache import ResponseCache
+
+    service = AIService(
+        llm_client=mock_llm_client,
+        character_manager=mock_character_manager,
+        member_service=mock_member_service,
+        memory_service=mock_memory_service,
+        response_cache=ResponseCache(),
+    )
+
+    def make_message(text, author_id=42):
+        message = MagicMock()
+        message.author = MagicMock(id=author_id, display_name="TestUser")
+        message.clean_content = text
+        message.embeds = []
+        message.reference = None
+        message.channel.history.side_effect = lambda **kwargs: async_iter([])
+        return message
+
+    first = await service.generate_response(make_message("@Bot 你们社群名字啥意思"))
+    second = await service.generate_response(make_message("@Bot 你们社群名字啥意思？"))
+    # 其他用户问同样的问题也直接复用缓存的回答
+    third = await service.generate_response(make_message("@Bot 你们社群名字啥意思", author_id=43))
+    await service.generate_response(make_message("@Bot 上面说的是真的吗"))
+    # 问到提问者自己的问题不缓存
+    await service.generate_response(make_message("@Bot 你还记得我吗"))
+    await service.generate_response(make_message("@Bot 你还记得我吗", author_id=43))
+
+    assert first == second == third == "这是来自模拟AI的回复"
+    assert mock_llm_client.generate_text.await_count == 4
+
+
+@pytest.mark.asyncio
+async def test_generate_response_coalesces_identical_prompts(
+    mock_llm_client: AsyncMock,
+    mock_character_manager: AsyncMock,
+    mock_member_service: AsyncMock,
+    mock_memory_service: AsyncMock,
+):
+    """
+    【测试用例5】启用在途请求去重时，同时到达的相同 prompt 只调用一次 LLM。
+    """
+    import asyncio
+    from src.services.single_flight import SingleFlight
+
+    release = asyncio.Event()
+
+    async def slow_generate(prompt):
+        await release.wait()
+        return "这是来自模拟AI的回复"
+
+    mock_llm_client.generate_text.side_effect = slow_generate
+    service = AIService(
+        llm_client=mock_llm_client,
+        character_manager=mock_character_manager,
+        member_service=mock_member_service,
+        memory_service=mock_memory_service,
+        single_flight=SingleFlight(),
+    )
+
+    def make_message():
+        message = MagicMock()
+        message.author = MagicMock(display_name="TestUser")
+        message.clean_content = "@Bot 你好"
+        message.embeds = []
+        message.reference = None
+        message.channel.history.side_effect = lambda **kwargs: async_iter([])
+        return message
+
+    tasks = [
+        asyncio.create_task(service.generate_response(make_message())) for _ in range(3)
+    ]
+    await asyncio.sleep(0.01)
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert results == ["这是来自模拟AI的回复"] * 3
+    assert mock_llm_client.generate_text.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_generate_response_does_not_coalesce_different_authors(
+    mock_llm_client: AsyncMock,
+    mock_character_manager: AsyncMock,
+    mock_member_service: AsyncMock,
+    mock_memory_service: AsyncMock,
+):
+    """
+    【测试用例5b】两个用户同时问同样的问题：prompt 中的成员信息不同，各自调用一次 LLM，
+    不会把针对一个用户生成的回答交给另一个用户。
+    """
+    import asyncio
+    from src.services.single_flight import SingleFlight
+
+    release = asyncio.Event()
+    prompts = []
+
+    async def slow_generate(prompt):
+        prompts.append(prompt)
+        await release.wait()
+        return "这是来自模拟AI的回复"
+
+    mock_llm_client.generate_text.side_effect = slow_generate
+    mock_member_service.get_or_create_member.side_effect = lambda user: MemberModel(
+        id=user.id, name=user.name, display_name=user.display_name
+    )
+    single_flight = SingleFlight()
+    service = AIService(
+        llm_client=mock_llm_client,
+        character_manager=mock_character_manager,
+        member_service=mock_member_service,
+        memory_service=mock_memory_service,
+        single_flight=single_flight,
+    )
+
+    def make_message(author_id, name):
+        message = MagicMock()
+        message.author = MagicMock(id=author_id, display_name=name)
+        message.author.name = name
+        message.clean_content = "@Bot 你好"
+        message.embeds = []
+        message.reference = None
+        message.channel.history.side_effect = lambda **kwargs: async_iter([])
+        return message
+
+    tasks = [
+        asyncio.create_task(service.generate_response(make_message(author_id, name)))
+        for author_id, name in ((1, "alice"), (2, "bob"))
+    ]
+    await asyncio.sleep(0.01)
+    release.set()
+    await asyncio.gather(*tasks)
+
+    assert mock_llm_client.generate_text.await_count == 2
+    assert sorted("alice" in p for p in prompts) == sorted("bob" in p for p in prompts) == [False, True]
+    assert single_flight.stats["coalesced"] == 0
+
+
+@pytest.mark.asyncio
+async def test_generate_response_records_stage_timings_without_printing(
+    ai_service: AIService, capsys
+):
+    """
+    【测试用例6】生成回复时记录各阶段耗时，且不再把完整 prompt 打印到标准输出。
+    """
+    from src.core.tracing import RequestTracer
+
+    ai_service.tracer = RequestTracer()
+    message = MagicMock()
+    message.author = MagicMock(display_name="TestUser")
+    message.clean_content = "@Bot 你好"
+    message.embeds = []
+    message.reference = None
+    message.channel.history.side_effect = lambda **kwargs: async_iter([])
+
+    await ai_service.generate_response(message)
+
+    stages = ai_service.tracer.stats["stage_avg"]
+    for stage in ("character", "member", "history", "memories", "assemble", "llm"):
+        assert stage in stages
+    assert capsys.readouterr().out == ""
+
+
+def test_prompt_log_is_sampled_and_truncated(ai_service: AIService, caplog):
+    """
+    【测试用例7】prompt 调试日志按采样比例记录，并截断到最大字符数。
+    """
+    import logging
+
+    ai_service.prompt_log_max_chars = 10
+    with caplog.at_level(logging.DEBUG, logger="src.services.ai_service"):
+        ai_service.prompt_log_sample_rate = 0.0
+        ai_service._log_prompt("x" * 100)
+        assert caplog.records == []
+
+        ai_service.prompt_log_sample_rate = 1.0
+        ai_service._log_prompt("x" * 100)
+
+    assert len(caplog.records) == 1
+    assert "x" * 11 not in caplog.text
+    assert "truncated 90 chars" in caplog.text
+
+
+def make_text_message(text="@Bot 你好"):
+    """创建一条只包含文本、没有历史记录的模拟消息。"""
+    message = MagicMock()
+    message.author = MagicMock(id=42, display_name="TestUser")
+    message.author.name = "test_user"
+    message.clean_content = text
+    message.embeds = []
+    message.reference = None
+    message.channel.history.side_effect = lambda **kwargs: async_iter([])
+    return message
+
+
+@pytest.mark.asyncio
+async def test_gather_context_runs_stages_concurrently(
+    ai_service: AIService,
+    mock_member_service: AsyncMock,
+    mock_memory_service: AsyncMock,
+):
+    """
+    【测试用例8】成员、历史和记忆三个阶段并发执行，总耗时约等于最慢的一个。
+    """
+    import asyncio
+    import time
+
+    member = mock_member_service.get_or_create_member.return_value
+
+    async def slow_member(user):
+        await asyncio.sleep(0.2)
+        return member
+
+    async def slow_memories(user_id, query, guild_id=None):
+        await asyncio.sleep(0.2)
+        return ["记忆"]
+
+    mock_member_service.get_or_create_member.side_effect = slow_member
+    mock_memory_service.retrieve_relevant_memories.side_effect = slow_memories
+
+    started = time.perf_counter()
+    context = await ai_service._gather_context(make_text_message())
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.35
+    assert context["memories"] == ["记忆"]
+    assert "fake_user" in context["user_info"]
+
+
+@pytest.mark.asyncio
+async def test_gather_context_degrades_slow_or_failing_stages(
+    ai_service: AIService,
+    mock_member_service: AsyncMock,
+    mock_memory_service: AsyncMock,
+    mock_llm_client: AsyncMock,
+):
+    """
+    【测试用例9】超时或出错的阶段使用降级结果：临时成员信息、没有历史、“无相关记忆”，
+    回复仍然正常生成。
+    """
+    import asyncio
+    from src.services.ai_service import ContextTimeouts
+
+    ai_service.context_timeouts = ContextTimeouts(deadline=0.05)
+
+    async def hanging_member(user):
+        await asyncio.sleep(10)
+
+    mock_member_service.get_or_create_member.side_effect = hanging_member
+    mock_memory_service.retrieve_relevant_memories.side_effect = RuntimeError("db down")
+    message = make_text_message()
+    message.channel.history.side_effect = RuntimeError("discord down")
+
+    response = await ai_service.generate_response(message)
+
+    assert response == "这是来自模拟AI的回复"
+    final_prompt = mock_llm_client.generate_text.call_args[0][0]
+    assert "User 'test_user' (ID: 42" in final_prompt
+    assert "无相关记忆" in final_prompt
+    assert ai_service.context_fallbacks == {"member": 1, "history": 1, "memories": 1}
+
+
+@pytest.mark.asyncio
+async def test_history_is_read_from_message_buffer_after_cold_start(
+    ai_service: AIService, mock_llm_client: AsyncMock
+):
+    """
+    【测试用例10】启用消息缓冲区时，只有冷启动时请求一次 REST 历史，之后直接读缓冲区。
+    """
+    from src.services.message_buffer import ChannelMessageBuffer
+
+    buffer = ChannelMessageBuffer()
+    ai_service.message_buffer = buffer
+    channel = MagicMock(id=7)
+
+    def make(message_id, text, name="HistUser"):
+        m = MagicMock(id=message_id, channel=channel, embeds=[], reference=None)
+        m.author = MagicMock(id=1, display_name=name)
+        m.clean_content = text
+        return m
+
+    channel.history.side_effect = lambda **kwargs: async_iter([make(1, "REST 历史")])
+
+    first = make(2, "@Bot 第一次")
+    buffer.add(first)
+    await ai_service.generate_response(first)
+
+    buffer.add(make(3, "没有 @ 的消息"))
+    second = make(4, "@Bot 第二次")
+    buffer.add(second)
+    await ai_service.generate_response(second)
+
+    assert channel.history.call_count == 1
+    final_prompt = mock_llm_client.generate_text.call_args[0][0]
+    assert "REST 历史" in final_prompt
+    assert "没有 @ 的消息" in final_prompt
+
+
+def test_format_message_for_llm_is_memoized(ai_service: AIService):
+    """
+    【测试用例11】同一条消息只格式化一次；编辑之后重新格式化。
+    """
+    message = MagicMock(id=1, edited_at=None, embeds=[])
+    message.author = MagicMock(display_name="HistUser")
+    message.clean_content = "第一版"
+
+    assert ai_service._format_message_for_llm(message) == "HistUser: 第一版"
+    message.clean_content = "不会被读取"
+    assert ai_service._format_message_for_llm(message) == "HistUser: 第一版"
+
+    message.edited_at = "2025-01-01"
+    message.clean_content = "第二版"
+    assert ai_service._format_message_for_llm(message) == "HistUser: 第二版"
+    assert ai_service.format_cache.stats["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_preceding_messages_are_merged_into_current_input(
+    ai_service: AIService, mock_llm_client: AsyncMock
+):
+    """
+    【测试用例12】合并回复时，几条消息拼成一个当前输入，历史从第一条消息之前开始取。
+    """
+    first = make_text_message("@Bot 在吗")
+    second = make_text_message("@Bot 问你个事")
+
+    await ai_service.generate_response(second, preceding=[first])
+
+    final_prompt = mock_llm_client.generate_text.call_args[0][0]
+    assert "TestUser: @Bot 在吗\n@Bot 问你个事" in final_prompt
+    first.channel.history.assert_called_once()
+    second.channel.history.assert_not_called()
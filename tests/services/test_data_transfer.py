@@ -0,0 +1,187 @@
+import datetime
+import json
+import pytest
+from sqlalchemy import select
+
+# 确保测试可以找到src目录下的模块
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.db.database import Database
+from src.db.models import Base, Event, Member
+from src.db.repositories.event_repository import EventRepository
+from src.db.repositories.member_repository import MemberRepository
+from src.services.data_transfer import DataTransferService, detect_file
+from src.services.event_retention import EventRetentionService
+
+BASE = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+async def make_database(path: Path) -> Database:
+    db = Database(f"sqlite+aiosqlite:///{path.as_posix()}")
+    async with db.engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return db
+
+
+def make_service(db: Database, **kwargs) -> DataTransferService:
+    return DataTransferService(
+        MemberRepository(db.session_factory, db.writer),
+        EventRepository(db.session_factory, db.writer),
+        batch_size=4,
+        **kwargs,
+    )
+
+
+@pytest.fixture
+async def source(tmp_path):
+    """源数据库：3 个成员、10 个事件，包含 NULL、空字符串、逗号、引号和换行。"""
+    db = await make_database(tmp_path / "source.db")
+    await EventRepository(db.session_factory, db.writer).create_many(
+        [
+            {
+                "event_id": 1000 + i,
+                "event_type": "message" if i % 3 else "reaction_add",
+                "author_id": i % 3,
+                "content": {5: None, 8: ""}.get(i, f'第 {i} 条，"引号"\n换行'),
+                "channel_id": 10,
+                "guild_id": None if i == 7 else 20,
+                "created_at": BASE + datetime.timedelta(minutes=i),
+            }
+            for i in range(10)
+        ],
+        [{"id": i, "name": f"user{i}", "display_name": None if i == 1 else f"昵称{i}"} for i in range(3)],
+    )
+    yield db
+    await db.dispose()
+
+
+@pytest.fixture
+async def target(tmp_path):
+    db = await make_database(tmp_path / "target.db")
+    yield db
+    await db.dispose()
+
+
+async def table_rows(db: Database):
+    async with db.session_factory() as session:
+        members = (await session.execute(select(*Member.__table__.c).order_by(Member.id))).all()
+        events = (
+            await session.execute(
+                select(*(c for c in Event.__table__.c if c.name != "id")).order_by(Event.event_id)
+            )
+        ).all()
+    return [tuple(m) for m in members], [tuple(e) for e in events]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fmt, compress", [("jsonl", False), ("jsonl", True), ("csv", False), ("csv", True)])
+async def test_export_then_import_round_trips_all_rows(source, target, tmp_path, fmt, compress):
+    """【单元测试】导出再导入到另一个数据库后，两张表的数据完全一致 (包括 NULL 与空字符串、时间和特殊字符)。"""
+    exported = await make_service(source).export(tmp_path / "export", fmt=fmt, compress=compress)
+    assert [(s.table, s.rows) for s in exported] == [("events", 10), ("members", 3)]
+    assert sorted(p.name for p in (tmp_path / "export").iterdir()) == [
+        f"events.{fmt}{'.gz' if compress else ''}",
+        f"members.{fmt}{'.gz' if compress else ''}",
+    ]
+
+    imported = await make_service(target).import_files([tmp_path / "export"])
+
+    # 成员总是先于事件导入
+    assert [(s.table, s.rows) for s in imported] == [("members", 3), ("events", 10)]
+    assert await table_rows(target) == await table_rows(source)
+    # 导入的事件也进入了全文索引
+    hits = await EventRepository(target.session_factory).search_events("引号")
+    assert len(hits) == 8
+
+
+@pytest.mark.asyncio
+async def test_import_resumes_after_the_last_committed_batch(source, target, tmp_path):
+    """【单元测试】再次导入时跳过进度文件中记录的已提交行；--restart 时从头导入，已有的行被忽略。"""
+    await make_service(source).export(tmp_path / "export")
+    events_file = tmp_path / "export" / "events.jsonl"
+    # 模拟上次导入在提交了前 8 行之后中断
+    stat = events_file.stat()
+    (tmp_path / "export" / "events.jsonl.progress").write_text(
+        json.dumps({"rows": 8, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns})
+    )
+    reported = []
+
+    resumed = await make_service(target, progress=lambda s: reported.append(s.skipped + s.rows)).import_files(
+        [tmp_path / "export" / "members.jsonl", events_file]
+    )
+
+    assert [(s.rows, s.skipped) for s in resumed] == [(3, 0), (2, 8)]
+    assert reported[-1] == 10
+    _, events = await table_rows(target)
+    assert [e[0] for e in events] == [1008, 1009]
+
+    again = await make_service(target).import_files([events_file])
+    assert [(s.rows, s.skipped) for s in again] == [(0, 10)]
+
+    restarted = await make_service(target).import_files([events_file], restart=True)
+    assert [(s.rows, s.skipped) for s in restarted] == [(10, 0)]
+    assert await table_rows(target) == await table_rows(source)
+
+
+@pytest.mark.asyncio
+async def test_reexport_into_the_same_directory_is_imported_in_full(source, target, tmp_path):
+    """【单元测试】重新导出到同一目录会删除旧的进度文件；文件与进度文件中记录的大小或修改时间不一致时不续传。"""
+    export_dir = tmp_path / "export"
+    await make_service(source).export(export_dir)
+    await make_service(target).import_files([export_dir])
+    stale_progress = (export_dir / "events.jsonl.progress").read_text()
+
+    # 源数据库删除旧事件、新增 4 个事件后再次导出到同一目录
+    source_events = EventRepository(source.session_factory, source.writer)
+    async with source.session_factory() as session:
+        old_ids = (await session.execute(select(Event.id))).scalars().all()
+    await source_events.delete_events(old_ids)
+    await source_events.create_many(
+        [
+            {"event_id": 2000 + i, "event_type": "message", "author_id": 0, "created_at": BASE}
+            for i in range(4)
+        ]
+    )
+    await make_service(source).export(export_dir)
+    assert not (export_dir / "events.jsonl.progress").exists()
+
+    reimported = await make_service(target).import_files([export_dir / "events.jsonl"])
+    assert [(s.rows, s.skipped) for s in reimported] == [(4, 0)]
+
+    # 进度文件来自之前的另一个同名文件 (例如手动复制过来) 时同样从头导入
+    (export_dir / "events.jsonl.progress").write_text(stale_progress)
+    again = await make_service(target).import_files([export_dir / "events.jsonl"])
+    assert [(s.rows, s.skipped) for s in again] == [(4, 0)]
+    _, events = await table_rows(target)
+    assert [e[0] for e in events][-4:] == [2000, 2001, 2002, 2003]
+
+
+@pytest.mark.asyncio
+async def test_retention_archives_can_be_imported(source, target, tmp_path):
+    """【单元测试】保留策略的归档文件可以直接导入 (例如把删除的事件恢复到分析用的数据库)。"""
+    await make_service(source).export(tmp_path / "export")
+    result = await EventRetentionService(
+        EventRepository(source.session_factory, source.writer),
+        archive_dir=tmp_path / "archive",
+        ttl_days={"message": 1},
+        clock=lambda: BASE + datetime.timedelta(days=30),
+    ).run()
+
+    imported = await make_service(target).import_files([tmp_path / "export" / "members.jsonl", *result.archives])
+
+    assert [(s.table, s.rows) for s in imported] == [("members", 3), ("events", 6)]
+    _, events = await table_rows(target)
+    assert {e[1] for e in events} == {"message"}
+
+
+def test_detect_file_recognises_exports_and_archives():
+    """【单元测试】从文件名识别数据表和格式，无法识别时报错。"""
+    assert detect_file(Path("members.jsonl")) == ("members", "jsonl")
+    assert detect_file(Path("events.csv.gz")) == ("events", "csv")
+    assert detect_file(Path("events-message-20250601T000000Z.jsonl.gz")) == ("events", "jsonl")
+    for name in ("events.jsonl.progress", "events.jsonl.partial", "notes.txt"):
+        with pytest.raises(ValueError):
+            detect_file(Path(name))
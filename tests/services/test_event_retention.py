@@ -0,0 +1,145 @@
+import datetime
+import gzip
+import json
+import pytest
+from sqlalchemy import func, select, text
+
+# 确保测试可以找到src目录下的模块
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.db.database import Database
+from src.db.models import Base, Event, Member
+from src.db.repositories.event_repository import EventRepository
+from src.services.event_retention import EventRetentionService, read_archive, read_archives
+
+NOW = datetime.datetime(2025, 6, 1, tzinfo=datetime.timezone.utc)
+
+
+@pytest.fixture
+async def database(tmp_path):
+    """一个基于临时文件的 SQLite 数据库 (auto_vacuum=INCREMENTAL)，包含所有表。"""
+    db = Database(f"sqlite+aiosqlite:///{(tmp_path / 'test.db').as_posix()}")
+    async with db.engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield db
+    await db.dispose()
+
+
+@pytest.fixture
+def event_repo(database: Database) -> EventRepository:
+    return EventRepository(database.session_factory, database.writer)
+
+
+async def seed(event_repo: EventRepository):
+    """每种类型各写入 10 天前到 1 天前的事件：message 10 个、reaction_add 10 个、member_join 10 个。"""
+    rows = []
+    for event_type_index, event_type in enumerate(("message", "reaction_add", "member_join")):
+        for day in range(1, 11):
+            rows.append(
+                {
+                    "event_id": event_type_index * 100 + day,
+                    "event_type": event_type,
+                    "author_id": 1,
+                    "content": f"{event_type} {'很长的中文消息' * 50} {day}",
+                    "channel_id": 10,
+                    "guild_id": 20,
+                    "created_at": NOW - datetime.timedelta(days=day, minutes=1),
+                }
+            )
+    await event_repo.create_many(rows, [{"id": 1, "name": "user1", "display_name": None}])
+
+
+async def remaining(database: Database):
+    async with database.session_factory() as session:
+        rows = (await session.execute(select(Event.event_type, Event.event_id))).all()
+    return sorted(rows)
+
+
+def service(event_repo, tmp_path, database=None, **kwargs) -> EventRetentionService:
+    return EventRetentionService(
+        event_repo,
+        archive_dir=tmp_path / "archive",
+        batch_size=3,
+        database=database,
+        clock=lambda: NOW,
+        **kwargs,
+    )
+
+
+@pytest.mark.asyncio
+async def test_expired_events_are_archived_then_deleted_per_type(event_repo, database, tmp_path):
+    """【单元测试】按类型的保留天数归档并删除过期事件；其他类型使用默认天数。"""
+    await seed(event_repo)
+
+    result = await service(
+        event_repo, tmp_path, ttl_days={"message": 7, "reaction_add": 3}, default_ttl_days=5
+    ).run()
+
+    # message 保留 7 天 (删除 7..10 天前的 4 个)，reaction_add 保留 3 天 (删除 8 个)，member_join 保留 5 天 (删除 6 个)
+    assert (result.archived, result.deleted) == (18, 18)
+    assert await remaining(database) == sorted(
+        [("message", d) for d in range(1, 7)]
+        + [("reaction_add", 100 + d) for d in range(1, 3)]
+        + [("member_join", 200 + d) for d in range(1, 5)]
+    )
+
+    assert sorted(p.name for p in result.archives) == [
+        "events-member_join-20250601T000000Z.jsonl.gz",
+        "events-message-20250601T000000Z.jsonl.gz",
+        "events-reaction_add-20250601T000000Z.jsonl.gz",
+    ]
+    messages = list(read_archives(tmp_path / "archive", event_type="message"))
+    assert [r["event_id"] for r in messages] == [10, 9, 8, 7]
+    assert messages[0]["created_at"] == NOW - datetime.timedelta(days=10, minutes=1)
+    assert messages[0]["content"].startswith("message 很长的中文消息")
+    assert len(list(read_archives(tmp_path / "archive"))) == 18
+
+    # 全文索引中被删除的事件也同步删除了
+    hits = await event_repo.search_events("message 很长", limit=50)
+    assert sorted(hit.event.event_id for hit in hits) == [1, 2, 3, 4, 5, 6]
+
+
+@pytest.mark.asyncio
+async def test_types_without_ttl_are_kept_forever(event_repo, database, tmp_path):
+    """【单元测试】没有设置默认保留天数时，未单独设置的类型永久保留；再次运行没有新的过期事件。"""
+    await seed(event_repo)
+    retention = service(event_repo, tmp_path, ttl_days={"message": 7})
+
+    first = await retention.run()
+    second = await retention.run()
+
+    assert first.deleted == 4
+    assert (second.archived, second.deleted, second.archives) == (0, 0, [])
+    assert len(await remaining(database)) == 26
+
+
+@pytest.mark.asyncio
+async def test_freed_pages_are_vacuumed(event_repo, database, tmp_path):
+    """【单元测试】删除之后用 incremental_vacuum 把空闲页归还给文件系统。"""
+    await seed(event_repo)
+
+    result = await service(event_repo, tmp_path, database=database, default_ttl_days=0).run()
+
+    assert result.deleted == 30
+    assert result.vacuumed_pages > 0
+    async with database.engine.connect() as conn:
+        assert (await conn.execute(text("PRAGMA freelist_count"))).scalar() == 0
+        assert (await conn.execute(select(func.count()).select_from(Event))).scalar() == 0
+        assert (await conn.execute(select(func.count()).select_from(Member))).scalar() == 1
+
+
+def test_truncated_archive_returns_records_written_before_the_cut(tmp_path):
+    """【单元测试】写入中途被中断 (缺少 gzip 结尾) 的归档仍然能读出已经写入的记录。"""
+    path = tmp_path / "events-message-20250601T000000Z.jsonl.gz"
+    records = [{"event_id": i, "event_type": "message", "created_at": NOW.isoformat()} for i in range(3)]
+    data = gzip.compress("".join(json.dumps(r) + "\n" for r in records).encode("utf-8"))
+    # 去掉 8 字节的 CRC 和长度结尾
+    path.write_bytes(data[:-8])
+
+    loaded = list(read_archive(path))
+
+    assert [r["event_id"] for r in loaded] == [0, 1, 2]
+    assert loaded[0]["created_at"] == NOW
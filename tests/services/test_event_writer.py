@@ -0,0 +1,116 @@
+import asyncio
+import datetime
+import pytest
+from unittest.mock import AsyncMock
+
+# 确保测试可以找到src目录下的模块
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.services.event_writer import EventWriter, PendingEvent
+
+
+def pending(event_id, author_id=1):
+    return PendingEvent(
+        event_id=event_id,
+        event_type="message",
+        author_id=author_id,
+        author_name=f"user{author_id}",
+        author_display_name=None,
+        content="hi",
+        channel_id=1,
+        guild_id=None,
+        created_at=datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc),
+    )
+
+
+def written_ids(repo):
+    return [[row["event_id"] for row in call.args[0]] for call in repo.create_many.await_args_list]
+
+
+@pytest.mark.asyncio
+async def test_batch_is_flushed_when_size_is_reached():
+    """【单元测试】攒够 batch_size 个事件时立即写入，不等 flush_interval。"""
+    repo = AsyncMock()
+    writer = EventWriter(repo, batch_size=3, flush_interval=10)
+
+    for event_id in range(3):
+        assert await writer.record(pending(event_id))
+    await asyncio.sleep(0.01)
+
+    assert written_ids(repo) == [[0, 1, 2]]
+    assert writer.stats["written"] == 3
+    await writer.close()
+
+
+@pytest.mark.asyncio
+async def test_partial_batch_is_flushed_after_interval():
+    """【单元测试】不足一批时，距第一个事件 flush_interval 秒后写入；同一作者在一批中只出现一次。"""
+    repo = AsyncMock()
+    writer = EventWriter(repo, batch_size=100, flush_interval=0.02)
+
+    await writer.record(pending(1))
+    await writer.record(pending(2))
+    await asyncio.sleep(0.005)
+    assert written_ids(repo) == []
+    await asyncio.sleep(0.05)
+
+    assert written_ids(repo) == [[1, 2]]
+    assert repo.create_many.await_args.args[1] == [{"id": 1, "name": "user1", "display_name": None}]
+    await writer.close()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_applies_backpressure_then_drops():
+    """【单元测试】队列满时生产者最多等待 backpressure_timeout 秒，仍放不进去就丢弃并计数。"""
+    release = asyncio.Event()
+
+    async def slow_write(*args):
+        await release.wait()
+
+    repo = AsyncMock()
+    repo.create_many.side_effect = slow_write
+    writer = EventWriter(repo, batch_size=1, flush_interval=0, max_queue=1, backpressure_timeout=0.02)
+
+    assert await writer.record(pending(1))  # 被后台任务取走，卡在写入中
+    await asyncio.sleep(0.005)
+    assert await writer.record(pending(2))  # 占满队列
+    assert not await writer.record(pending(3))  # 背压超时后被丢弃
+
+    assert writer.stats["dropped"] == 1
+    release.set()
+    await writer.close()
+    assert writer.stats["written"] == 2
+
+
+@pytest.mark.asyncio
+async def test_close_flushes_pending_events_and_rejects_new_ones():
+    """【单元测试】关闭时写完队列中剩余的事件，之后不再接收新事件。"""
+    repo = AsyncMock()
+    writer = EventWriter(repo, batch_size=2, flush_interval=10)
+
+    for event_id in range(5):
+        await writer.record(pending(event_id))
+    await writer.close()
+
+    assert sorted(i for batch in written_ids(repo) for i in batch) == [0, 1, 2, 3, 4]
+    assert not await writer.record(pending(6))
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_counted_and_writer_keeps_running():
+    """【单元测试】一批写入失败时记录失败数量，后台任务继续处理后续事件。"""
+    repo = AsyncMock()
+    repo.create_many.side_effect = [RuntimeError("db down"), None]
+    writer = EventWriter(repo, batch_size=1, flush_interval=10)
+
+    await writer.record(pending(1))
+    await asyncio.sleep(0.01)
+    await writer.record(pending(2))
+    await asyncio.sleep(0.01)
+
+    assert writer.stats["failed"] == 1
+    assert writer.stats["written"] == 1
+    await writer.close()
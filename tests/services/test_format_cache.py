@@ -0,0 +1,59 @@
+import datetime
+from types import SimpleNamespace
+
+# 确保测试可以找到src目录下的模块
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.services.format_cache import FormattedMessageCache
+
+
+def msg(message_id, edited_at=None, display_name="A"):
+    return SimpleNamespace(id=message_id, edited_at=edited_at, author=SimpleNamespace(display_name=display_name))
+
+
+def test_hit_and_miss_counters():
+    """【单元测试】命中和未命中都会被计数，并给出命中率。"""
+    cache = FormattedMessageCache()
+    assert cache.get(msg(1)) is None
+    cache.put(msg(1), "A: hi")
+
+    assert cache.get(msg(1)) == "A: hi"
+    assert cache.stats == {"entries": 1, "hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_edited_message_gets_a_new_key():
+    """【单元测试】消息被编辑后 (edited_at 变化) 不会命中旧的格式化结果。"""
+    cache = FormattedMessageCache()
+    cache.put(msg(1), "旧")
+
+    edited = msg(1, datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc))
+    assert cache.get(edited) is None
+
+
+def test_renamed_author_and_evicted_message_miss():
+    """【单元测试】作者改了显示名称，或者消息被更新 (例如链接预览展开，edited_at 不变) 后不会命中旧的文本。"""
+    cache = FormattedMessageCache()
+    cache.put(msg(1), "A: 看这个链接")
+    cache.put(msg(2), "A: 战报")
+
+    assert cache.get(msg(1, display_name="新昵称")) is None
+    cache.evict(2)
+    cache.evict(3)
+    assert cache.get(msg(2)) is None
+    assert cache.stats["entries"] == 1
+
+
+def test_cache_is_bounded_lru():
+    """【单元测试】超过上限时淘汰最久没有使用的条目。"""
+    cache = FormattedMessageCache(max_entries=2)
+    cache.put(msg(1), "1")
+    cache.put(msg(2), "2")
+    cache.get(msg(1))
+    cache.put(msg(3), "3")
+
+    assert cache.get(msg(2)) is None
+    assert cache.get(msg(1)) == "1"
+    assert cache.stats["entries"] == 2
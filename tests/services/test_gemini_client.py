@@ -72,3 +72,94 @@ async def test_generate_text_api_error(gemini_client: GeminiClient):
 
         # 断言模拟的API方法被调用了
         mock_generate.assert_awaited_once_with(prompt)
+
+
+def _fake_stream(*texts):
+    """创建一个模拟的流式响应，按顺序产出带 .text 属性的分块。"""
+
+    async def _iter():
+        for text in texts:
+            chunk = AsyncMock()
+            chunk.text = text
+            yield chunk
+
+    return _iter()
+
+
+@pytest.mark.asyncio
+async def test_generate_text_stream_yields_chunks(gemini_client: GeminiClient):
+    """
+    测试流式生成时，方法能否按顺序逐块产出文本，并以 stream=True 调用 API。
+    """
+    with patch(
+        "google.generativeai.GenerativeModel.generate_content_async",
+        new=AsyncMock(return_value=_fake_stream("你", "", "好")),
+    ) as mock_generate:
+        chunks = [chunk async for chunk in gemini_client.generate_text_stream("hi")]
+
+        assert chunks == ["你", "好"]
+        mock_generate.assert_awaited_once_with("hi", stream=True)
+
+
+@pytest.mark.asyncio
+async def test_generate_text_stream_empty_raises(gemini_client: GeminiClient):
+    """
+    测试流式响应没有任何文本时，抛出 LLMClientError。
+    """
+    with patch(
+        "google.generativeai.GenerativeModel.generate_content_async",
+        new=AsyncMock(return_value=_fake_stream()),
+    ):
+        with pytest.raises(LLMClientError, match="empty response"):
+            async for _ in gemini_client.generate_text_stream("hi"):
+                pass
+
+
+@pytest.mark.asyncio
+async def test_generate_text_marks_rate_limit_as_retryable(gemini_client: GeminiClient):
+    """
+    测试限流 (429) 等暂时性错误被标记为可重试，而参数错误不会。
+    """
+    from google.api_core import exceptions as google_exceptions
+
+    for error, retryable in [
+        (google_exceptions.ResourceExhausted("quota"), True),
+        (google_exceptions.InvalidArgument("bad"), False),
+    ]:
+        with patch(
+            "google.generativeai.GenerativeModel.generate_content_async",
+            new=AsyncMock(side_effect=error),
+        ):
+            with pytest.raises(LLMClientError) as excinfo:
+                await gemini_client.generate_text("hi")
+            assert excinfo.value.retryable is retryable
+
+
+@pytest.mark.asyncio
+async def test_generate_text_records_token_usage(gemini_client: GeminiClient):
+    """
+    测试成功调用后，从响应的 usage_metadata 中记录 token 用量。
+    """
+    mock_api_response = AsyncMock()
+    mock_api_response.text = "ok"
+    mock_api_response.usage_metadata.prompt_token_count = 12
+    mock_api_response.usage_metadata.candidates_token_count = 3
+
+    with patch(
+        "google.generativeai.GenerativeModel.generate_content_async",
+        new=AsyncMock(return_value=mock_api_response),
+    ):
+        await gemini_client.generate_text("hi")
+
+    assert gemini_client.last_usage.prompt_tokens == 12
+    assert gemini_client.last_usage.completion_tokens == 3
+    assert gemini_client.last_usage.total_tokens == 15
+
+
+def test_constructor_does_not_configure_genai():
+    """
+    测试只创建客户端不会调用 genai.configure，以便离线环境下也能构建容器。
+    """
+    with patch("google.generativeai.configure") as mock_configure:
+        GeminiClient(api_key="fake-api-key", model_name="fake-model")
+    mock_configure.assert_not_called()
@@ -0,0 +1,119 @@
+import asyncio
+import pytest
+
+# 确保测试可以找到src目录下的模块
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.services.llm_scheduler import LLMBusyError, LLMScheduler
+
+
+async def hold_slot(scheduler, user_id, guild_id, order, release: asyncio.Event):
+    """获取名额后记录顺序，并一直占用名额直到 release 被触发。"""
+    async with scheduler.slot(user_id=user_id, guild_id=guild_id):
+        order.append((guild_id, user_id))
+        await release.wait()
+
+
+@pytest.mark.asyncio
+async def test_in_flight_limit_is_enforced():
+    """【单元测试】同时在途的请求数不超过 max_in_flight。"""
+    scheduler = LLMScheduler(max_in_flight=2, max_queue_depth=10)
+    release = asyncio.Event()
+    order = []
+
+    tasks = [
+        asyncio.create_task(hold_slot(scheduler, user, 1, order, release))
+        for user in range(5)
+    ]
+    await asyncio.sleep(0)
+
+    assert scheduler.in_flight == 2
+    assert scheduler.queue_depth == 3
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert scheduler.in_flight == 0
+    assert scheduler.stats["admitted"] == 5
+
+
+@pytest.mark.asyncio
+async def test_round_robin_prevents_one_user_from_starving_others():
+    """
+    【单元测试】刷屏用户排了很多请求时，其他用户的请求仍然会被轮流调度。
+    """
+    scheduler = LLMScheduler(max_in_flight=1, max_queue_depth=20)
+    order = []
+    blocker = asyncio.Event()
+
+    first = asyncio.create_task(hold_slot(scheduler, "busy", "g1", order, blocker))
+    await asyncio.sleep(0)
+
+    # “刷屏”用户先排了 3 个请求，另一个服务器和同服务器的另一个用户各排了 1 个
+    releases = []
+    tasks = []
+    for user, guild in [("spam", "g1")] * 3 + [("quiet", "g1"), ("other", "g2")]:
+        event = asyncio.Event()
+        event.set()
+        releases.append(event)
+        tasks.append(asyncio.create_task(hold_slot(scheduler, user, guild, order, event)))
+        await asyncio.sleep(0)
+
+    blocker.set()
+    await asyncio.gather(first, *tasks)
+
+    # 服务器之间轮询，g1 内部用户之间轮询
+    assert order == [
+        ("g1", "busy"),
+        ("g1", "spam"),
+        ("g2", "other"),
+        ("g1", "quiet"),
+        ("g1", "spam"),
+        ("g1", "spam"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_fast():
+    """【单元测试】队列已满时立即抛出 LLMBusyError。"""
+    scheduler = LLMScheduler(max_in_flight=1, max_queue_depth=1)
+    release = asyncio.Event()
+    order = []
+    tasks = [
+        asyncio.create_task(hold_slot(scheduler, user, 1, order, release))
+        for user in range(2)
+    ]
+    await asyncio.sleep(0)
+
+    with pytest.raises(LLMBusyError):
+        async with scheduler.slot(user_id=99, guild_id=1):
+            pass
+    assert scheduler.stats["rejected"] == 1
+
+    release.set()
+    await asyncio.gather(*tasks)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_a_slot():
+    """【单元测试】排队中被取消的请求不会占用名额，也不会让计数出错。"""
+    scheduler = LLMScheduler(max_in_flight=1, max_queue_depth=5)
+    release = asyncio.Event()
+    order = []
+    holder = asyncio.create_task(hold_slot(scheduler, "a", 1, order, release))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(hold_slot(scheduler, "b", 1, order, release))
+    await asyncio.sleep(0)
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert scheduler.queue_depth == 0
+
+    release.set()
+    await holder
+    assert scheduler.in_flight == 0
+    async with scheduler.slot(user_id="c", guild_id=1):
+        assert scheduler.in_flight == 1
@@ -0,0 +1,68 @@
+# 确保测试可以找到src目录下的模块
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.db.models import Member
+from src.services.member_cache import MemberCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def member(member_id, name="alice", display_name="Alice"):
+    return Member(id=member_id, name=name, display_name=display_name)
+
+
+def test_hit_requires_unchanged_names():
+    """【单元测试】名字一致时命中；名字变化视为未命中。"""
+    cache = MemberCache()
+    cache.put(member(1))
+
+    assert cache.get(1, "alice", "Alice").id == 1
+    assert cache.get(1, "alice", "Queen Alice") is None
+    assert cache.stats["hits"] == 1
+    assert cache.stats["misses"] == 1
+
+
+def test_snapshot_expires_after_ttl():
+    """【单元测试】超过 TTL 的快照不再命中，并从缓存中移除。"""
+    clock = FakeClock()
+    cache = MemberCache(ttl=10, clock=clock)
+    cache.put(member(1))
+
+    clock.now = 9.9
+    assert cache.get(1, "alice", "Alice") is not None
+    clock.now = 10.0
+    assert cache.get(1, "alice", "Alice") is None
+    assert cache.stats["entries"] == 0
+
+
+def test_cache_is_bounded_lru():
+    """【单元测试】超过上限时淘汰最久没有使用的条目，并计入 evictions。"""
+    cache = MemberCache(max_entries=2)
+    cache.put(member(1))
+    cache.put(member(2))
+    cache.get(1, "alice", "Alice")
+    cache.put(member(3))
+
+    assert cache.get(2, "alice", "Alice") is None
+    assert cache.get(1, "alice", "Alice") is not None
+    assert cache.stats["evictions"] == 1
+
+
+def test_invalidate_drops_snapshot():
+    """【单元测试】invalidate 丢弃快照，只有确实存在时才计数。"""
+    cache = MemberCache()
+    cache.put(member(1))
+
+    assert cache.invalidate(1) is True
+    assert cache.invalidate(1) is False
+    assert cache.get(1, "alice", "Alice") is None
+    assert cache.stats["invalidations"] == 1
@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
@@ -37,7 +37,7 @@ async def test_get_or_create_member_creates_new_user(
     mock_discord_member = MagicMock()
     mock_discord_member.id = 12345
     mock_discord_member.name = "new_user"
-    mock_discord_member.display_name = "Newbie"
+    mock_discord_member.global_name = "Newbie"
 
     db_member = await member_service.get_or_create_member(mock_discord_member)
 
@@ -63,7 +63,7 @@ async def test_get_or_create_member_retrieves_and_updates_existing_user(
     mock_discord_member = MagicMock()
     mock_discord_member.id = 67890
     mock_discord_member.name = "old_user"
-    mock_discord_member.display_name = "Arch-Veteran"
+    mock_discord_member.global_name = "Arch-Veteran"
 
     # 执行
     db_member = await member_service.get_or_create_member(mock_discord_member)
@@ -74,3 +74,53 @@ async def test_get_or_create_member_retrieves_and_updates_existing_user(
     # 验证数据库总数仍然是 1
     all_members = await db_session.execute(select(Member))
     assert len(all_members.scalars().all()) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_or_create_member_serves_unchanged_member_from_cache(member_repo: MemberRepository):
+    """测试名字没有变化的成员第二次请求时直接命中缓存，不再访问数据库。"""
+    repo = MagicMock(wraps=member_repo)
+    repo.get_or_create = AsyncMock(wraps=member_repo.get_or_create)
+    service = MemberService(member_repo=repo)
+
+    user = MagicMock()
+    user.id = 24680
+    user.name = "cached_user"
+    user.global_name = "Cached"
+
+    first = await service.get_or_create_member(user)
+    second = await service.get_or_create_member(user)
+
+    assert second is first
+    assert repo.get_or_create.await_count == 1
+    assert service.member_cache.stats["hits"] == 1
+
+    # 服务器昵称变化不影响 members 表，仍然命中缓存
+    user.display_name = "服务器昵称"
+    assert await service.get_or_create_member(user) is first
+    assert repo.get_or_create.await_count == 1
+
+    # 全局显示名称变化后回到数据库更新
+    user.global_name = "Renamed"
+    updated = await service.get_or_create_member(user)
+    assert updated.display_name == "Renamed"
+    assert repo.get_or_create.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_invalidate_forces_database_lookup(member_repo: MemberRepository):
+    """测试 invalidate 之后，下一次请求会重新访问数据库。"""
+    repo = MagicMock(wraps=member_repo)
+    repo.get_or_create = AsyncMock(wraps=member_repo.get_or_create)
+    service = MemberService(member_repo=repo)
+
+    user = MagicMock()
+    user.id = 13579
+    user.name = "someone"
+    user.global_name = "Someone"
+
+    await service.get_or_create_member(user)
+    service.invalidate(user.id)
+    await service.get_or_create_member(user)
+
+    assert repo.get_or_create.await_count == 2
@@ -0,0 +1,78 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+# 确保测试可以找到src目录下的模块
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.services.member_sync import MemberSyncService
+
+
+class FakeGuild:
+    def __init__(self, members):
+        self.id = 1
+        self.name = "guild"
+        self.member_count = len(members)
+        self._members = members
+
+    async def fetch_members(self, limit=None):
+        for member in self._members:
+            yield member
+
+
+def discord_member(member_id, bot=False, nick=None):
+    return SimpleNamespace(
+        id=member_id,
+        name=f"user{member_id}",
+        global_name=f"U{member_id}",
+        display_name=nick or f"U{member_id}",
+        bot=bot,
+    )
+
+
+@pytest.mark.asyncio
+async def test_sync_guild_writes_in_batches_and_skips_bots():
+    """【单元测试】成员按 batch_size 分批写入，机器人不会被记录。"""
+    repo = AsyncMock()
+    repo.sync_many.side_effect = lambda batch: len(batch)
+    service = MemberSyncService(member_repo=repo, batch_size=2)
+    guild = FakeGuild([discord_member(i) for i in range(5)] + [discord_member(99, bot=True)])
+
+    result = await service.sync_guild(guild)
+
+    batches = [call.args[0] for call in repo.sync_many.await_args_list]
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert all(member_id != 99 for batch in batches for member_id, _, _ in batch)
+    assert batches[0][0] == (0, "user0", "U0")
+    assert (result.seen, result.written) == (5, 5)
+
+
+@pytest.mark.asyncio
+async def test_sync_writes_global_names_not_guild_nicknames():
+    """【单元测试】同步写入全局显示名称 (没有时为用户名)，同一用户在不同服务器的昵称不会互相覆盖。"""
+    repo = AsyncMock()
+    repo.sync_many.side_effect = lambda batch: len(batch)
+    service = MemberSyncService(member_repo=repo, batch_size=10)
+    no_global_name = discord_member(2, nick="二号")
+    no_global_name.global_name = None
+
+    await service.sync_guild(FakeGuild([discord_member(1, nick="服务器A的昵称"), no_global_name]))
+    await service.sync_guild(FakeGuild([discord_member(1, nick="服务器B的昵称")]))
+
+    batches = [call.args[0] for call in repo.sync_many.await_args_list]
+    assert batches == [[(1, "user1", "U1"), (2, "user2", "user2")], [(1, "user1", "U1")]]
+
+
+@pytest.mark.asyncio
+async def test_sync_guild_reports_only_written_differences():
+    """【单元测试】结果中的 written 来自仓库实际写入的数量 (只有差异)。"""
+    repo = AsyncMock()
+    repo.sync_many.return_value = 0
+    service = MemberSyncService(member_repo=repo, batch_size=10)
+
+    result = await service.sync_guild(FakeGuild([discord_member(i) for i in range(3)]))
+
+    assert (result.seen, result.written) == (3, 0)
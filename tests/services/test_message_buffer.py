@@ -0,0 +1,103 @@
+import pytest
+from types import SimpleNamespace
+
+# 确保测试可以找到src目录下的模块
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.services.message_buffer import ChannelMessageBuffer
+
+
+def msg(message_id: int, channel_id: int = 1, content: str = ""):
+    """创建一条只带 ID、频道和内容的轻量消息。"""
+    return SimpleNamespace(
+        id=message_id, channel=SimpleNamespace(id=channel_id), clean_content=content
+    )
+
+
+def ids(messages):
+    return [m.id for m in messages]
+
+
+def test_cold_start_returns_none_until_seeded():
+    """【单元测试】没有用 REST 历史补齐过的频道返回 None (冷启动)。"""
+    buffer = ChannelMessageBuffer(per_channel=20)
+    for i in range(1, 6):
+        buffer.add(msg(i))
+
+    assert buffer.recent(1, before=msg(5), limit=3) is None
+    assert buffer.stats["cold_misses"] == 1
+
+
+def test_seeded_buffer_serves_history_newest_first():
+    """【单元测试】补齐之后，新消息实时写入，历史直接从缓冲区读取 (从新到旧)。"""
+    buffer = ChannelMessageBuffer(per_channel=20)
+    current = msg(10)
+    buffer.add(current)
+    buffer.seed(1, [msg(9), msg(8), msg(7)], before=current, limit=3)
+
+    buffer.add(msg(11))
+    buffer.add(msg(12))
+
+    assert ids(buffer.recent(1, before=msg(12), limit=3)) == [11, 10, 9]
+    assert buffer.stats["hits"] == 1
+
+
+def test_short_channel_without_older_messages_is_complete():
+    """【单元测试】REST 返回的条数少于 limit，说明频道本来就只有这些消息，不算缺口。"""
+    buffer = ChannelMessageBuffer(per_channel=20)
+    current = msg(3)
+    buffer.add(current)
+    buffer.seed(1, [msg(2), msg(1)], before=current, limit=10)
+
+    assert ids(buffer.recent(1, before=current, limit=10)) == [2, 1]
+
+
+def test_delete_creates_gap_and_edit_replaces_message():
+    """【单元测试】删除导致条数不够时返回 None (缺口)；编辑会替换缓冲区中的旧版本。"""
+    buffer = ChannelMessageBuffer(per_channel=20)
+    current = msg(10)
+    buffer.add(current)
+    buffer.seed(1, [msg(9, content="旧"), msg(8), msg(7)], before=current, limit=3)
+
+    buffer.update(msg(9, content="新"))
+    assert buffer.recent(1, before=current, limit=3)[0].clean_content == "新"
+
+    buffer.delete(1, [8])
+    assert buffer.recent(1, before=current, limit=3) is None
+    assert buffer.stats["gap_misses"] == 1
+
+
+def test_ring_buffer_is_bounded_per_channel():
+    """【单元测试】每个频道最多保存 per_channel 条消息，最旧的被挤出。"""
+    buffer = ChannelMessageBuffer(per_channel=5)
+    buffer.seed(1, [], before=msg(1), limit=3)
+    for i in range(1, 21):
+        buffer.add(msg(i))
+
+    assert ids(buffer.recent(1, before=msg(21), limit=3)) == [20, 19, 18]
+    assert buffer.recent(1, before=msg(21), limit=10) is None
+
+
+def test_channels_are_evicted_lru():
+    """【单元测试】跟踪的频道数超过上限时，淘汰最久没有使用的频道。"""
+    buffer = ChannelMessageBuffer(per_channel=5, max_channels=2)
+    buffer.add(msg(1, channel_id=1))
+    buffer.add(msg(2, channel_id=2))
+    buffer.add(msg(3, channel_id=1))  # 频道 1 最近被使用
+    buffer.add(msg(4, channel_id=3))  # 淘汰频道 2
+
+    assert buffer.stats["channels"] == 2
+    assert buffer.stats["evictions"] == 1
+    assert 2 not in buffer._channels
+
+
+def test_clear_drops_everything():
+    """【单元测试】重新连接后丢弃所有缓冲，回到冷启动状态。"""
+    buffer = ChannelMessageBuffer()
+    buffer.seed(1, [msg(1)], before=msg(2), limit=10)
+    buffer.clear()
+
+    assert buffer.recent(1, before=msg(2), limit=10) is None
@@ -0,0 +1,114 @@
+import pytest
+
+# 确保测试可以找到src目录下的模块
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.core.token_estimator import estimate_tokens
+from src.services.prompt_assembler import (
+    EMBED_TRUNCATED_MARKER,
+    MessageParts,
+    PromptAssembler,
+)
+
+
+@pytest.fixture
+def current_input() -> MessageParts:
+    return MessageParts(
+        author_name="User",
+        content_text="看看这个",
+        embed_texts=["[嵌入内容开始]\n描述:\n" + "很长的战报" * 50 + "\n[嵌入内容结束]"],
+    )
+
+
+def test_everything_fits_within_budget(current_input: MessageParts):
+    """【单元测试】预算充足时不做任何裁剪，并记录各部分的 token 用量。"""
+    assembler = PromptAssembler(default_token_budget=100_000)
+
+    result = assembler.assemble(
+        static_tokens=100,
+        user_info="User 'u'",
+        history=["A: 一", "B: 二"],
+        memories=["记忆一", "记忆二"],
+        current_input=current_input,
+    )
+
+    assert result.short_term_memory == "A: 一\nB: 二"
+    assert result.long_term_memory == "- 记忆一\n- 记忆二"
+    assert result.current_input == current_input.render()
+    assert (result.dropped_history, result.dropped_memories) == (0, 0)
+    assert result.embed_truncated is False
+    assert result.section_tokens["static"] == 100
+    assert result.section_tokens["long_term_memory"] == estimate_tokens("- 记忆一") * 2
+
+
+def test_trims_oldest_history_first(current_input: MessageParts):
+    """【单元测试】超出预算时，最先丢弃最旧的聊天历史。"""
+    assembler = PromptAssembler()
+    history = ["A: " + "旧" * 100, "B: " + "中" * 100, "C: 新"]
+    base = PromptAssembler(default_token_budget=100_000).assemble(
+        0, "u", [], ["记忆"], current_input
+    )
+
+    result = assembler.assemble(
+        static_tokens=0,
+        user_info="u",
+        history=history,
+        memories=["记忆"],
+        current_input=current_input,
+        token_budget=base.total_tokens + estimate_tokens("C: 新") + 5,
+    )
+
+    assert result.dropped_history == 2
+    assert result.short_term_memory == "C: 新"
+    assert result.dropped_memories == 0
+    assert result.embed_truncated is False
+
+
+def test_trims_lowest_ranked_memories_then_embeds(current_input: MessageParts):
+    """【单元测试】历史全部丢弃后，从排名最低的开始丢弃记忆，最后才截断 embed。"""
+    assembler = PromptAssembler()
+    head_tokens = estimate_tokens(current_input.render(embed_text=""))
+
+    result = assembler.assemble(
+        static_tokens=0,
+        user_info="",
+        history=["A: 历史"],
+        memories=["最相关的记忆", "不太相关的记忆"],
+        current_input=current_input,
+        token_budget=head_tokens + estimate_tokens("- 最相关的记忆") + 30,
+    )
+
+    # embed 远超预算，因此历史和记忆都会先被全部丢弃
+    assert result.short_term_memory == ""
+    assert result.long_term_memory == "无相关记忆"
+    assert result.dropped_memories == 2
+    assert result.embed_truncated is True
+    assert result.current_input.endswith(EMBED_TRUNCATED_MARKER)
+    assert result.total_tokens <= result.token_budget
+
+
+def test_drops_only_as_many_memories_as_needed(current_input: MessageParts):
+    """【单元测试】丢弃记忆时保留排名靠前的记忆。"""
+    plain_input = MessageParts(author_name="User", content_text="问题")
+    head_tokens = estimate_tokens(plain_input.render())
+
+    result = PromptAssembler().assemble(
+        static_tokens=0,
+        user_info="",
+        history=[],
+        memories=["最相关的记忆", "不太相关的记忆"],
+        current_input=plain_input,
+        token_budget=head_tokens + estimate_tokens("- 最相关的记忆") + 1,
+    )
+
+    assert result.long_term_memory == "- 最相关的记忆"
+    assert result.dropped_memories == 1
+
+
+def test_empty_memories_use_placeholder(current_input: MessageParts):
+    """【单元测试】没有长期记忆时使用占位文本。"""
+    result = PromptAssembler().assemble(0, "u", [], [], current_input)
+    assert result.long_term_memory == "无相关记忆"
@@ -0,0 +1,197 @@
+import asyncio
+import random
+import pytest
+
+# 确保测试可以找到src目录下的模块
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.services.gemini_client import LLMClientError
+from src.services.resilient_llm_client import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ResilientLLMClient,
+    RetryPolicy,
+)
+
+
+class ScriptedBackend:
+    """
+    一个本地的假 LLM 后端：按脚本依次返回结果或抛出异常，每次调用可以带一个延迟。
+    """
+
+    def __init__(self, script, delays=None):
+        self.script = list(script)
+        self.delays = list(delays or [])
+        self.calls = 0
+
+    async def generate_text(self, prompt: str) -> str:
+        index = self.calls
+        self.calls += 1
+        if index < len(self.delays):
+            await asyncio.sleep(self.delays[index])
+        outcome = self.script[min(index, len(self.script) - 1)]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    async def generate_text_stream(self, prompt: str):
+        outcome = self.script[min(self.calls, len(self.script) - 1)]
+        self.calls += 1
+        if isinstance(outcome, Exception):
+            raise outcome
+        for char in outcome:
+            yield char
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def no_sleep(delay: float) -> None:
+    no_sleep.delays.append(delay)
+
+
+def make_client(backend, **kwargs) -> ResilientLLMClient:
+    no_sleep.delays = []
+    return ResilientLLMClient(
+        backend,
+        retry_policy=kwargs.pop("retry_policy", RetryPolicy(max_attempts=3, base_delay=1, max_delay=8)),
+        rng=random.Random(0),
+        sleep=no_sleep,
+        **kwargs,
+    )
+
+
+@pytest.mark.asyncio
+async def test_retryable_errors_are_retried_with_jittered_backoff():
+    """【单元测试】可重试错误会带抖动退避地重试，最终返回成功结果。"""
+    backend = ScriptedBackend(
+        [LLMClientError("429", retryable=True), LLMClientError("503", retryable=True), "ok"]
+    )
+    client = make_client(backend)
+
+    assert await client.generate_text("hi") == "ok"
+    assert backend.calls == 3
+    assert client.stats["retries"] == 2
+    # 第 n 次重试的等待时间落在 [0, base * 2**n] 之内
+    assert 0 <= no_sleep.delays[0] <= 1
+    assert 0 <= no_sleep.delays[1] <= 2
+
+
+@pytest.mark.asyncio
+async def test_non_retryable_errors_fail_immediately():
+    """【单元测试】不可重试的错误 (例如参数错误) 不会被重试。"""
+    backend = ScriptedBackend([LLMClientError("400 bad request"), "ok"])
+    client = make_client(backend)
+
+    with pytest.raises(LLMClientError, match="400"):
+        await client.generate_text("hi")
+    assert backend.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_non_retryable_errors_do_not_open_the_circuit():
+    """【单元测试】一批被安全拦截 (不可重试) 的请求不会让熔断器打开，其他用户的请求照常放行。"""
+    breaker = CircuitBreaker(failure_threshold=2)
+    backend = ScriptedBackend([LLMClientError("blocked by safety filters")] * 4 + ["ok"])
+    client = make_client(backend, circuit_breaker=breaker)
+
+    for _ in range(3):
+        with pytest.raises(LLMClientError, match="blocked"):
+            await client.generate_text("hi")
+    with pytest.raises(LLMClientError, match="blocked"):
+        async for _ in client.generate_text_stream("hi"):
+            pass
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert await client.generate_text("hi") == "ok"
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_and_recovers_after_timeout():
+    """
+    【单元测试】连续失败达到阈值后熔断器打开并快速失败；
+    恢复时间过后放行一个试探请求，成功则关闭熔断器。
+    """
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=10, clock=clock)
+    backend = ScriptedBackend([LLMClientError("down", retryable=True)] * 2 + ["back"])
+    client = make_client(
+        backend, retry_policy=RetryPolicy(max_attempts=1), circuit_breaker=breaker
+    )
+
+    for _ in range(2):
+        with pytest.raises(LLMClientError):
+            await client.generate_text("hi")
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        await client.generate_text("hi")
+    assert backend.calls == 2  # 熔断期间不会调用后端
+
+    clock.now = 11
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert await client.generate_text("hi") == "back"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_unexpected_error_on_probe_releases_the_half_open_slot():
+    """
+    【单元测试】半开状态的试探请求抛出意料之外的异常 (不是 LLMClientError) 时，
+    试探名额被释放，之后的请求 (包括流式) 仍然可以继续试探，熔断器不会一直拒绝请求。
+    """
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10, clock=clock)
+    backend = ScriptedBackend(
+        [LLMClientError("down", retryable=True), ValueError("bug"), ValueError("bug"), "back"]
+    )
+    client = make_client(
+        backend, retry_policy=RetryPolicy(max_attempts=1), circuit_breaker=breaker
+    )
+    with pytest.raises(LLMClientError):
+        await client.generate_text("hi")
+    clock.now = 11
+
+    with pytest.raises(ValueError):
+        await client.generate_text("hi")
+    with pytest.raises(ValueError):
+        async for _ in client.generate_text_stream("hi"):
+            pass
+
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert await client.generate_text("hi") == "back"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_wins_when_primary_is_slow():
+    """
+    【单元测试】第一个请求超过近期 p95 延迟后发出对冲请求，并采用先返回的结果。
+    """
+    backend = ScriptedBackend(["slow", "fast"], delays=[1.0, 0.0])
+    client = make_client(backend, hedge_enabled=True, hedge_min_samples=1)
+    client._latencies.append(0.01)  # 近期延迟约 10ms
+
+    assert await client.generate_text("hi") == "fast"
+    assert client.stats["hedged"] == 1
+    assert client.stats["hedge_wins"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_retries_only_before_first_chunk():
+    """【单元测试】流式生成只在产出第一块文本之前重试。"""
+    backend = ScriptedBackend([LLMClientError("429", retryable=True), "好的"])
+    client = make_client(backend)
+
+    chunks = [chunk async for chunk in client.generate_text_stream("hi")]
+
+    assert "".join(chunks) == "好的"
+    assert backend.calls == 2
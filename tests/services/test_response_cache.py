@@ -0,0 +1,114 @@
+import pytest
+
+# 确保测试可以找到src目录下的模块
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.services.embedding import HashingEmbedder, cosine_similarity
+from src.services.response_cache import ResponseCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(clock: FakeClock) -> ResponseCache:
+    return ResponseCache(ttl=60, max_entries=2, similarity_threshold=0.8, clock=clock)
+
+
+def test_hashing_embedder_is_normalized_and_deterministic():
+    """【单元测试】哈希向量化器的输出是确定的单位向量。"""
+    embedder = HashingEmbedder(dimension=64)
+    a = embedder.embed_one("你们社群名字啥意思")
+
+    assert a == embedder.embed_one("你们社群名字啥意思")
+    assert cosine_similarity(a, a) == pytest.approx(1.0)
+
+
+def test_normalize_and_context_dependency():
+    """【单元测试】归一化去掉提及和首尾标点；指代上文的问题不会被缓存。"""
+    assert ResponseCache.normalize("@Gopher  你们社群名字啥意思？？") == "你们社群名字啥意思"
+    assert ResponseCache.normalize("ＡＢＣ") == "abc"
+    assert ResponseCache().cache_key_for("@Gopher 上面那个人说的是真的吗") is None
+    assert ResponseCache().cache_key_for("@Gopher ?") is None
+
+
+@pytest.mark.asyncio
+async def test_exact_then_semantic_hit(cache: ResponseCache):
+    """【单元测试】先精确匹配；未命中时按相似度匹配同一角色的条目。"""
+    await cache.put("Gopher", "你们社群名字啥意思", "洪城客栈的意思！")
+
+    assert await cache.get("Gopher", "你们社群名字啥意思") == "洪城客栈的意思！"
+    assert await cache.get("Gopher", "你们社群名字是啥意思") == "洪城客栈的意思！"
+    assert await cache.get("OtherBot", "你们社群名字啥意思") is None
+    assert await cache.get("Gopher", "今天吃什么") is None
+    assert cache.stats == {
+        "entries": 1,
+        "exact_hits": 1,
+        "semantic_hits": 1,
+        "misses": 2,
+        "evictions": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_ttl_expiry_and_lru_eviction(cache: ResponseCache, clock: FakeClock):
+    """【单元测试】过期条目不会命中；超过容量时淘汰最久未使用的条目。"""
+    await cache.put("Gopher", "问题一", "答一")
+    await cache.put("Gopher", "问题二", "答二")
+    await cache.get("Gopher", "问题一")  # 问题一变为最近使用
+    await cache.put("Gopher", "完全不同的第三个", "答三")
+
+    assert await cache.get("Gopher", "问题一") == "答一"
+    assert cache.stats["evictions"] == 1
+    assert "问题二" not in [key[1] for key in cache._entries]
+
+    clock.now = 61
+    assert await cache.get("Gopher", "问题一") is None
+
+
+@pytest.mark.asyncio
+async def test_default_threshold_rejects_different_questions():
+    """【单元测试】默认阈值下只匹配几乎相同的问题；字面相近但意思不同 (或相反) 的问题不会命中。"""
+    cache = ResponseCache()
+    await cache.put("Gopher", "今天天气怎么样", "今天晴天！")
+    await cache.put("Gopher", "你喜欢吃苹果吗", "喜欢！")
+    await cache.put("Gopher", "你们社群名字是什么意思", "洪城客栈的意思！")
+
+    assert await cache.get("Gopher", "明天天气怎么样") is None
+    assert await cache.get("Gopher", "你不喜欢吃苹果吗") is None
+    assert await cache.get("Gopher", "你们社群名字是什么意思呀") == "洪城客栈的意思！"
+
+
+@pytest.mark.asyncio
+async def test_negated_question_never_matches(cache: ResponseCache):
+    """【单元测试】即使相似度超过阈值，否定词不一致的问题也不会命中。"""
+    await cache.put("Gopher", "你觉得周末一起去看电影然后吃火锅好吗", "好呀！")
+
+    assert await cache.get("Gopher", "你觉得周末不一起去看电影然后吃火锅好吗") is None
+    assert await cache.get("Gopher", "你觉得周末一起去看电影然后吃火锅好吗呀") == "好呀！"
+
+
+@pytest.mark.asyncio
+async def test_answers_are_shared_between_users_unless_personal(cache: ResponseCache):
+    """【单元测试】社群里反复被问的问题，谁来问都复用同一个回答；问到提问者自己的问题不会被缓存。"""
+    await cache.put("Gopher", "你们社群名字啥意思", "洪城客栈的意思！")
+
+    # 缓存不区分提问者：另一个用户问同样的问题直接命中
+    assert await cache.get("Gopher", "你们社群名字啥意思") == "洪城客栈的意思！"
+    assert cache.stats["exact_hits"] == 1
+    assert cache.cache_key_for("@Gopher 你还记得我吗") is None
+    assert cache.cache_key_for("@Gopher what is my rank") is None
+    assert cache.cache_key_for("@Gopher 你们社群名字啥意思") == "你们社群名字啥意思"
@@ -0,0 +1,132 @@
+import asyncio
+import pytest
+
+# 确保测试可以找到src目录下的模块
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.services.single_flight import IdempotencyGuard, SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_are_coalesced():
+    """【单元测试】相同键的并发调用只执行一次，所有调用者共享结果。"""
+    flight = SingleFlight()
+    release = asyncio.Event()
+    calls = 0
+
+    async def fn():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "回答"
+
+    key = SingleFlight.key_for("同一个 prompt")
+    tasks = [asyncio.create_task(flight.do(key, fn)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert results == ["回答"] * 5
+    assert calls == 1
+    assert flight.stats == {"in_flight": 0, "leaders": 1, "coalesced": 4}
+
+
+@pytest.mark.asyncio
+async def test_leader_error_is_shared_and_key_is_released():
+    """【单元测试】领头调用失败时所有等待者拿到同一个异常，之后的调用会重新执行。"""
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def failing():
+        await release.wait()
+        raise RuntimeError("boom")
+
+    tasks = [asyncio.create_task(flight.do("k", failing)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+    async def ok():
+        return "ok"
+
+    assert await flight.do("k", ok) == "ok"
+    assert flight.leaders == 2
+
+
+@pytest.mark.asyncio
+async def test_follower_takes_over_when_leader_is_cancelled():
+    """【单元测试】领头调用被取消时，等待者不会跟着被取消，而是自己重新执行。"""
+    flight = SingleFlight()
+    release = asyncio.Event()
+    calls = 0
+
+    async def fn():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "done"
+
+    leader = asyncio.create_task(flight.do("k", fn))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("k", fn))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await follower == "done"
+    assert leader.cancelled()
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_stream_followers_receive_full_text():
+    """【单元测试】流式版本：领头者逐块产出，等待者一次性拿到完整文本。"""
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def factory():
+        yield "你"
+        await release.wait()
+        yield "好"
+
+    async def collect():
+        return [chunk async for chunk in flight.stream("k", factory)]
+
+    leader = asyncio.create_task(collect())
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(collect())
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await leader == ["你", "好"]
+    assert await follower == ["你好"]
+    assert flight.stats["coalesced"] == 1
+
+
+def test_idempotency_guard_rejects_duplicates_until_ttl():
+    """【单元测试】同一个消息 ID 在 TTL 内只能认领一次，过期后可以重新认领。"""
+    now = [0.0]
+    guard = IdempotencyGuard(ttl=10, clock=lambda: now[0])
+
+    assert guard.claim(1) is True
+    assert guard.claim(1) is False
+    assert guard.claim(2) is True
+    assert guard.duplicates == 1
+
+    now[0] = 11.0
+    assert guard.claim(1) is True
+
+
+def test_idempotency_guard_is_bounded():
+    """【单元测试】记录数量超过上限时淘汰最旧的记录。"""
+    guard = IdempotencyGuard(ttl=100, max_entries=2, clock=lambda: 0.0)
+    for message_id in (1, 2, 3):
+        assert guard.claim(message_id)
+    assert guard.claim(1) is True
+    assert guard.claim(3) is False